@@ -33,6 +33,9 @@ import PyPDF2
 from docx import Document
 import json
 import requests
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Charger les variables d'environnement depuis .env
 load_dotenv()
@@ -590,6 +593,76 @@ def horizontal_progress_timeline(current_step: int = 1, total_steps: int = 5, st
     """
     return html_content
 
+# ==========================================
+# 📡 LIVE STREAMING PROGRESS
+# ==========================================
+def run_with_live_events(task, events: queue.Queue, on_events, poll_seconds: float = 0.3):
+    """
+    Exécute task() dans un thread pendant que le thread Streamlit affiche les événements de streaming
+    (tmc_streaming) au fil de l'eau. L'enrichisseur les publie depuis ses threads dans `events`:
+    seuls les placeholders de ce thread sont modifiés.
+    """
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(task)
+        while True:
+            finished = future.done()
+            batch = []
+            while not events.empty():
+                batch.append(events.get_nowait())
+            if batch:
+                on_events(batch)
+            if finished:
+                return future.result()
+            time.sleep(poll_seconds)
+
+
+def apply_stream_events(live: dict, batch: list, stage_steps: dict):
+    """
+    Met à jour l'état affiché: étape de la timeline, éléments reçus par clé (un appel de réparation
+    renvoie les mêmes index → écrasés, pas dupliqués), caractères reçus, attente dans la file du limiteur
+    """
+    for event in batch:
+        stage = event.get('stage')
+        if event['type'] == 'queued':
+            live['queued'] = event
+        elif event['type'] == 'start':
+            live['queued'] = None
+            if stage in stage_steps:
+                live['step'] = max(live['step'], stage_steps[stage])
+        elif event['type'] == 'item':
+            live['items'].setdefault(event['key'], {})[event['index']] = event['item']
+            if event['key'] == 'domaines_analyses':
+                live['step'] = max(live['step'], stage_steps.get('domaines_analyses', live['step']))
+        elif event['type'] == 'progress':
+            live['chars'] = event['output_chars']
+
+
+def live_results_markdown(live: dict) -> str:
+    """Résultats partiels: domaines scorés et expériences enrichies déjà reçus (ou attente dans la file)"""
+    lines = []
+    queued = live.get('queued')
+    if queued:
+        ahead = queued['queue_depth']
+        lines.append(f"⏳ Waiting for API capacity: {ahead} request{'s' if ahead != 1 else ''} ahead, "
+                     f"estimated wait ~{queued['estimated_wait_seconds']:.0f}s\n")
+    domains = live['items'].get('domaines_analyses', {})
+    if domains:
+        lines.append("**⚙️ Domains scored so far**")
+        for index in sorted(domains):
+            domain = domains[index]
+            icon = {"incompatible": "❌", "partiel": "⚠️"}.get(domain.get('match'), "✅")
+            lines.append(f"- {icon} {domain.get('domaine', '')} — {domain.get('score', 0)}/{domain.get('score_max', 0)}")
+    experiences = live['items'].get('experiences_enrichies', {})
+    if experiences:
+        lines.append("\n**✨ Experiences enriched so far**")
+        for index in sorted(experiences):
+            experience = experiences[index]
+            lines.append(f"- {experience.get('poste', '')} — {experience.get('entreprise', '')} "
+                         f"({experience.get('periode', '')})")
+    if live['chars']:
+        lines.append(f"\n<small>📡 {live['chars']:,} characters received</small>")
+    return "\n".join(lines)
+
 # ==========================================
 # 🍪 COOKIE MANAGER
 # ==========================================
@@ -1085,6 +1158,10 @@ def main_app():
     if CLIENT_DATA[st.session_state.selected_client]["show_language"]:
         st.markdown("---")
         st.markdown('<h3 style="text-align: center;">🌐 Generated CV Language</h3>', unsafe_allow_html=True)
+        # Présélection depuis la langue détectée du CV (à poser avant la création du widget)
+        detected_language = st.session_state.pop('detected_language', None)
+        if detected_language:
+            st.session_state.language_selector = "🇫🇷 French" if detected_language == "French" else "🇬🇧 English"
         language = st.radio(
             "Select language",
             options=["🇫🇷 French", "🇬🇧 English"],
@@ -1138,6 +1215,7 @@ def process_cv_matching():
     st.markdown("<br>", unsafe_allow_html=True)
     
     timeline_placeholder = st.empty()
+    live_placeholder = st.empty()
     
     # Define 3-step matching timeline
     matching_steps = [
@@ -1148,29 +1226,44 @@ def process_cv_matching():
     
     try:
         # Import enricher
-        from tmc_cv_enricher import TMCUniversalEnricher
+        from tmc_cv_enricher import TMCUniversalEnricher, DocumentExtractionError
         
-        # Initialize enricher
+        # Initialize enricher (streaming events → queue, rendered by this thread)
         api_key = os.getenv('ANTHROPIC_API_KEY') or st.secrets.get("ANTHROPIC_API_KEY")
-        enricher = TMCUniversalEnricher(api_key=api_key)
+        events = queue.Queue()
+        enricher = TMCUniversalEnricher(api_key=api_key, on_event=events.put)
         
         # Save uploaded files temporarily
         cv_path = save_uploaded(st.session_state.cv_file)
         jd_path = save_uploaded(st.session_state.jd_file)
         
-        # Step 1: Extraction
+        # Steps 1-3: Extraction → Parsing → Matching, JD extraction runs alongside the CV parsing call
+        # (unreadable files fail before any API call)
         timeline_placeholder.markdown(horizontal_progress_timeline(1, 3, matching_steps), unsafe_allow_html=True)
-        cv_text = enricher.extract_cv_text(str(cv_path))
         
-        # Step 2: Parsing (removed intermediate timeline render for performance)
-        parsed_cv = enricher.parse_cv_with_claude(cv_text)
+        # Live progress: Analysis while the CV is parsed, Matching as soon as scored domains stream in
+        live = {'step': 1, 'items': {}, 'chars': 0, 'queued': None}
+        stage_steps = {'parse_cv': 2, 'parse_and_score': 2, 'matching': 3, 'domaines_analyses': 3}
         
-        # Step 3: Matching Analysis (removed intermediate timeline render for performance)
-        jd_text = enricher.read_job_description(str(jd_path))
-        matching_analysis = enricher.analyze_cv_matching(parsed_cv, jd_text)
+        def show_events(batch):
+            apply_stream_events(live, batch, stage_steps)
+            timeline_placeholder.markdown(horizontal_progress_timeline(live['step'], 3, matching_steps),
+                                          unsafe_allow_html=True)
+            live_placeholder.markdown(live_results_markdown(live), unsafe_allow_html=True)
+        
+        pipeline = run_with_live_events(
+            lambda: enricher.run_matching_pipeline(str(cv_path), str(jd_path)), events, show_events
+        )
+        parsed_cv = pipeline['parsed_cv']
+        jd_text = pipeline['jd_text']
+        matching_analysis = pipeline['matching_analysis']
+        # Langue du CV: présélectionne le choix French / English (CAE) au prochain affichage
+        if CLIENT_DATA[st.session_state.selected_client]["show_language"]:
+            st.session_state.detected_language = enricher.detected_language
         
         # Clear timeline
         timeline_placeholder.empty()
+        live_placeholder.empty()
         
         # Store results
         st.session_state.matching_data = {
@@ -1197,6 +1290,12 @@ def process_cv_matching():
         st.success("✅ Analysis Complete!")
         st.rerun()
         
+    except DocumentExtractionError as e:
+        timeline_placeholder.empty()
+        live_placeholder.empty()
+        st.error(f"{str(e)}\n\nPlease upload a readable PDF, Word or text file.")
+        st.session_state.processing = False
+        
     except Exception as e:
         st.error(f"❌ Error during processing: {str(e)}")
         st.session_state.processing = False
@@ -1520,6 +1619,7 @@ def generate_cv(data):
     st.markdown("## 📝 Generating Optimized CV")
     
     timeline_placeholder = st.empty()
+    live_placeholder = st.empty()
     
     # Define 3-step generation timeline
     generation_steps = [
@@ -1532,7 +1632,8 @@ def generate_cv(data):
         from tmc_cv_enricher import TMCUniversalEnricher
         
         api_key = os.getenv('ANTHROPIC_API_KEY') or st.secrets.get("ANTHROPIC_API_KEY")
-        enricher = TMCUniversalEnricher(api_key=api_key)
+        events = queue.Queue()
+        enricher = TMCUniversalEnricher(api_key=api_key, on_event=events.put)
         
         # Get client config
         client_config = CLIENT_DATA[st.session_state.selected_client]
@@ -1544,13 +1645,25 @@ def generate_cv(data):
         print(f"🌐 LANGUAGE SELECTED: {st.session_state.selected_language}", flush=True)
         print(f"📋 CLIENT: {st.session_state.selected_client}", flush=True)
         
+        # Live progress: enriched experiences are listed as they stream in
+        live = {'step': 1, 'items': {}, 'chars': 0, 'queued': None}
+        
+        def show_events(batch):
+            apply_stream_events(live, batch, {'enrich': 1})
+            live_placeholder.markdown(live_results_markdown(live), unsafe_allow_html=True)
+        
         # 🚀 PERFORMANCE FIX: Pass matching_analysis to avoid redundant matching (saves 15-20s)
-        enriched_cv = enricher.enrich_cv_with_prompt(
-            data['parsed_cv'],
-            data['jd_text'],
-            language=st.session_state.selected_language,
-            matching_analysis=data.get('matching_analysis')  # ✅ Reuse Step 1 matching
+        enriched_cv = run_with_live_events(
+            lambda: enricher.enrich_cv_with_prompt(
+                data['parsed_cv'],
+                data['jd_text'],
+                language=st.session_state.selected_language,
+                matching_analysis=data.get('matching_analysis')  # ✅ Reuse Step 1 matching
+            ),
+            events,
+            show_events
         )
+        live_placeholder.empty()
         
         # Step 2: Structuring (removed intermediate timeline render for performance)
         tmc_context = enricher.map_to_tmc_structure(data['parsed_cv'], enriched_cv)
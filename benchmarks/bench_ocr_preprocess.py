@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark du prétraitement OCR (tmc_ocr_preprocess)
+
+Compare, page par page, tesseract sur la page brute et sur la page prétraitée
+(niveaux de gris, redressement, binarisation adaptative, recadrage).
+
+Corpus: scans synthétiques générés à la volée (fond coloré, inclinaison, marges larges,
+photo avec éclairage inégal) + PDF scannés ou images passés en arguments.
+
+Mesures par page: temps total (prétraitement compris, médiane sur --repeat passes),
+confiance moyenne des mots, nombre de mots et, pour le corpus synthétique,
+part des mots attendus retrouvés.
+
+Usage:
+    python benchmarks/bench_ocr_preprocess.py [--repeat 3] [--dpi 300] [scan1.pdf photo.jpg ...]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont  # noqa: E402
+from pdf2image import convert_from_path  # noqa: E402
+import pytesseract  # noqa: E402
+
+from tmc_ocr import OCREngine, _recognize_with_confidence  # noqa: E402
+from tmc_ocr_preprocess import preprocess_page  # noqa: E402
+
+WORDS = (
+    "python java kubernetes cloud azure data pipeline migration architecture team lead client "
+    "delivery agile scrum api microservices security audit reporting dashboard analytics sql "
+    "integration testing automation budget stakeholder roadmap platform monitoring performance "
+    "design review mentoring backlog release deployment infrastructure network compliance"
+).split()
+
+
+# ===== Corpus synthétique =====
+
+def _font(size):
+    """Police TrueType du système si disponible, sinon police par défaut de Pillow"""
+    for name in ('DejaVuSans.ttf', 'LiberationSans-Regular.ttf', 'Arial.ttf'):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def _render_cv(rng, dpi, background, ink, left_margin_in):
+    """Page lettre avec titre + lignes d'expérience; retourne (image, mots attendus)"""
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    image = Image.new('RGB', (width, height), background)
+    draw = ImageDraw.Draw(image)
+    body = _font(int(dpi * 11 / 72))
+    title = _font(int(dpi * 16 / 72))
+
+    x = int(left_margin_in * dpi)
+    y = int(1.2 * dpi)
+    draw.text((x, y), "Candidat Exemple Cloud Architect", fill=ink, font=title)
+    expected = "Candidat Exemple Cloud Architect".lower().split()
+    y += int(dpi * 0.5)
+    for _ in range(32):
+        line = [rng.choice(WORDS) for _ in range(rng.randint(5, 9))]
+        draw.text((x, y), " ".join(line).capitalize(), fill=ink, font=body)
+        expected.extend(line)
+        y += int(dpi * 16 / 72)
+    return image, expected
+
+
+def _photo_lighting(image):
+    """Éclairage inégal d'une photo de téléphone: dégradé sombre vers un coin, léger flou"""
+    ramp = Image.linear_gradient('L')
+    # Dégradé diagonal sans bord net: moyenne d'un dégradé vertical et horizontal
+    gradient = ImageChops.invert(ImageChops.add(ramp, ramp.transpose(Image.Transpose.ROTATE_90), scale=2)).resize(
+        image.size, Image.BILINEAR
+    )
+    shadow = Image.new('RGB', image.size, (70, 60, 50))
+    return Image.composite(image, shadow, gradient.point(lambda v: 110 + v * 145 // 255)).filter(
+        ImageFilter.GaussianBlur(1)
+    )
+
+
+def build_corpus(dpi):
+    """Scans synthétiques déterministes: [(nom, image, mots attendus)]"""
+    rng = random.Random(7)
+    corpus = []
+
+    image, expected = _render_cv(rng, dpi, (255, 255, 255), (20, 20, 20), 1.0)
+    corpus.append(('clean_scan', image, expected))
+
+    image, expected = _render_cv(rng, dpi, (236, 226, 198), (40, 40, 80), 1.0)
+    corpus.append(('colored_background', image, expected))
+
+    image, expected = _render_cv(rng, dpi, (245, 245, 245), (20, 20, 20), 1.0)
+    corpus.append(('skewed_3deg', image.rotate(3, resample=Image.BICUBIC, fillcolor=(245, 245, 245)), expected))
+
+    image, expected = _render_cv(rng, dpi, (255, 255, 255), (20, 20, 20), 2.5)
+    corpus.append(('wide_margins', image, expected))
+
+    image, expected = _render_cv(rng, dpi, (250, 248, 240), (30, 30, 30), 1.0)
+    photo = _photo_lighting(image.rotate(-1.5, resample=Image.BICUBIC, fillcolor=(250, 248, 240)))
+    corpus.append(('phone_photo', photo, expected))
+    return corpus
+
+
+def load_inputs(paths, dpi):
+    """Pages des PDF scannés et images passés en arguments: [(nom, image, None)]"""
+    pages = []
+    for path in paths:
+        name = os.path.basename(path)
+        if path.lower().endswith('.pdf'):
+            for number, image in enumerate(convert_from_path(path, dpi=dpi), 1):
+                pages.append((f"{name}#{number}", image, None))
+        else:
+            pages.append((name, Image.open(path).convert('RGB'), None))
+    return pages
+
+
+# ===== Mesures =====
+
+def run_ocr(image, options, dpi, preprocess, repeat):
+    """(ms médian prétraitement + OCR, confiance moyenne, texte)"""
+    timings = []
+    text, confidence = '', 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        source = preprocess_page(image, dpi)[0] if preprocess else image
+        text, confidence = _recognize_with_confidence(source, options)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, confidence, text
+
+
+def recall(text, expected):
+    """Part des mots attendus présents dans la sortie (multiensemble)"""
+    remaining = {}
+    for word in text.lower().split():
+        remaining[word] = remaining.get(word, 0) + 1
+    found = 0
+    for word in expected:
+        if remaining.get(word):
+            remaining[word] -= 1
+            found += 1
+    return found / len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='*', help="PDF scannés ou images (JPEG, PNG) supplémentaires")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--dpi', type=int, default=300)
+    args = parser.parse_args()
+
+    try:
+        pytesseract.get_tesseract_version()
+    except pytesseract.TesseractNotFoundError:
+        sys.exit("tesseract n'est pas installé (voir apt-packages)")
+
+    engine = OCREngine(page_cache_mb=0, preprocess=False, dpi=args.dpi)
+    options = engine._options()
+    # Même configuration que l'OCR pleine résolution, avec les confiances de image_to_data
+    options['fast_config'] = engine.config
+
+    pages = build_corpus(args.dpi) + load_inputs(args.inputs, args.dpi)
+
+    print(f"{'page':<24} {'mode':<5} {'ms':>8} {'conf':>6} {'words':>6} {'recall':>7}")
+    print("-" * 60)
+    totals = {'raw': [0.0, []], 'pre': [0.0, []]}
+    for name, image, expected in pages:
+        for mode in ('raw', 'pre'):
+            ms, confidence, text = run_ocr(image, options, args.dpi, mode == 'pre', args.repeat)
+            totals[mode][0] += ms
+            totals[mode][1].append(confidence)
+            quality = f"{recall(text, expected):>7.0%}" if expected else f"{'-':>7}"
+            print(f"{name:<24} {mode:<5} {ms:>8.0f} {confidence:>6.1f} {len(text.split()):>6} {quality}")
+    print("-" * 60)
+    for mode, (ms, confidences) in totals.items():
+        print(f"{'TOTAL':<24} {mode:<5} {ms:>8.0f} {statistics.mean(confidences):>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
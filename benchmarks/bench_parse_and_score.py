@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark parse_and_score (un appel LLM) contre le chemin deux appels (parsing puis matching)
+
+Corpus fixe: paires CV / JD synthétiques déterministes + paires de fichiers passées en arguments
+(cv.pdf:jd.txt). Chaque paire est analysée --runs fois dans chaque mode, à partir du même texte extrait.
+
+Mesures par mode: latence LLM (médiane et p95), tokens entrée (cache compris) / sortie et coût par candidat
+(lectures de cache au tarif réduit, voir TMC_PROMPT_CACHE),
+stabilité du score par paire (écart-type et étendue sur les runs) et écart moyen entre les deux modes.
+
+Usage:
+    python benchmarks/bench_parse_and_score.py [--runs 3] [--fake] [cv1.pdf:jd1.txt ...]
+
+    --fake lance tools/fake_messages_server.py en local (aucun coût, latence simulée):
+    utile pour valider le harnais; les chiffres de tokens et de stabilité n'ont de sens qu'avec l'API réelle.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+from tmc_cv_enricher import TMCUniversalEnricher  # noqa: E402
+
+MODES = ('two_call', 'single_call')
+
+SKILLS = (
+    "Python", "Java", "Kubernetes", "Azure", "AWS", "Terraform", "SQL", "Power BI", "Scrum", "ITIL",
+    "React", "Node.js", "Spark", "Airflow", "SAP", "Salesforce", "ServiceNow", "Docker", "GCP", "Kafka"
+)
+ROLES = ("Cloud Architect", "Data Engineer", "Project Manager", "Full-Stack Developer", "Business Analyst")
+COMPANIES = ("Banque Laurentienne", "Desjardins", "CGI", "Hydro-Québec", "Bombardier", "Ubisoft", "Telus")
+
+
+# ===== Corpus =====
+
+def _synthetic_cv(rng, role, skills):
+    lines = [f"Candidat {rng.randint(100, 999)}", role, "Montréal, QC, Canada", "Français, Anglais (bilingue)", "",
+             "PROFIL", f"{role} avec {rng.randint(3, 15)} ans d'expérience.", "", "COMPÉTENCES", ", ".join(skills),
+             "", "EXPÉRIENCES"]
+    year = 2024
+    for _ in range(rng.randint(2, 4)):
+        start = year - rng.randint(1, 5)
+        lines.append(f"{start}-{year} | {rng.choice(COMPANIES)} | {role}")
+        for skill in rng.sample(skills, min(3, len(skills))):
+            lines.append(f"- Livraison de projets {skill} pour {rng.randint(2, 40)} applications, "
+                         f"équipe de {rng.randint(2, 12)} personnes")
+        year = start
+    lines += ["", "FORMATION", f"B.Sc. Informatique | Université de Montréal | {year - 4}"]
+    return "\n".join(lines)
+
+
+def _synthetic_jd(rng, role, skills):
+    required = rng.sample(skills, 3)
+    nice = rng.sample(SKILLS, 2)
+    return "\n".join([
+        f"Job Description: {role}", "Location: Montreal (hybrid)", "",
+        "Required:", *[f"- {rng.randint(3, 8)}+ years of {skill}" for skill in required],
+        "- Bilingual French / English", "", "Nice to have:", *[f"- {skill}" for skill in nice],
+    ])
+
+
+def build_corpus(pairs=5):
+    """Paires synthétiques déterministes: [(nom, cv_text, jd_text)]"""
+    rng = random.Random(17)
+    corpus = []
+    for index in range(pairs):
+        role = ROLES[index % len(ROLES)]
+        skills = rng.sample(SKILLS, 6)
+        # JD construite sur une partie des compétences du CV → scores moyens, pas 0 ni 100
+        corpus.append((f"synthetic_{index + 1}", _synthetic_cv(rng, role, skills), _synthetic_jd(rng, role, skills)))
+    return corpus
+
+
+def load_pairs(specs, enricher):
+    """Paires de fichiers 'cv:jd' → [(nom, cv_text, jd_text)] (extraction une seule fois)"""
+    pairs = []
+    for spec in specs:
+        cv_path, _, jd_path = spec.partition(':')
+        if not jd_path:
+            sys.exit(f"Paire invalide (attendu cv:jd): {spec}")
+        pairs.append((os.path.basename(cv_path), enricher.extract_cv_text(cv_path),
+                      enricher.read_job_description(jd_path)))
+    return pairs
+
+
+# ===== Mesures =====
+
+def run_once(mode, cv_text, jd_text, api_key, base_url):
+    """(secondes, tokens entrée cache compris, tokens sortie, score, coût) pour une analyse complète dans le mode donné"""
+    enricher = TMCUniversalEnricher(api_key=api_key, base_url=base_url, analysis_mode=mode, extraction_cache=False,
+                                    priority='batch', result_cache=False)
+    start = time.perf_counter()
+    if mode == 'single_call':
+        _, matching = enricher.parse_and_score(cv_text, jd_text)
+    else:
+        matching = enricher.analyze_cv_matching(enricher.parse_cv_with_claude(cv_text), jd_text)
+    elapsed = time.perf_counter() - start
+    tokens = {key: sum(call[key] for call in enricher.api_calls)
+              for key in ('input_tokens', 'output_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens')}
+    input_tokens = tokens['input_tokens'] + tokens['cache_read_input_tokens'] + tokens['cache_creation_input_tokens']
+    return (elapsed, input_tokens, tokens['output_tokens'], matching.get('score_matching', 0),
+            enricher._estimate_cost_usd(tokens))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pairs', nargs='*', help="Paires de fichiers cv:jd supplémentaires")
+    parser.add_argument('--runs', type=int, default=3, help="Analyses par paire et par mode")
+    parser.add_argument('--synthetic', type=int, default=5, help="Nombre de paires synthétiques")
+    parser.add_argument('--base-url', default=None, help="URL de l'API Messages (défaut: ANTHROPIC_BASE_URL)")
+    parser.add_argument('--fake', action='store_true', help="Serveur Messages local simulé (latence 1s)")
+    args = parser.parse_args()
+
+    server = None
+    api_key, base_url = os.getenv('ANTHROPIC_API_KEY'), args.base_url
+    if args.fake:
+        from fake_messages_server import FakeMessagesServer
+        server = FakeMessagesServer(latency=1.0).start()
+        api_key, base_url = 'test', server.url
+    if not api_key:
+        sys.exit("ANTHROPIC_API_KEY manquante (ou --fake)")
+
+    try:
+        reader = TMCUniversalEnricher(api_key=api_key, base_url=base_url)
+        corpus = build_corpus(args.synthetic) + load_pairs(args.pairs, reader)
+
+        # {mode: {paire: [(secondes, in, out, score, coût)]}}
+        results = {mode: {} for mode in MODES}
+        for name, cv_text, jd_text in corpus:
+            for run in range(args.runs):
+                # Modes alternés à chaque run: pas de biais d'ordre (cache, chauffe du serveur)
+                for mode in (MODES if run % 2 == 0 else MODES[::-1]):
+                    results[mode].setdefault(name, []).append(run_once(mode, cv_text, jd_text, api_key, base_url))
+    finally:
+        if server:
+            server.stop()
+
+    print("\n" + "=" * 78)
+    print(f"{'pair':<20} {'mode':<12} {'scores':<24} {'stdev':>6} {'range':>6} {'s/cv':>7}")
+    print("-" * 78)
+    for name, _, _ in corpus:
+        for mode in MODES:
+            runs = results[mode][name]
+            scores = [run[3] for run in runs]
+            stdev = statistics.pstdev(scores)
+            print(f"{name:<20} {mode:<12} {str(scores):<24} {stdev:>6.1f} {max(scores) - min(scores):>6} "
+                  f"{statistics.median(r[0] for r in runs):>7.2f}")
+
+    print("-" * 78)
+    print(f"{'mode':<12} {'p50 s':>7} {'p95 s':>7} {'in tok':>8} {'out tok':>8} {'$/cv':>8} {'mean stdev':>11}")
+    for mode in MODES:
+        runs = [run for name in results[mode] for run in results[mode][name]]
+        latencies = [run[0] for run in runs]
+        input_tokens = statistics.mean(run[1] for run in runs)
+        output_tokens = statistics.mean(run[2] for run in runs)
+        cost = statistics.mean(run[4] for run in runs)
+        stability = statistics.mean(statistics.pstdev([r[3] for r in results[mode][name]]) for name in results[mode])
+        print(f"{mode:<12} {statistics.median(latencies):>7.2f} {percentile(latencies, 95):>7.2f} "
+              f"{input_tokens:>8.0f} {output_tokens:>8.0f} {cost:>8.4f} "
+              f"{stability:>11.1f}")
+
+    # Écart entre modes: moyenne des scores par paire, single_call - two_call
+    deltas = [
+        statistics.mean(r[3] for r in results['single_call'][name]) - statistics.mean(r[3] for r in results['two_call'][name])
+        for name, _, _ in corpus
+    ]
+    print(f"\nScore single_call - two_call: mean {statistics.mean(deltas):+.1f}, "
+          f"max |Δ| {max(abs(d) for d in deltas):.1f} (sur {len(deltas)} paires)")
+
+
+if __name__ == '__main__':
+    main()
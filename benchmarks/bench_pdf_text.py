@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Benchmark des backends de couche texte PDF (tmc_pdf_text)
+
+Corpus fixe de CV synthétiques générés à la volée (aucune donnée personnelle versionnée):
+une colonne, deux colonnes avec barre latérale (flux écrit ligne à ligne ou colonne par colonne),
+tableau dates / postes, CV de 4 pages. Des PDF locaux peuvent être ajoutés en arguments.
+
+Mesures par backend: temps d'extraction par page (médiane sur --repeat passes),
+tokens de sortie (≈ caractères / 4) et, pour le corpus synthétique, respect de l'ordre de lecture
+(part des lignes attendues consécutives qui se suivent directement dans la sortie).
+
+Usage:
+    python benchmarks/bench_pdf_text.py [--repeat 5] [cv1.pdf cv2.pdf ...]
+"""
+
+import os
+import sys
+import time
+import zlib
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2  # noqa: E402
+from tmc_pdf_text import PDF_TEXT_BACKENDS  # noqa: E402
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+
+WORDS = (
+    "python java kubernetes cloud azure data pipeline migration architecture team lead client "
+    "delivery agile scrum api microservices security audit reporting dashboard analytics sql "
+    "integration testing automation budget stakeholder roadmap platform monitoring performance "
+    "design review mentoring backlog release deployment infrastructure network compliance"
+).split()
+
+
+# ===== Génération du corpus =====
+
+class _Page:
+    """Page de texte; le texte est écrit en tableaux TJ crénelés comme le font Word et la plupart des exports"""
+
+    def __init__(self, rng):
+        self.ops = []
+        self.rng = rng
+
+    def text(self, x, y, value, size=10):
+        chunks = []
+        pos = 0
+        while pos < len(value):
+            length = self.rng.randint(1, 6)
+            chunk = value[pos:pos + length].replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            chunks.append(f"({chunk})")
+            pos += length
+            if pos < len(value):
+                chunks.append(str(self.rng.choice((-4, -2, 2, 3, 5))))
+        self.ops.append(f"BT /F1 {size} Tf 1 0 0 1 {x:.2f} {y:.2f} Tm [{' '.join(chunks)}] TJ ET")
+
+
+def _write_pdf(path, pages):
+    """PDF minimal: police Courier (largeurs fixes), flux de contenu compressés"""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    pages_id = add(None)
+    font_id = add(
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding "
+        "/FirstChar 32 /LastChar 126 /Widths [" + " ".join(["600"] * 95) + "] >>"
+    )
+    page_ids = []
+    for page in pages:
+        data = zlib.compress("\n".join(page.ops).encode('latin-1'))
+        content_id = add((f"<< /Length {len(data)} /Filter /FlateDecode >>\nstream\n".encode() + data + b"\nendstream"))
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ))
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>"
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        body = body if isinstance(body, bytes) else body.encode('latin-1')
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def _sentence(rng, width_chars):
+    """Mots aléatoires, au plus width_chars caractères (la ligne reste dans sa colonne)"""
+    words = [rng.choice([w for w in WORDS if len(w) < width_chars])]
+    while True:
+        word = rng.choice(WORDS)
+        if len(" ".join(words + [word])) > width_chars:
+            break
+        words.append(word)
+    return " ".join(words).capitalize()
+
+
+def _unique_lines(rng, count, width_chars, prefix):
+    lines = []
+    for i in range(count):
+        label = f"{prefix}{i + 1} "
+        lines.append(label + _sentence(rng, width_chars - len(label)))
+    return lines
+
+
+def build_single_column(rng):
+    page = _Page(rng)
+    expected = ["CANDIDAT EXEMPLE - Senior Developer"]
+    page.text(50, 750, expected[0], 14)
+    lines = _unique_lines(rng, 40, 80, "L")
+    for i, line in enumerate(lines):
+        page.text(50, 720 - i * 16, line)
+    return [page], expected + lines
+
+
+def build_two_columns(rng, interleaved, page_label=""):
+    """Barre latérale (compétences) + colonne principale (expériences), titre pleine largeur"""
+    page = _Page(rng)
+    header = "CANDIDAT EXEMPLE - Cloud Architect - Montreal QC - candidat@example.com" + page_label
+    sidebar = _unique_lines(rng, 30, 26, "S")
+    main = _unique_lines(rng, 38, 55, "M")
+    page.text(40, 750, header, 11)
+
+    placements = [(40, 720 - i * 20, t) for i, t in enumerate(sidebar)]
+    placements += [(220, 722 - i * 16, t) for i, t in enumerate(main)]
+    if interleaved:
+        # Producteurs qui écrivent le flux ligne par ligne sur toute la largeur
+        placements.sort(key=lambda p: (-p[1], p[0]))
+    for x, y, t in placements:
+        page.text(x, y, t)
+    return [page], [header] + sidebar + main
+
+
+def build_date_table(rng):
+    """Colonne de dates alignée avec les intitulés de poste: lecture ligne à ligne attendue"""
+    page = _Page(rng)
+    expected = []
+    for i in range(20):
+        years = f"{2004 + i} - {2005 + i}"
+        role = f"R{i + 1} {_sentence(rng, 55)}"
+        y = 740 - i * 30
+        page.text(40, y, years)
+        page.text(180, y, role)
+        expected.append(f"{years} {role}")
+    return [page], expected
+
+
+def build_multi_page(rng):
+    pages, expected = [], []
+    for number in range(1, 5):
+        page_list, page_expected = build_two_columns(rng, interleaved=True, page_label=f" - {number}/4")
+        pages.extend(page_list)
+        expected.extend(page_expected)
+    return pages, expected
+
+
+def build_corpus(directory):
+    """Corpus déterministe (graine fixe): [(nom, chemin, lignes attendues dans l'ordre)]"""
+    rng = random.Random(42)
+    builders = [
+        ('single_column', lambda: build_single_column(rng)),
+        ('two_columns_by_column', lambda: build_two_columns(rng, interleaved=False)),
+        ('two_columns_by_row', lambda: build_two_columns(rng, interleaved=True)),
+        ('date_table', lambda: build_date_table(rng)),
+        ('four_pages', lambda: build_multi_page(rng)),
+    ]
+    corpus = []
+    for name, build in builders:
+        pages, expected = build()
+        path = os.path.join(directory, f"{name}.pdf")
+        _write_pdf(path, pages)
+        corpus.append((name, path, expected))
+    return corpus
+
+
+# ===== Mesures =====
+
+def order_score(text, expected):
+    """
+    (part des lignes attendues retrouvées, part des lignes attendues consécutives qui se suivent
+    directement dans la sortie, sans texte intercalé)
+    """
+    flat = " ".join(text.split())
+    targets = [" ".join(line.split()) for line in expected]
+    positions = [flat.find(target) for target in targets]
+    found = sum(1 for p in positions if p >= 0) / len(expected)
+    adjacent = 0
+    for i in range(len(targets) - 1):
+        a, b = positions[i], positions[i + 1]
+        if a >= 0 and b > a and not flat[a + len(targets[i]):b].strip():
+            adjacent += 1
+    return found, adjacent / max(1, len(targets) - 1)
+
+
+def run_backend(backend_name, path, repeat):
+    timings = []
+    text = ""
+    for _ in range(repeat):
+        backend = PDF_TEXT_BACKENDS[backend_name]()
+        with open(path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            start = time.perf_counter()
+            texts = [backend.extract_page(page) for page in reader.pages]
+            elapsed = time.perf_counter() - start
+            timings.append(elapsed / max(1, len(reader.pages)))
+        text = "\n".join(texts)
+    return statistics.median(timings) * 1000, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdfs', nargs='*', help="PDF locaux supplémentaires (temps et tokens uniquement)")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='tmc_bench_pdf_') as tmp_dir:
+        documents = build_corpus(tmp_dir) + [(os.path.basename(p), p, None) for p in args.pdfs]
+
+        print(f"{'document':<24} {'backend':<8} {'ms/page':>8} {'tokens':>7} {'found':>6} {'order':>6}")
+        print("-" * 64)
+        totals = {name: [0.0, 0] for name in PDF_TEXT_BACKENDS}
+        for name, path, expected in documents:
+            for backend_name in PDF_TEXT_BACKENDS:
+                ms_per_page, text = run_backend(backend_name, path, args.repeat)
+                tokens = len(text) // 4
+                totals[backend_name][0] += ms_per_page
+                totals[backend_name][1] += tokens
+                if expected:
+                    found, ordered = order_score(text, expected)
+                    quality = f"{found:>6.0%} {ordered:>6.0%}"
+                else:
+                    quality = f"{'-':>6} {'-':>6}"
+                print(f"{name:<24} {backend_name:<8} {ms_per_page:>8.2f} {tokens:>7} {quality}")
+        print("-" * 64)
+        for backend_name, (ms, tokens) in totals.items():
+            print(f"{'TOTAL':<24} {backend_name:<8} {ms:>8.2f} {tokens:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+TMC Async Enricher
+Variante asyncio de TMCUniversalEnricher (AsyncAnthropic): plusieurs candidats en vol sur une seule boucle
+"""
+
+import os
+import sys
+import time
+import asyncio
+from typing import Dict, List, Any
+
+from tmc_cv_enricher import TMCUniversalEnricher
+from tmc_streaming import stream_message_async, request_stage
+from tmc_file_types import DocumentExtractionError
+
+
+class AsyncTMCUniversalEnricher(TMCUniversalEnricher):
+    """
+    Mêmes étapes, mêmes prompts et mêmes retours que TMCUniversalEnricher, en coroutines.
+    Les étapes LLM (parsing, matching, enrichissement, réparations JSON comprises) attendent
+    AsyncAnthropic au lieu de bloquer un thread; l'extraction (PDF, OCR, Word) tourne dans un thread.
+
+    Un enrichisseur par candidat (état par document: normalization_stats, detected_language),
+    le client AsyncAnthropic est partagé entre enrichisseurs d'une même boucle (pool de connexions commun).
+    """
+
+    def __init__(self, *args, anthropic_client=None, **kwargs):
+        """
+        Args:
+            anthropic_client: Client AsyncAnthropic (défaut: client partagé de la boucle courante, créé au premier appel)
+            *args, **kwargs: Voir TMCUniversalEnricher (api_key, base_url, ocr_engine...)
+        """
+        super().__init__(*args, **kwargs)
+        self._async_anthropic_client = anthropic_client
+
+    def _get_async_anthropic_client(self):
+        """Lazy loading du client AsyncAnthropic (partagé sur la boucle courante, voir tmc_http_client)"""
+        if self._async_anthropic_client is None:
+            from tmc_http_client import get_async_anthropic_client
+            self._async_anthropic_client = get_async_anthropic_client(self.api_key, self.base_url)
+        return self._async_anthropic_client
+
+    async def _run_flow_async(self, flow):
+        """Équivalent async de _run_flow: les requêtes du générateur sont attendues sur la boucle"""
+        try:
+            request = next(flow)
+            deadline = time.monotonic() + self.retry_policy.deadline(request_stage(request))
+            while True:
+                start = time.perf_counter()
+                try:
+                    response = await self._call_with_retry_async(request, deadline)
+                except Exception as e:
+                    request = flow.throw(e)
+                else:
+                    self._record_call(request, response, time.perf_counter() - start)
+                    request = flow.send(response)
+        except StopIteration as stop:
+            return stop.value
+
+    async def _call_with_retry_async(self, request, deadline: float = None):
+        """Équivalent async de _call_with_retry: les attentes de backoff ne bloquent pas la boucle"""
+        stage = request_stage(request)
+        deadline = deadline or time.monotonic() + self.retry_policy.deadline(stage)
+        self._check_budget(stage, deadline)
+        attempt = 0
+        while True:
+            attempt += 1
+            ticket = None
+            start = time.perf_counter()
+            try:
+                if self.rate_limiter:
+                    ticket = await self.rate_limiter.acquire_async(*self._rate_limit_needs(stage, request),
+                                                                   priority=self.priority,
+                                                                   timeout=deadline - time.monotonic())
+                response = await self._create_message_async(
+                    dict(request, timeout=self.retry_policy.timeout(deadline - time.monotonic()))
+                )
+            except Exception as e:
+                self._rate_limit_settle(ticket, stage, error=e)
+                delay = self.retry_policy.delay_before_retry(e, attempt, deadline - time.monotonic())
+                self.api_attempts.record(stage, attempt, time.perf_counter() - start, e, delay)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            else:
+                self._rate_limit_settle(ticket, stage, response=response)
+                self.api_attempts.record(stage, attempt, time.perf_counter() - start)
+                return response
+
+    async def _create_message_async(self, request):
+        """Équivalent async de _create_message (streaming ou messages.create)"""
+        client = self._get_async_anthropic_client()
+        if self.streaming:
+            return await stream_message_async(client, request, self.on_event)
+        return await client.messages.create(**request)
+
+    # ===== Extraction (bloquante → thread) =====
+
+    async def extract_cv_text(self, cv_path: str) -> str:
+        return await asyncio.to_thread(super().extract_cv_text, cv_path)
+
+    async def read_job_description(self, jd_path: str) -> str:
+        return await asyncio.to_thread(super().read_job_description, jd_path)
+
+    # ===== Étapes LLM =====
+
+    async def parse_cv_with_claude(self, cv_text: str, use_cache: bool = True) -> Dict[str, Any]:
+        return await self._run_flow_async(self._cached_flow('parse_cv', self._parse_cv_flow(cv_text), use_cache,
+                                                            cv_text=cv_text))
+
+    async def analyze_cv_matching(self, parsed_cv: Dict[str, Any], jd_text: str,
+                                  use_cache: bool = True) -> Dict[str, Any]:
+        return await self._run_flow_async(self._cached_flow('matching', self._analyze_matching_flow(parsed_cv, jd_text),
+                                                            use_cache, parsed_cv=parsed_cv, jd_text=jd_text))
+    
+    async def parse_and_score(self, cv_text: str, jd_text: str, use_cache: bool = True):
+        return await self._run_flow_async(self._cached_flow('parse_and_score',
+                                                            self._parse_and_score_flow(cv_text, jd_text),
+                                                            use_cache, cv_text=cv_text, jd_text=jd_text))
+
+    async def enrich_cv_with_prompt(self, parsed_cv: Dict[str, Any], jd_text: str, language: str = "French",
+                                    matching_analysis: Dict[str, Any] = None, use_cache: bool = True) -> Dict[str, Any]:
+        return await self._run_flow_async(self._cached_enrich_flow(parsed_cv, jd_text, language, matching_analysis,
+                                                                   use_cache))
+
+    # ===== Pipeline =====
+
+    def matching_pipeline(self, cv_path: str, jd_path: str):
+        """Le TaskGraph de la classe parente exécute des fonctions dans des threads: ici les étapes sont des coroutines"""
+        raise NotImplementedError("AsyncTMCUniversalEnricher: utiliser `await run_matching_pipeline(...)`, "
+                                  "le TaskGraph (threads) ne peut pas attendre les étapes async")
+
+    async def run_matching_pipeline(self, cv_path: str, jd_path: str) -> Dict[str, Any]:
+        """
+        Équivalent async de TMCUniversalEnricher.run_matching_pipeline, même graphe et même retour:
+        les deux extractions en parallèle (asyncio.gather), puis parsing et matching (ou parse_and_score).
+        Aucun appel LLM avant que la JD soit lue et jugée exploitable.
+
+        Returns:
+            dict: {'cv_text', 'jd_text', 'parsed_cv', 'matching_analysis'}
+        """
+        self._jd_file_type(jd_path)
+        origin = time.perf_counter()
+        timings = {}
+
+        async def timed(name, deps, awaitable):
+            start = time.perf_counter() - origin
+            try:
+                return await awaitable
+            finally:
+                timings[name] = (deps, round(start, 3), round(time.perf_counter() - origin, 3))
+
+        cv_text, jd_text = await asyncio.gather(timed('extract_cv', [], self.extract_cv_text(cv_path)),
+                                                timed('extract_jd', [], self.read_job_description(jd_path)))
+        if self.analysis_mode == 'single_call':
+            parsed_cv, matching_analysis = await timed('parse_and_score', ['extract_cv', 'extract_jd'],
+                                                       self.parse_and_score(cv_text, jd_text))
+        else:
+            parsed_cv = await timed('parse_cv', ['extract_cv', 'extract_jd'], self.parse_cv_with_claude(cv_text))
+            matching_analysis = await timed('match', ['parse_cv', 'extract_jd'],
+                                            self.analyze_cv_matching(parsed_cv, jd_text))
+
+        elapsed = round(time.perf_counter() - origin, 3)
+        print(f"⏱️ Pipeline matching (async): {elapsed}s", flush=True)
+        if '_metadata' in matching_analysis:
+            matching_analysis['_metadata']['pipeline'] = {
+                'elapsed_seconds': elapsed,
+                'tasks': {name: {'deps': deps, 'start': start, 'end': end}
+                          for name, (deps, start, end) in timings.items()}
+            }
+        return {
+            'cv_text': cv_text,
+            'jd_text': jd_text,
+            'parsed_cv': parsed_cv,
+            'matching_analysis': matching_analysis
+        }
+
+
+async def analyze_candidates(cv_paths: List[str], jd_path: str, api_key: str = None, base_url: str = None,
+                             concurrency: int = 8) -> List[Dict[str, Any]]:
+    """
+    Matching de plusieurs CV contre une même JD sur une seule boucle asyncio.
+    La JD est lue une fois; au plus `concurrency` candidats sont en cours (extraction, parsing, matching).
+    L'échec d'un candidat (fichier illisible, erreur API) est rendu dans son 'error' sans interrompre les autres.
+    Appels en priorité 'batch' dans le limiteur partagé: les analyses interactives de l'app passent devant.
+
+    Returns:
+        list: [{'cv_path', 'parsed_cv', 'matching_analysis', 'error'}] dans l'ordre de cv_paths
+    """
+    reader = AsyncTMCUniversalEnricher(api_key=api_key, base_url=base_url, priority='batch')
+    jd_text = await reader.read_job_description(jd_path)
+    client = reader._get_async_anthropic_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(cv_path):
+        async with semaphore:
+            enricher = AsyncTMCUniversalEnricher(api_key=api_key, base_url=base_url, anthropic_client=client,
+                                                 priority='batch')
+            try:
+                cv_text = await enricher.extract_cv_text(cv_path)
+                if enricher.analysis_mode == 'single_call':
+                    parsed_cv, matching = await enricher.parse_and_score(cv_text, jd_text)
+                else:
+                    parsed_cv = await enricher.parse_cv_with_claude(cv_text)
+                    matching = await enricher.analyze_cv_matching(parsed_cv, jd_text)
+            except DocumentExtractionError as e:
+                return {'cv_path': cv_path, 'parsed_cv': {}, 'matching_analysis': {}, 'error': str(e)}
+            except Exception as e:
+                # Erreur API (401, file du limiteur pleine, attente trop longue...): ce candidat seulement,
+                # les résultats des autres sont conservés
+                print(f"❌ {os.path.basename(cv_path)}: {e!r}", flush=True)
+                return {'cv_path': cv_path, 'parsed_cv': {}, 'matching_analysis': {},
+                        'error': f"{type(e).__name__}: {e}"}
+            return {'cv_path': cv_path, 'parsed_cv': parsed_cv, 'matching_analysis': matching, 'error': None}
+
+    return await asyncio.gather(*(run(path) for path in cv_paths))
+
+
+def main():
+    """CLI batch: python tmc_async_enricher.py jd.pdf cv1.pdf cv2.docx ... [--concurrency 8] [--base-url URL]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='TMC async batch matching')
+    parser.add_argument('jd_path', help='Chemin de la Job Description')
+    parser.add_argument('cv_paths', nargs='+', help='CV à analyser')
+    parser.add_argument('--concurrency', type=int, default=8, help='Candidats traités simultanément')
+    parser.add_argument('--base-url', default=None, help='URL de l\'API Messages (ex: tools/fake_messages_server.py)')
+    args = parser.parse_args()
+
+    start = time.time()
+    results = asyncio.run(analyze_candidates(args.cv_paths, args.jd_path, base_url=args.base_url,
+                                             concurrency=args.concurrency))
+
+    print("\n" + "=" * 60)
+    for result in results:
+        name = os.path.basename(result['cv_path'])
+        if result['error']:
+            print(f"❌ {name}: {result['error']}")
+        else:
+            print(f"📊 {name}: {result['matching_analysis'].get('score_matching', 0)}/100")
+    print(f"⏱️ {len(results)} CV en {time.time() - start:.1f}s")
+    sys.exit(1 if any(r['error'] for r in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
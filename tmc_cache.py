@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+TMC Cache
+Cache disque adressé par contenu (SHA-256) avec éviction LRU bornée en taille et durée de vie optionnelle:
+extraction de texte par hash du fichier, résultats des étapes LLM par hash du modèle, des prompts et des entrées
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Any, Optional
+
+
+def file_sha256(file_path: str) -> str:
+    """SHA-256 du contenu d'un fichier (lecture par blocs)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_dir(name: str) -> str:
+    """Dossier de cache (TMC_CACHE_DIR ou dossier temporaire du système)"""
+    root = os.getenv('TMC_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'tmc_cv_optimizer_cache')
+    return os.path.join(root, name)
+
+
+class DiskLRUCache:
+    """
+    Cache clé → dict JSON sur disque, un fichier par entrée.
+    L'ordre LRU est porté par l'atime des fichiers (posé à chaque lecture), le mtime reste la date d'écriture:
+    les entrées plus vieilles que ttl_seconds sont ignorées puis supprimées, les moins récemment utilisées
+    sont supprimées quand la taille totale dépasse max_bytes.
+    Écritures atomiques (fichier temporaire + os.replace) → sûr entre threads et processus.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds or None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Lire une entrée (None si absente, expirée ou illisible)"""
+        path = self._path(key)
+        try:
+            written = os.stat(path).st_mtime
+            if self._expired(written):
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path, (time.time(), written))  # LRU: marquer comme récemment utilisée
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Écrire une entrée puis évincer si la taille totale dépasse la limite"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"⚠️ Cache write failed: {e}", flush=True)
+            return
+        self._evict()
+
+    def _expired(self, written: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - written > self.ttl_seconds
+
+    def _evict(self):
+        """Supprimer les entrées expirées, puis les moins récemment utilisées au-delà de max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                    if self._expired(stat.st_mtime):
+                        os.remove(entry.path)
+                        continue
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs hit/miss depuis le démarrage du process"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+_EXTRACTION_CACHE = None
+_EXTRACTION_CACHE_LOCK = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[DiskLRUCache]:
+    """
+    Cache d'extraction partagé par le process (toutes les sessions Streamlit).
+    Taille via TMC_EXTRACTION_CACHE_MB (défaut 256, "0" désactive le cache).
+    """
+    global _EXTRACTION_CACHE
+    max_mb = float(os.getenv('TMC_EXTRACTION_CACHE_MB', '256'))
+    if max_mb <= 0:
+        return None
+    with _EXTRACTION_CACHE_LOCK:
+        if _EXTRACTION_CACHE is None:
+            try:
+                _EXTRACTION_CACHE = DiskLRUCache(default_cache_dir('extraction'), int(max_mb * 1024 * 1024))
+            except OSError as e:
+                print(f"⚠️ Extraction cache disabled: {e}", flush=True)
+                return None
+        return _EXTRACTION_CACHE
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        print(f"⚠️ Invalid {name}={os.getenv(name)!r}, using {default}", flush=True)
+        return default
+
+
+# ===== Résultats des étapes LLM =====
+
+_RESULT_CACHE = None
+_RESULT_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_result_cache() -> Optional[DiskLRUCache]:
+    """
+    Cache des résultats LLM (parsing, matching, enrichissement) partagé par le process.
+    Taille via TMC_LLM_CACHE_MB (défaut 128, "0" désactive le cache),
+    durée de vie via TMC_LLM_CACHE_TTL_HOURS (défaut 168, "0" = sans expiration).
+    """
+    global _RESULT_CACHE
+    max_mb = _env_float('TMC_LLM_CACHE_MB', 128)
+    if max_mb <= 0:
+        return None
+    with _RESULT_CACHE_LOCK:
+        if _RESULT_CACHE is None:
+            ttl_hours = _env_float('TMC_LLM_CACHE_TTL_HOURS', 168)
+            try:
+                _RESULT_CACHE = DiskLRUCache(default_cache_dir('llm_results'), int(max_mb * 1024 * 1024),
+                                             ttl_seconds=ttl_hours * 3600 if ttl_hours > 0 else None)
+            except OSError as e:
+                print(f"⚠️ LLM result cache disabled: {e}", flush=True)
+                return None
+        return _RESULT_CACHE
+
+
+def result_cache_key(**parts) -> str:
+    """Clé SHA-256 d'un résultat LLM: modèle, version des prompts, étape et entrées normalisées (JSON trié)"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+_result_lookups: Dict[str, Dict[str, int]] = {}
+_result_lookups_lock = threading.Lock()
+
+
+def record_result_lookup(stage: str, hit: bool):
+    """Compter un hit / miss du cache de résultats pour une étape (compteurs du process)"""
+    with _result_lookups_lock:
+        counts = _result_lookups.setdefault(stage, {'hits': 0, 'misses': 0})
+        counts['hits' if hit else 'misses'] += 1
+
+
+def result_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """{étape: {hits, misses, hit_rate}} depuis le démarrage du process"""
+    with _result_lookups_lock:
+        stats = {stage: dict(counts) for stage, counts in _result_lookups.items()}
+    for counts in stats.values():
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 3) if lookups else 0.0
+    return stats
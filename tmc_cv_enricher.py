@@ -7,21 +7,45 @@ Lit n'importe quel CV → Enrichit avec IA → Génère CV TMC professionnel
 import os
 import sys
 import json
-import json_repair  # Pour réparer les JSON malformés
 from docxtpl import DocxTemplate, RichText
 from docx import Document
 import jinja2
 from typing import Dict, List, Any
 import PyPDF2
 import re
+import hashlib
+import time
+import threading
 from zipfile import ZipFile
 from xml.etree import ElementTree as ET
 
-# === NOUVEAUX IMPORTS POUR OCR ===
-from pdf2image import convert_from_path
-import pytesseract
-from PIL import Image
-import tempfile
+# === OCR (pdf2image + pytesseract dans tmc_ocr) ===
+from tmc_ocr import OCREngine
+from tmc_cache import (
+    file_sha256, get_extraction_cache, get_llm_result_cache, result_cache_key, record_result_lookup,
+    result_cache_stats
+)
+from tmc_docx_reader import extract_docx_blocks, group_blocks_by_source, format_labeled_blocks
+from tmc_doc_converter import DocConverter, DocConversionError, get_doc_converter
+from tmc_pdf_text import get_pdf_text_backend
+from tmc_pipeline import TaskGraph, TaskCancelledError, task_cancelled
+from tmc_structured_output import (
+    tool_params, tool_input, text_of, stage_schema, record_output_path, output_path_stats
+)
+from tmc_json_utils import loads_with_repair
+from tmc_streaming import stream_message, request_stage
+from tmc_retry import RetryPolicy, AttemptLog, is_timeout_error, status_code, retry_after_seconds
+from tmc_rate_limit import RateLimitQueueFull, get_rate_limiter, estimate_input_tokens
+from tmc_text_normalizer import normalize_text, detect_language, PAGE_BREAK
+from tmc_file_types import (
+    sniff_file_type, sniff_text_encoding,
+    DocumentExtractionError, UnsupportedFileTypeError, EmptyDocumentError
+)
+
+# Version des extracteurs: à incrémenter quand le texte produit change (invalide le cache d'extraction)
+EXTRACTOR_VERSION = "5"
+# Version des prompts: à incrémenter quand un prompt ou un post-traitement change (invalide le cache des résultats LLM)
+PROMPT_VERSION = "1"
 
 print(">>> tmc_universal_enricher module loading", flush=True)
 
@@ -73,8 +97,35 @@ def fix_table_width_to_auto(doc):
 class TMCUniversalEnricher:
     """Enrichisseur universel de CV au format TMC"""
     
-    def __init__(self, api_key: str = None):
-        """Initialiser avec clé API Claude"""
+    # Modèle de toutes les étapes LLM (fait partie de la clé du cache des résultats)
+    MODEL = "claude-sonnet-4-5-20250929"
+    
+    def __init__(self, api_key: str = None, ocr_engine: OCREngine = None, extraction_cache=None,
+                 doc_converter: DocConverter = None, pdf_text_backend=None, base_url: str = None,
+                 analysis_mode: str = None, streaming: bool = None, on_event=None,
+                 retry_policy: RetryPolicy = None, rate_limiter=None, priority: str = None, result_cache=None):
+        """
+        Initialiser avec clé API Claude
+        
+        Args:
+            api_key: Clé API Claude (défaut: ANTHROPIC_API_KEY)
+            ocr_engine: Moteur OCR pour les PDF scannés (défaut: OCREngine configuré par variables d'environnement)
+            extraction_cache: Cache d'extraction DiskLRUCache (défaut: cache partagé, False pour désactiver)
+            doc_converter: Convertisseur .doc (défaut: pool partagé, créé au premier .doc)
+            pdf_text_backend: Backend de couche texte PDF (défaut: TMC_PDF_TEXT_BACKEND, 'layout')
+            base_url: URL de l'API Messages (défaut: ANTHROPIC_BASE_URL ou API Anthropic), ex: serveur de test local
+            analysis_mode: 'two_call' (parsing puis matching) ou 'single_call' (parse_and_score, un seul appel)
+                           (défaut: TMC_ANALYSIS_MODE ou 'two_call')
+            streaming: Réponses LLM en streaming avec parsing JSON incrémental (défaut: TMC_STREAMING, activé)
+            on_event: Callback des événements de streaming (start / progress / item / done, voir tmc_streaming),
+                      appelé depuis le thread de l'étape
+            retry_policy: Retries, backoff et budgets par étape des appels API (défaut: RetryPolicy configuré
+                          par variables d'environnement, voir tmc_retry)
+            rate_limiter: Limiteur RPM / ITPM / OTPM (défaut: limiteur partagé par le process, False pour désactiver)
+            priority: Priorité dans la file du limiteur: 'interactive' (app) ou 'batch' (défaut: TMC_LLM_PRIORITY,
+                      'interactive')
+            result_cache: Cache des résultats LLM DiskLRUCache (défaut: cache partagé, False pour désactiver)
+        """
         self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
         if not self.api_key:
             raise ValueError("❌ Clé API Claude manquante! Définissez ANTHROPIC_API_KEY dans les secrets Streamlit ou en variable d'environnement.")
@@ -84,75 +135,486 @@ class TMCUniversalEnricher:
         
         # Ne crée PAS le client ici (lazy loading)
         self._anthropic_client = None
+        self.base_url = base_url or os.getenv('ANTHROPIC_BASE_URL')
+        # Appels API effectués par cet enrichisseur:
+        # [{'model', 'input_tokens', 'output_tokens', 'cache_*', 'stop_reason', 'seconds'}]
+        self.api_calls = []
+        # Chemins de sortie des étapes de cet enrichisseur [(étape, chemin)], voir tmc_structured_output.OUTPUT_PATHS
+        self.output_paths = []
+        # Breakpoints de prompt caching sur les consignes statiques (TMC_PROMPT_CACHE=0 pour désactiver)
+        self.prompt_cache_enabled = os.getenv('TMC_PROMPT_CACHE', '1') != '0'
+        # Streaming (TMC_STREAMING=0 pour revenir à messages.create): progression au fil de l'eau,
+        # sortie partielle conservée si la connexion tombe
+        self.streaming = os.getenv('TMC_STREAMING', '1') != '0' if streaming is None else streaming
+        self.on_event = on_event
+        # Retries (429 / 529 / timeouts) et budget de temps par étape; le SDK ne retente jamais lui-même
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.api_attempts = AttemptLog()
+        # Limiteur partagé par toutes les sessions: file de priorité, attente estimée pour l'UI
+        self.rate_limiter = get_rate_limiter() if rate_limiter is None else rate_limiter
+        self.priority = priority or os.getenv('TMC_LLM_PRIORITY', 'interactive')
+        # Résultats LLM par hash (modèle, prompts, entrées normalisées): même CV / même JD → 0 token
+        # (TMC_LLM_CACHE_MB, TMC_LLM_CACHE_TTL_HOURS)
+        self.result_cache = get_llm_result_cache() if result_cache is None else result_cache
+        
+        self.analysis_mode = (analysis_mode or os.getenv('TMC_ANALYSIS_MODE') or 'two_call').lower()
+        if self.analysis_mode not in self.ANALYSIS_MODES:
+            print(f"⚠️ Unknown analysis mode '{self.analysis_mode}', using 'two_call'", flush=True)
+            self.analysis_mode = 'two_call'
+        
+        # OCR parallèle (workers / timeout via TMC_OCR_WORKERS, TMC_OCR_PAGE_TIMEOUT)
+        self.ocr_engine = ocr_engine or OCREngine()
+        
+        # Cache d'extraction par hash du fichier (TMC_EXTRACTION_CACHE_MB, TMC_CACHE_DIR)
+        self.extraction_cache = get_extraction_cache() if extraction_cache is None else extraction_cache
+        # Convertisseur Word 97-2003 (antiword / LibreOffice chaud)
+        self.doc_converter = doc_converter
+        # Couche texte PDF: 'layout' (colonnes et ordre de lecture) ou 'pypdf2'
+        self.pdf_text_backend = pdf_text_backend or get_pdf_text_backend()
+        # Méthode ayant produit le dernier texte extrait: layout / pypdf2 / hybrid / ocr / docx / doc:<backend> / txt
+        # Par thread: l'extraction du CV et celle de la JD tournent en parallèle (matching_pipeline)
+        self._extraction_state = threading.local()
+        
+        # Normalisation du texte avant prompt (TMC_TEXT_NORMALIZE=0 pour désactiver), stats par document
+        self.normalize_enabled = os.getenv('TMC_TEXT_NORMALIZE', '1') != '0'
+        self.normalization_stats = {}
+        # Langue dominante du dernier CV extrait ('French' / 'English', None si indéterminée)
+        self.detected_language = None
+    
+    @property
+    def last_extraction_method(self):
+        """Méthode de la dernière extraction faite dans le thread courant (None si aucune)"""
+        return getattr(self._extraction_state, 'method', None)
+    
+    @last_extraction_method.setter
+    def last_extraction_method(self, method):
+        self._extraction_state.method = method
     
     def _get_anthropic_client(self):
-        """Lazy loading du client Anthropic"""
+        """Lazy loading du client Anthropic (partagé par le process: un seul pool de connexions keep-alive)"""
         if self._anthropic_client is None:
             try:
-                print(">>> Creating anthropic client", flush=True)
-                import anthropic
-                # Création SIMPLE du client pour version 0.25.9
-                self._anthropic_client = anthropic.Anthropic(api_key=self.api_key)
-                print(">>> Anthropic client created OK", flush=True)
+                print(">>> Getting shared anthropic client", flush=True)
+                from tmc_http_client import get_anthropic_client
+                # Client partagé (tool use + prompt caching: version 0.40+), retries désactivés dans le SDK:
+                # politique unique dans _call_with_retry
+                self._anthropic_client = get_anthropic_client(self.api_key, self.base_url)
+                print(">>> Anthropic client ready", flush=True)
             except Exception as e:
                 print(f">>> ERROR creating anthropic client: {repr(e)}", flush=True)
                 raise
         return self._anthropic_client
     
+    def _run_flow(self, flow):
+        """
+        Exécuter une étape LLM écrite en générateur (voir _parse_cv_flow): chaque requête produite
+        par `yield` est envoyée à l'API Messages, la réponse (ou l'exception) est renvoyée dans le générateur.
+        Même logique de prompts, retries et réparation JSON pour le client sync et async
+        (tmc_async_enricher).
+        Un seul budget de temps pour toute l'étape (d'après sa première requête): régénérations, appels de
+        réparation et repli deux appels se partagent le temps restant.
+        
+        Returns:
+            Valeur retournée par le générateur
+        
+        Raises:
+            TaskCancelledError: étape lancée par un TaskGraph qui a déjà échoué, plus aucun appel n'est envoyé
+        """
+        try:
+            request = next(flow)
+            deadline = time.monotonic() + self.retry_policy.deadline(request_stage(request))
+            while True:
+                if task_cancelled():
+                    flow.close()
+                    raise TaskCancelledError(f"{request_stage(request)}: pipeline abandoned, no further API call")
+                start = time.perf_counter()
+                try:
+                    response = self._call_with_retry(request, deadline)
+                except Exception as e:
+                    request = flow.throw(e)
+                else:
+                    self._record_call(request, response, time.perf_counter() - start)
+                    request = flow.send(response)
+        except StopIteration as stop:
+            return stop.value
+    
+    def _call_with_retry(self, request: Dict[str, Any], deadline: float = None):
+        """
+        Appel API avec la politique de retry (self.retry_policy): même requête renvoyée telle quelle
+        (le générateur de l'étape ne voit qu'une réponse ou l'erreur finale), timeout de chaque tentative
+        borné par le budget restant de l'étape, chaque tentative enregistrée dans self.api_attempts.
+        
+        Args:
+            deadline: Fin du budget de l'étape (time.monotonic, voir _run_flow), défaut: budget complet de la requête
+        """
+        stage = request_stage(request)
+        deadline = deadline or time.monotonic() + self.retry_policy.deadline(stage)
+        self._check_budget(stage, deadline)
+        attempt = 0
+        while True:
+            attempt += 1
+            ticket = None
+            start = time.perf_counter()
+            try:
+                if self.rate_limiter:
+                    ticket = self.rate_limiter.acquire(*self._rate_limit_needs(stage, request),
+                                                       priority=self.priority, timeout=deadline - time.monotonic())
+                response = self._create_message(
+                    dict(request, timeout=self.retry_policy.timeout(deadline - time.monotonic()))
+                )
+            except Exception as e:
+                self._rate_limit_settle(ticket, stage, error=e)
+                delay = self.retry_policy.delay_before_retry(e, attempt, deadline - time.monotonic())
+                self.api_attempts.record(stage, attempt, time.perf_counter() - start, e, delay)
+                if delay is None or task_cancelled():
+                    raise
+                time.sleep(delay)
+            else:
+                self._rate_limit_settle(ticket, stage, response=response)
+                self.api_attempts.record(stage, attempt, time.perf_counter() - start)
+                return response
+    
+    @staticmethod
+    def _check_budget(stage: str, deadline: float):
+        """TimeoutError si le budget de l'étape est épuisé avant la requête (traitée comme un timeout par l'étape)"""
+        if deadline - time.monotonic() < 1.0:
+            print(f"❌ {stage}: time budget exhausted, request not sent", flush=True)
+            raise TimeoutError(f"{stage}: time budget exhausted")
+    
+    def _rate_limit_needs(self, stage: str, request: Dict[str, Any]):
+        """
+        Tokens (entrée, sortie) à réserver dans le limiteur; si la file fait attendre,
+        un événement 'queued' (requêtes servies avant celle-ci, attente estimée) est publié pour l'UI
+        """
+        needs = (estimate_input_tokens(request),
+                 self.rate_limiter.estimate_output(stage, request.get('max_tokens', 4096)))
+        stats = self.rate_limiter.stats(self.priority)
+        if self.on_event and stats['estimated_wait_seconds'] > 0:
+            self.on_event({'type': 'queued', 'stage': stage, 'queue_depth': stats['queue_depth'],
+                           'estimated_wait_seconds': stats['estimated_wait_seconds']})
+        return needs
+    
+    def _rate_limit_settle(self, ticket, stage: str, response=None, error: Exception = None):
+        """Usage réel dans le limiteur; un 429 suspend tout le limiteur pendant retry-after"""
+        if not self.rate_limiter:
+            return
+        if response is not None:
+            tokens = self._usage_tokens(response)
+            self.rate_limiter.settle(ticket, stage, tokens['input_tokens'] + tokens['cache_creation_input_tokens'],
+                                     tokens['output_tokens'])
+        else:
+            self.rate_limiter.settle(ticket, stage)
+            if error is not None and status_code(error) == 429:
+                self.rate_limiter.pause(retry_after_seconds(error) or 1.0)
+    
+    def _create_message(self, request: Dict[str, Any]):
+        """Un appel à l'API Messages: en streaming (événements vers on_event) ou messages.create"""
+        client = self._get_anthropic_client()
+        if self.streaming:
+            return stream_message(client, request, self.on_event)
+        return client.messages.create(**request)
+    
+    def _record_call(self, request: Dict[str, Any], response, seconds: float):
+        """
+        Ajouter un appel réussi à self.api_calls (tokens et latence, pour les benchmarks et _metadata).
+        Rien pour une tâche de pipeline abandonnée: l'appel en vol a fini après l'échec du graphe.
+        """
+        if task_cancelled():
+            return
+        self.api_calls.append({
+            'model': request.get('model'),
+            **self._usage_tokens(response),
+            'stop_reason': getattr(response, 'stop_reason', None),
+            'seconds': round(seconds, 3)
+        })
+    
+    def _record_output_path(self, stage: str, path: str):
+        """Chemin de sortie d'une étape: compteurs du process et self.output_paths (cache des résultats)"""
+        if task_cancelled():
+            return
+        record_output_path(stage, path)
+        self.output_paths.append((stage, path))
+    
+    def _llm_request(self, system: str, blocks: List[str], **kwargs) -> Dict[str, Any]:
+        """
+        Requête messages.create découpée pour le prompt caching:
+        - system: consignes statiques (grille, schéma, règles de langue), identiques d'un candidat à l'autre
+        - blocks: données en message user, de la plus partagée (JD d'un batch) à la plus spécifique (CV)
+        Breakpoint cache_control sur le system et sur chaque bloc sauf le dernier: un appel suivant
+        avec le même préfixe relit ces tokens depuis le cache (préfixe minimal côté API: 1024 tokens).
+        """
+        def text_block(text, cached):
+            block = {"type": "text", "text": text}
+            if cached and self.prompt_cache_enabled:
+                block["cache_control"] = {"type": "ephemeral"}
+            return block
+        
+        return dict(
+            system=[text_block(system, True)],
+            messages=[{
+                "role": "user",
+                "content": [text_block(text, index < len(blocks) - 1) for index, text in enumerate(blocks)]
+            }],
+            **kwargs
+        )
+    
+    @staticmethod
+    def _http_pool_stats() -> Dict[str, Any]:
+        """Réutilisation des connexions du pool partagé (tmc_http_client)"""
+        from tmc_http_client import http_pool_stats
+        return http_pool_stats()
+    
+    @staticmethod
+    def _usage_tokens(response) -> Dict[str, int]:
+        """
+        Tokens d'une réponse: input_tokens (hors cache), output_tokens,
+        cache_read_input_tokens (relus du cache) et cache_creation_input_tokens (écrits dans le cache)
+        """
+        usage = getattr(response, 'usage', None)
+        return {
+            key: getattr(usage, key, None) or 0
+            for key in ('input_tokens', 'output_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens')
+        }
+    
+    @staticmethod
+    def _estimate_cost_usd(tokens: Dict[str, int]) -> float:
+        """Prix Claude Sonnet 4.5: $3/MTok input, $15/MTok output; lecture cache ×0.1, écriture cache ×1.25"""
+        return round((
+            tokens['input_tokens'] * 3.0
+            + tokens['cache_read_input_tokens'] * 0.3
+            + tokens['cache_creation_input_tokens'] * 3.75
+            + tokens['output_tokens'] * 15.0
+        ) / 1_000_000, 4)
+    
+    # Clés de _metadata remises à zéro quand le résultat vient du cache (aucun appel API)
+    RESULT_CACHE_ZEROED = ('input_tokens', 'output_tokens', 'cache_read_input_tokens',
+                           'cache_creation_input_tokens', 'total_tokens', 'estimated_cost_usd')
+    
+    def _cached_flow(self, stage: str, flow, use_cache: bool = True, **inputs):
+        """
+        Étape LLM (générateur) derrière le cache des résultats: un hit rend le résultat sans aucune requête,
+        un miss exécute le générateur et ne garde son résultat que s'il est complet: sortie conforme du premier coup
+        (tool_use / strict) d'une réponse terminée normalement, jamais un résultat réparé, tronqué ou d'erreur.
+        use_cache=False: recalcul forcé, le résultat frais remplace l'entrée.
+        """
+        if not self.result_cache:
+            return (yield from flow)
+        
+        start = time.perf_counter()
+        key = self._result_cache_key(stage, **inputs)
+        cached = self.result_cache.get(key) if use_cache else None
+        if use_cache:
+            record_result_lookup(stage, cached is not None)
+        if cached is not None:
+            flow.close()
+            seconds = time.perf_counter() - start
+            print(f"⚡ {stage}: result cache hit ({seconds * 1000:.0f} ms, 0 token)", flush=True)
+            result = tuple(cached['result']) if stage == 'parse_and_score' else cached['result']
+            self._mark_result_cache(stage, result, hit=True, seconds=seconds)
+            return result
+        
+        first_call, first_path = len(self.api_calls), len(self.output_paths)
+        result = yield from flow
+        if (self._result_cacheable(stage, result)
+                and self._clean_output(self.api_calls[first_call:], self.output_paths[first_path:])):
+            self.result_cache.set(key, {'stage': stage, 'model': self.MODEL, 'prompt_version': PROMPT_VERSION,
+                                        'result': result})
+            self._mark_result_cache(stage, result, hit=False)
+        return result
+    
+    def _stage_system_prompt(self, stage: str, inputs: Dict[str, Any]) -> tuple:
+        """(consignes system, schéma de l'outil) envoyés par l'étape, tels que construits par son générateur"""
+        if stage == 'enrich':
+            reuse_scoring = inputs.get('reused_matching') is not None
+            tool_stage = 'enrich' if reuse_scoring else 'enrich_with_matching'
+            return self._enrich_system_prompt(inputs['language'], reuse_scoring), stage_schema(tool_stage)
+        builders = {
+            'parse_cv': self._parse_cv_system_prompt,
+            'matching': self._matching_system_prompt,
+            'parse_and_score': self._parse_and_score_system_prompt,
+        }
+        return builders[stage](), stage_schema(stage)
+    
+    def _result_cache_key(self, stage: str, **inputs) -> str:
+        """
+        Clé du cache des résultats: modèle, PROMPT_VERSION, consignes system et schéma de l'étape (texte exact,
+        y compris règles de langue et mode de l'enrichissement) et entrées normalisées
+        (espaces des textes fusionnés, CV parsé sans _metadata, seuls les champs du matching repris par l'enrichissement)
+        """
+        normalized = {}
+        for name, value in inputs.items():
+            if isinstance(value, str):
+                value = ' '.join(value.split())
+            elif isinstance(value, dict):
+                value = {k: v for k, v in value.items() if k != '_metadata'}
+            normalized[name] = value
+        return result_cache_key(
+            stage=stage,
+            model=self.MODEL,
+            prompt_version=PROMPT_VERSION,
+            prompt=self._stage_system_prompt(stage, inputs),
+            inputs=normalized
+        )
+    
+    @staticmethod
+    def _result_cacheable(stage: str, result) -> bool:
+        """Résultat complet: CV parsé non vide, matching / enrichissement avec _metadata (absent des retours d'erreur)"""
+        if stage == 'parse_cv':
+            return bool(result)
+        if stage == 'parse_and_score':
+            parsed_cv, matching = result
+            return bool(parsed_cv) and '_metadata' in matching
+        return isinstance(result, dict) and '_metadata' in result
+    
+    # Sorties acceptées par le cache des résultats (sans réparation) et fins de réponse normales
+    RESULT_CACHE_PATHS = ('tool_use', 'strict')
+    RESULT_CACHE_STOP_REASONS = ('end_turn', 'tool_use', 'stop_sequence')
+    
+    def _clean_output(self, calls: List[Dict[str, Any]], paths: List[tuple]) -> bool:
+        """Appels de l'étape tous terminés normalement, chemins de sortie tous tool_use / strict"""
+        return (bool(paths) and all(path in self.RESULT_CACHE_PATHS for _, path in paths)
+                and all(call['stop_reason'] in self.RESULT_CACHE_STOP_REASONS for call in calls))
+    
+    def _mark_result_cache(self, stage: str, result, hit: bool, seconds: float = None):
+        """_metadata['result_cache'] (hit / miss, compteurs par étape); sur un hit: temps réel, tokens et coût à 0"""
+        target = result[1] if stage == 'parse_and_score' else result
+        metadata = target.get('_metadata') if isinstance(target, dict) else None
+        if metadata is None:  # parse_cv: le CV parsé ne porte pas de _metadata (il est réinjecté dans les prompts)
+            return
+        info = {'hit': hit, 'stages': result_cache_stats()}
+        if hit:
+            info['saved_cost_usd'] = metadata.get('estimated_cost_usd', 0)
+            metadata.update(dict.fromkeys(self.RESULT_CACHE_ZEROED, 0),
+                            processing_time_seconds=round(seconds, 3),
+                            api_attempts=self.api_attempts.summary())
+        metadata['result_cache'] = info
+    
     # ========================================
     # MODULE 1 : EXTRACTION UNIVERSELLE
     # ========================================
     
+    # Extensions attendues par type (diagnostic uniquement: le type vient du contenu)
+    EXTENSION_TYPES = {'pdf': 'pdf', 'docx': 'docx', 'doc': 'doc', 'txt': 'txt', 'text': 'txt'}
+    
+    # Texte minimal (caractères alphanumériques) pour justifier un appel API
+    MIN_CV_CHARS = 100
+    MIN_JD_CHARS = 30
+    
+    # Code de langue détecté → langue cible du générateur (radio French / English de l'app)
+    LANGUAGE_NAMES = {'fr': 'French', 'en': 'English'}
+    
+    # Modes d'analyse: parsing + matching en deux appels LLM, ou un seul appel structuré (parse_and_score)
+    ANALYSIS_MODES = ('two_call', 'single_call')
+    
     def detect_file_type(self, file_path: str) -> str:
-        """Détecter le type de fichier"""
+        """
+        Détecter le type de fichier d'après son contenu (magic bytes):
+        %PDF, zip OOXML Word, conteneur OLE Word 97-2003, texte (BOM / UTF-8 / cp1252).
+        Retourne 'pdf', 'docx', 'doc', 'txt' ou 'unknown'
+        """
         ext = file_path.lower().split('.')[-1]
-        if ext == 'pdf':
-            return 'pdf'
-        elif ext in ['docx', 'doc']:
-            return 'docx'
-        elif ext in ['txt', 'text']:
-            return 'txt'
-        else:
-            return 'unknown'
+        file_type = sniff_file_type(file_path)
+        expected = self.EXTENSION_TYPES.get(ext)
+        if expected and expected != file_type:
+            print(f"⚠️ Extension .{ext} mais contenu détecté: {file_type}", flush=True)
+        return file_type
+    
+    def _require_text(self, text: str, label: str, min_chars: int):
+        """Lever EmptyDocumentError si le texte est trop pauvre pour être envoyé au modèle"""
+        useful_chars = sum(1 for c in (text or '') if c.isalnum())
+        if useful_chars < min_chars:
+            raise EmptyDocumentError(
+                f"❌ {label}: texte exploitable insuffisant ({useful_chars} caractères, minimum {min_chars})"
+            )
+    
+    # Seuils par page: en dessous, la page n'a pas de couche texte exploitable
+    PAGE_MIN_CHARS = 40
+    PAGE_MIN_WORDS = 8
+    
+    def _page_has_text_layer(self, page_text: str) -> bool:
+        """La page a-t-elle une couche texte exploitable?"""
+        return len(page_text.strip()) >= self.PAGE_MIN_CHARS and len(page_text.split()) >= self.PAGE_MIN_WORDS
+    
+    def _page_has_images(self, page) -> bool:
+        """La page contient-elle des images (candidate à l'OCR)?"""
+        try:
+            resources = page.get('/Resources')
+            xobjects = resources.get_object().get('/XObject') if resources else None
+            if not xobjects:
+                return False
+            for xobj in xobjects.get_object().values():
+                if xobj.get_object().get('/Subtype') in ('/Image', '/Form'):
+                    return True
+            return False
+        except Exception:
+            # Structure inattendue → on laisse l'OCR décider
+            return True
     
     def extract_from_pdf(self, file_path: str) -> str:
         """
-        Extraire texte d'un PDF avec fallback OCR automatique
-        1. Essaye PyPDF2 pour texte sélectionnable
-        2. Si échec/texte vide → Utilise OCR sur images
+        Extraire texte d'un PDF avec OCR page par page
+        1. Couche texte (backend layout ou PyPDF2) pour chaque page qui en a une exploitable
+        2. OCR uniquement sur les pages image (scannées)
+        3. Si aucune page texte → OCR complet
         """
         print(f"📄 Extracting PDF: {file_path}", flush=True)
         
         try:
-            # ===== ÉTAPE 1: Tentative extraction PyPDF2 =====
-            text = []
+            # ===== ÉTAPE 1: Classification page par page (couche texte) =====
+            page_texts = {}
+            scanned_pages = []
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 num_pages = len(pdf_reader.pages)
                 print(f"📊 PDF has {num_pages} pages", flush=True)
                 
                 for page_num, page in enumerate(pdf_reader.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text.append(page_text)
-                    print(f"  Page {page_num}: {len(page_text) if page_text else 0} chars", flush=True)
+                    page_text = self.pdf_text_backend.extract_page(page)
+                    if self._page_has_text_layer(page_text):
+                        page_texts[page_num] = page_text
+                        status = "text"
+                    elif self._page_has_images(page):
+                        scanned_pages.append(page_num)
+                        status = "scanned → OCR"
+                    else:
+                        # Page quasi vide sans image: rien à gagner avec l'OCR
+                        if page_text.strip():
+                            page_texts[page_num] = page_text
+                        status = "empty"
+                    print(f"  Page {page_num}: {len(page_text)} chars ({status})", flush=True)
+            
+            # ===== ÉTAPE 2: Aucune page texte → PDF entièrement scanné =====
+            if not page_texts:
+                print("⚠️ PDF appears to be scanned (image-based). Switching to OCR...", flush=True)
+                return self._extract_from_pdf_ocr(file_path)
             
-            extracted_text = "\n".join(text).strip()
+            # ===== ÉTAPE 3: OCR des seules pages scannées =====
+            if scanned_pages:
+                print(f"🔍 Mixed PDF: OCR on pages {scanned_pages}, text layer kept for {len(page_texts)} pages", flush=True)
+                try:
+                    for result in self.ocr_engine.ocr_pages(file_path, scanned_pages):
+                        if result['text'].strip():
+                            page_texts[result['page']] = result['text']
+                except Exception as e:
+                    print(f"❌ OCR of scanned pages failed: {e}", flush=True)
+            
+            # Un seul délimiteur pour les pages texte et OCR (pas de bannière "--- Page N ---" ici, réservée
+            # à l'OCR complet): la normalisation s'en sert pour repérer en-têtes et pieds répétés
+            extracted_text = PAGE_BREAK.join(page_texts[n] for n in sorted(page_texts)).strip()
             
             # ===== VÉRIFIER SI L'EXTRACTION A FONCTIONNÉ =====
-            # Seuil: Si moins de 100 caractères ou trop peu de mots → C'est scanné
+            # Seuil global: Si moins de 100 caractères ou trop peu de mots → OCR complet
             word_count = len(extracted_text.split())
             char_count = len(extracted_text)
             
-            print(f"📈 PyPDF2 extraction: {char_count} chars, {word_count} words", flush=True)
+            print(f"📈 PDF extraction: {char_count} chars, {word_count} words", flush=True)
             
-            # Si extraction suffisante → Retourner
             if char_count > 100 and word_count > 20:
-                print("✅ PDF text extraction successful (text-based PDF)", flush=True)
+                print("✅ PDF text extraction successful", flush=True)
+                self.last_extraction_method = 'hybrid' if scanned_pages else self.pdf_text_backend.name
                 return extracted_text
             
-            # ===== ÉTAPE 2: PDF scanné détecté → OCR =====
-            print("⚠️ PDF appears to be scanned (image-based). Switching to OCR...", flush=True)
+            print("⚠️ Extracted text too short. Switching to full OCR...", flush=True)
             return self._extract_from_pdf_ocr(file_path)
             
         except Exception as e:
@@ -168,40 +630,13 @@ class TMCUniversalEnricher:
     def _extract_from_pdf_ocr(self, file_path: str) -> str:
         """
         Extraire texte d'un PDF scanné via OCR
-        Utilise pdf2image + pytesseract
+        Utilise OCREngine: pdf2image + pytesseract, pages traitées en parallèle
         """
         print("🔍 Starting OCR extraction...", flush=True)
+        self.last_extraction_method = 'ocr'
         
         try:
-            # Convertir PDF en images (une par page)
-            # poppler_path peut être nécessaire sur Windows, mais pas sur Linux/Render
-            images = convert_from_path(
-                file_path,
-                dpi=300,  # Haute résolution pour meilleur OCR
-                fmt='jpeg',
-                thread_count=2  # Parallélisation
-            )
-            
-            print(f"📷 Converted {len(images)} pages to images", flush=True)
-            
-            # Extraire texte de chaque image
-            all_text = []
-            for i, image in enumerate(images, 1):
-                print(f"  🔎 OCR processing page {i}/{len(images)}...", flush=True)
-                
-                # Appliquer OCR avec config optimisée
-                # lang='eng+fra' pour anglais ET français
-                page_text = pytesseract.image_to_string(
-                    image,
-                    lang='eng+fra',  # Anglais + Français
-                    config='--psm 1 --oem 3'  # PSM 1 = automatic page segmentation with OSD
-                )
-                
-                if page_text.strip():
-                    all_text.append(f"--- Page {i} ---\n{page_text}")
-                    print(f"  ✓ Page {i}: {len(page_text)} chars extracted", flush=True)
-            
-            extracted_text = "\n\n".join(all_text)
+            extracted_text = self.ocr_engine.extract_text(file_path)
             print(f"✅ OCR extraction complete: {len(extracted_text)} chars total", flush=True)
             
             return extracted_text
@@ -214,7 +649,40 @@ class TMCUniversalEnricher:
     
      
     def extract_from_docx(self, file_path: str) -> str:
-        """Extraire texte d'un Word + zones textes"""
+        """
+        Extraire texte d'un Word en une seule passe XML:
+        paragraphes, lignes de tableau (sans doublons de cellules fusionnées)
+        et zones textes dans l'ordre du document, plus en-têtes, pieds de page et notes.
+        Chaque section est étiquetée par sa source ([EN-TÊTE], [CORPS], [PIED DE PAGE], [NOTES])
+        """
+        try:
+            blocks = extract_docx_blocks(file_path)
+            grouped = group_blocks_by_source(blocks)
+            print("   Blocs Word: " + ", ".join(f"{source}={len(texts)}" for source, texts in grouped.items()), flush=True)
+            
+            self.last_extraction_method = 'docx'
+            return format_labeled_blocks(blocks)
+        except Exception as e:
+            print(f"⚠️ Extraction XML Word échouée ({e}), fallback python-docx", flush=True)
+            return self._extract_from_docx_python_docx(file_path)
+    
+    def extract_from_doc(self, file_path: str) -> str:
+        """
+        Extraire texte d'un Word 97-2003 (.doc binaire) via le convertisseur local
+        (antiword, sinon pool LibreOffice headless gardé chaud)
+        """
+        converter = self.doc_converter or get_doc_converter()
+        try:
+            text, backend = converter.convert_to_text(file_path)
+        except DocConversionError as e:
+            print(f"❌ Erreur conversion .doc: {e}", flush=True)
+            return ""
+        
+        self.last_extraction_method = f'doc:{backend}'
+        return "\n".join(line.rstrip() for line in text.splitlines() if line.strip())
+    
+    def _extract_from_docx_python_docx(self, file_path: str) -> str:
+        """Extraire texte d'un Word + zones textes (ancienne méthode python-docx)"""
         try:
             doc = Document(file_path)
             text = []
@@ -224,10 +692,19 @@ class TMCUniversalEnricher:
                 if para.text.strip():
                     text.append(para.text.strip())
             
-            # Tableaux
+            # Tableaux: row.cells répète l'objet d'une cellule fusionnée (gridSpan / vMerge),
+            # dédoublonné par élément w:tc et non par texte
             for table in doc.tables:
+                seen_cells = set()
                 for row in table.rows:
-                    row_text = " | ".join([cell.text.strip() for cell in row.cells if cell.text.strip()])
+                    cells = []
+                    for cell in row.cells:
+                        if cell._tc in seen_cells:
+                            continue
+                        seen_cells.add(cell._tc)
+                        if cell.text.strip():
+                            cells.append(cell.text.strip())
+                    row_text = " | ".join(cells)
                     if row_text:
                         text.append(row_text)
             
@@ -237,15 +714,19 @@ class TMCUniversalEnricher:
                 text.append("\n=== ZONES TEXTES ===")
                 text.extend(textbox_content)
             
+            self.last_extraction_method = 'docx'
             return "\n".join(text)
         except Exception as e:
             print(f"⚠️ Erreur extraction Word: {e}")
             return ""
+    
     def extract_from_txt(self, file_path: str) -> str:
         """Extraire texte d'un fichier texte"""
+        self.last_extraction_method = 'txt'
         try:
-            # Essayer plusieurs encodages
-            for encoding in ['utf-8', 'latin-1', 'cp1252']:
+            # Encodage détecté (BOM UTF-8/16/32) en premier, puis plusieurs encodages
+            sniffed = sniff_text_encoding(file_path)
+            for encoding in ([sniffed] if sniffed else []) + ['utf-8', 'latin-1', 'cp1252']:
                 try:
                     with open(file_path, 'r', encoding=encoding) as f:
                         return f.read()
@@ -299,6 +780,73 @@ class TMCUniversalEnricher:
         
         return textboxes
     
+    def _extract_with_cache(self, file_path: str, file_type: str) -> str:
+        """
+        Extraire selon le type, avec cache disque clé = SHA-256 du fichier + version des extracteurs
+        (+ backend texte et options OCR pour un PDF: changer TMC_OCR_LANG, le DPI ou le prétraitement invalide l'entrée).
+        Un PDF scanné déjà vu est servi en millisecondes au lieu de refaire l'OCR.
+        """
+        extractors = {
+            'pdf': self.extract_from_pdf,
+            'docx': self.extract_from_docx,
+            'doc': self.extract_from_doc,
+            'txt': self.extract_from_txt
+        }
+        extractor = extractors.get(file_type)
+        if extractor is None:
+            raise UnsupportedFileTypeError(f"❌ Format non supporté: {file_type}")
+        
+        cache_key = None
+        if self.extraction_cache:
+            try:
+                cache_key = hashlib.sha256(
+                    f"{file_sha256(file_path)}:{EXTRACTOR_VERSION}:{self._extraction_signature(file_type)}".encode()
+                ).hexdigest()
+                cached = self.extraction_cache.get(cache_key)
+                if cached is not None:
+                    self.last_extraction_method = cached.get('method')
+                    print(f"⚡ Extraction cache hit ({cached.get('method')}, {len(cached['text'])} chars)", flush=True)
+                    return cached['text']
+            except (OSError, KeyError) as e:
+                print(f"⚠️ Extraction cache lookup failed: {e}", flush=True)
+                cache_key = None
+        
+        self.last_extraction_method = None
+        text = extractor(file_path)
+        # Lu dans le thread de l'extraction: jamais la méthode du document extrait en parallèle
+        method = self.last_extraction_method
+        
+        # Ne pas mettre en cache les échecs (texte vide) pour permettre un nouvel essai
+        if cache_key and text.strip():
+            self.extraction_cache.set(cache_key, {
+                'text': text,
+                'method': method,
+                'file_type': file_type,
+                'extractor_version': EXTRACTOR_VERSION
+            })
+        return text
+    
+    def _extraction_signature(self, file_type: str) -> str:
+        """Réglages qui changent le texte extrait d'un type de fichier (JSON trié, vide hors PDF)"""
+        if file_type != 'pdf':
+            return ''
+        return json.dumps({'pdf_text_backend': self.pdf_text_backend.name, 'ocr': self.ocr_engine.output_signature()},
+                          sort_keys=True)
+    
+    def normalize_extracted_text(self, text: str, document: str) -> str:
+        """
+        Compacter le texte extrait avant le prompt (césures, espaces, en-têtes / pieds répétés, bruit OCR).
+        Les stats avant/après sont gardées dans self.normalization_stats[document] ('cv' ou 'jd')
+        """
+        if not self.normalize_enabled or not text:
+            return text
+        
+        normalized, stats = normalize_text(text)
+        self.normalization_stats[document] = stats
+        print(f"🧹 Normalisation {document.upper()}: {stats['chars_before']} → {stats['chars_after']} chars, "
+              f"~{stats['tokens_before']} → ~{stats['tokens_after']} tokens (-{stats['token_reduction_pct']}%)", flush=True)
+        return normalized
+    
     def extract_cv_text(self, cv_path: str) -> str:
         """Extraction universelle - détecte et extrait selon le type"""
         print(f"📄 Extraction du CV: {cv_path}")
@@ -307,39 +855,33 @@ class TMCUniversalEnricher:
         
         if file_type == 'pdf':
             print("   Format détecté: PDF")
-            return self.extract_from_pdf(cv_path)
         elif file_type == 'docx':
             print("   Format détecté: Word")
-            return self.extract_from_docx(cv_path)
+        elif file_type == 'doc':
+            print("   Format détecté: Word 97-2003")
         elif file_type == 'txt':
             print("   Format détecté: Texte")
-            return self.extract_from_txt(cv_path)
         else:
-            raise ValueError(f"❌ Format non supporté: {file_type}")
+            raise UnsupportedFileTypeError(f"❌ Format de CV non supporté (contenu non reconnu): {os.path.basename(cv_path)}")
+        
+        text = self.normalize_extracted_text(self._extract_with_cache(cv_path, file_type), 'cv')
+        self._require_text(text, "CV", self.MIN_CV_CHARS)
+        self.detected_language = self.LANGUAGE_NAMES.get(detect_language(text))
+        print(f"   Langue détectée: {self.detected_language or 'indéterminée'}")
+        return text
 
     # ========================================
     # MODULE 2 : PARSING INTELLIGENT
     # ========================================
     
-    def parse_cv_with_claude(self, cv_text: str) -> Dict[str, Any]:
-        """Parser le CV avec Claude pour extraire les infos structurées"""
-        print("🤖 Parsing du CV avec Claude AI...", flush=True)
-        
-        try:
-            client = self._get_anthropic_client()
-            
-            prompt = f"""Tu es un expert en analyse de CV. Extrait TOUTES les informations de ce CV et structure-les en JSON.
-
-CV À ANALYSER:
-{cv_text}
-
-IMPORTANT CRITIQUE:
-- Le NOM peut être caché dans un tableau HTML ou être stylisé. Cherche PARTOUT.
+    # Consignes + schéma JSON du parsing (partagés avec le mode parse_and_score)
+    CV_PARSE_INSTRUCTIONS = """IMPORTANT CRITIQUE:
+- Le texte peut être découpé en sections [EN-TÊTE], [CORPS], [PIED DE PAGE], [NOTES] et lignes [ZONE TEXTE]: le NOM, le LIEU et les coordonnées sont le plus souvent dans [EN-TÊTE] ou [ZONE TEXTE]. Sinon cherche PARTOUT (tableaux, début, fin).
 - Le LIEU DE RÉSIDENCE est OBLIGATOIRE : cherche "Montréal", "Montreal", villes + pays (ex: "Montreal CA", "Montréal, Canada", "Toronto ON", etc.). Si introuvable, mets "Location not specified".
 - Les LANGUES sont OBLIGATOIRES : cherche "Français", "French", "English", "Anglais", "Bilingual", "Bilingue", etc. Si introuvable, mets ["Not specified"].
 
 Extrait et structure en JSON STRICT (sans markdown):
-{{
+{
   "nom_complet": "Nom Prénom du candidat (cherche PARTOUT, même dans tableaux/HTML)",
   "titre_professionnel": "Titre/poste actuel",
   "profil_resume": "Résumé du profil si présent (sinon vide)",
@@ -347,35 +889,35 @@ Extrait et structure en JSON STRICT (sans markdown):
   "langues": ["OBLIGATOIRE - Français", "Anglais", ... Cherche 'bilingual', 'French', 'English', etc. Si introuvable: ['Not specified']],
   "competences": ["compétence1", "compétence2", "compétence3", ...],
   "experiences": [
-    {{
+    {
       "periode": "2020-2023",
       "entreprise": "Nom entreprise",
       "poste": "Titre du poste",
       "responsabilites": ["tâche 1", "tâche 2", "tâche 3"]
-    }}
+    }
   ],
   "formation": [
-    {{
+    {
       "diplome": "Nom COMPLET du diplôme",
       "institution": "Nom école/université",
       "annee": "2020 (ou période exacte)",
       "pays": "Canada"
-    }}
+    }
   ],
   "certifications": [
-    {{
+    {
       "nom": "Nom certification",
       "organisme": "Organisme",
       "annee": "2023"
-    }}
+    }
   ],
   "projets": [
-    {{
+    {
       "nom": "Nom projet",
       "description": "Description courte"
-    }}
+    }
   ]
-}}
+}
 
 RÈGLES CRITIQUES:
 - Le NOM est PRIORITAIRE - cherche dans tout le texte (tableaux, début, fin)
@@ -385,33 +927,56 @@ RÈGLES CRITIQUES:
 - Extrait TOUT (ne rate rien)
 - Si une section est vide, mets une liste vide []
 - Format JSON strict uniquement"""
+    
+    def parse_cv_with_claude(self, cv_text: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Parser le CV avec Claude pour extraire les infos structurées (use_cache=False: ignorer le cache des résultats)"""
+        return self._run_flow(self._cached_flow('parse_cv', self._parse_cv_flow(cv_text), use_cache, cv_text=cv_text))
+    
+    def _parse_cv_system_prompt(self) -> str:
+        """Consignes system du parsing (voir _result_cache_key)"""
+        return f"""Tu es un expert en analyse de CV. Extrait TOUTES les informations du CV fourni et structure-les en JSON.
 
-            print(f">>> Calling Claude API with timeout=300s...", flush=True)
-            response = client.messages.create(
-                model="claude-sonnet-4-5-20250929",
+{self.CV_PARSE_INSTRUCTIONS}"""
+    
+    def _parse_cv_flow(self, cv_text: str):
+        """
+        Étape parsing en générateur: `response = yield requête` (kwargs de messages.create).
+        Les erreurs API sont relancées au point du yield, comme un appel direct.
+        """
+        # Pas d'appel API payant sur un texte vide ou illisible
+        self._require_text(cv_text, "CV", self.MIN_CV_CHARS)
+        
+        print("🤖 Parsing du CV avec Claude AI...", flush=True)
+        
+        try:
+            # Consignes statiques en system (prompt caching), CV en message user
+            system_prompt = self._parse_cv_system_prompt()
+
+            print(f">>> Calling Claude API (budget {self.retry_policy.deadline('parse_cv'):.0f}s)...", flush=True)
+            response = yield self._llm_request(
+                system_prompt,
+                [f"CV À ANALYSER:\n{cv_text}"],
+                model=self.MODEL,
                 max_tokens=8000,
-                timeout=300.0,  # 5 minutes max
-                messages=[{"role": "user", "content": prompt}]
+                **tool_params('parse_cv')
             )
             print(f">>> API call completed successfully", flush=True)
             
         except Exception as e:
             print(f">>> ERROR calling anthropic for parsing: {repr(e)}", flush=True)
+            if isinstance(e, RateLimitQueueFull):
+                raise
             return {}
         
-        response_text = response.content[0].text.strip()
-        
-        # Nettoyer JSON
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+        # Sortie structurée (tool use); texte JSON seulement si l'outil n'a pas été appelé correctement
+        structured = tool_input(response, 'parse_cv')
+        response_text = '' if structured is not None else text_of(response).strip()
         
         try:
-            parsed_data = json_repair.loads(response_text)
+            # Texte: réparation locale par paliers avant toute régénération payante
+            parsed_data, path = ((structured, 'tool_use') if structured is not None
+                                 else loads_with_repair(response_text, stage_schema('parse_cv')))
+            self._record_output_path('parse_cv', path)
             print(f"✅ Parsing réussi!")
             print(f"   Nom: [ANONYMIZED]")
             print(f"   Langues: {', '.join(parsed_data.get('langues', []))}")
@@ -426,86 +991,26 @@ RÈGLES CRITIQUES:
             # Retry with re-generation instead of fixing
             print(f"   Strategy: Re-generating clean JSON instead of fixing...")
             
-            regen_prompt = f"""Tu es un expert en analyse de CV. Extrait TOUTES les informations de ce CV et structure-les en JSON.
-
-CV À ANALYSER:
+            # Même préfixe system que le premier appel → servi par le cache
+            regen_prompt = f"""CV À ANALYSER:
 {cv_text}
 
-IMPORTANT CRITIQUE:
-- Le NOM peut être caché dans un tableau HTML ou être stylisé. Cherche PARTOUT.
-- Le LIEU DE RÉSIDENCE est OBLIGATOIRE : cherche "Montréal", "Montreal", villes + pays (ex: "Montreal CA", "Montréal, Canada", "Toronto ON", etc.). Si introuvable, mets "Location not specified".
-- Les LANGUES sont OBLIGATOIRES : cherche "Français", "French", "English", "Anglais", "Bilingual", "Bilingue", etc. Si introuvable, mets ["Not specified"].
-
-Extrait et structure en JSON STRICT (sans markdown):
-{{
-  "nom_complet": "Nom Prénom du candidat (cherche PARTOUT, même dans tableaux/HTML)",
-  "titre_professionnel": "Titre/poste actuel",
-  "profil_resume": "Résumé du profil si présent (sinon vide)",
-  "lieu_residence": "OBLIGATOIRE - Ville, Pays (ex: Montréal, Canada) ou Montreal CA. Cherche codes pays (CA, US, FR). Si vraiment introuvable: 'Location not specified'",
-  "langues": ["OBLIGATOIRE - Français", "Anglais", ... Cherche 'bilingual', 'French', 'English', etc. Si introuvable: ['Not specified']],
-  "competences": ["compétence1", "compétence2", "compétence3", ...],
-  "experiences": [
-    {{
-      "periode": "2020-2023",
-      "entreprise": "Nom entreprise",
-      "poste": "Titre du poste",
-      "responsabilites": ["tâche 1", "tâche 2", "tâche 3"]
-    }}
-  ],
-  "formation": [
-    {{
-      "diplome": "Nom COMPLET du diplôme",
-      "institution": "Nom école/université",
-      "annee": "2020 (ou période exacte)",
-      "pays": "Canada"
-    }}
-  ],
-  "certifications": [
-    {{
-      "nom": "Nom certification",
-      "organisme": "Organisme",
-      "annee": "2023"
-    }}
-  ],
-  "projets": [
-    {{
-      "nom": "Nom projet",
-      "description": "Description courte"
-    }}
-  ]
-}}
-
-RÈGLES CRITIQUES:
-- Le NOM est PRIORITAIRE - cherche dans tout le texte (tableaux, début, fin)
-- LIEU DE RÉSIDENCE : cherche formats "Ville, Pays", "Montreal CA", "Montréal QC", codes postaux (H2X, etc.)
-- LANGUES : cherche "Languages", "Langues", "French", "English", "Bilingual", même dans sections compétences
-- Pour les diplômes: nom COMPLET + année EXACTE
-- Extrait TOUT (ne rate rien)
-- Si une section est vide, mets une liste vide []
-- Format JSON strict uniquement
-
 IMPORTANT: Assure-toi que TOUS les guillemets sont bien fermés et que toutes les virgules sont présentes."""
             
             try:
-                fix_response = client.messages.create(
-                    model="claude-sonnet-4-5-20250929",
+                fix_response = yield self._llm_request(
+                    system_prompt,
+                    [regen_prompt],
+                    model=self.MODEL,
                     max_tokens=8000,
-                    timeout=300.0,
-                    messages=[{"role": "user", "content": regen_prompt}]
+                    **tool_params('parse_cv')
                 )
                 
-                fixed_text = fix_response.content[0].text.strip()
-                
-                # Clean markdown again
-                if fixed_text.startswith('```json'):
-                    fixed_text = fixed_text[7:]
-                if fixed_text.startswith('```'):
-                    fixed_text = fixed_text[3:]
-                if fixed_text.endswith('```'):
-                    fixed_text = fixed_text[:-3]
-                fixed_text = fixed_text.strip()
+                fixed = tool_input(fix_response, 'parse_cv')
+                fixed_text = text_of(fix_response).strip()
                 
-                parsed_data = json_repair.loads(fixed_text)
+                parsed_data = fixed if fixed is not None else loads_with_repair(fixed_text, stage_schema('parse_cv'))[0]
+                self._record_output_path('parse_cv', 'llm_repair')
                 print(f"✅ JSON fixed and parsed successfully!")
                 print(f"   Nom: [ANONYMIZED]")
                 print(f"   Langues: {', '.join(parsed_data.get('langues', []))}")
@@ -519,61 +1024,84 @@ IMPORTANT: Assure-toi que TOUS les guillemets sont bien fermés et que toutes le
                 print(f"   Original error was at char {str(e)}")
                 print(f"   Fix response length: {len(fixed_text) if 'fixed_text' in locals() else 'N/A'}")
                 print(f"   Returning empty CV data")
+                self._record_output_path('parse_cv', 'failed')
                 return {}
 
     # ========================================
     # MODULE 3 : ENRICHISSEMENT (TON PROMPT)
     # ========================================
     
-    def read_job_description(self, jd_path: str) -> str:
-        """Lire la job description"""
+    def _jd_file_type(self, jd_path: str) -> str:
+        """Type de la JD d'après son contenu (premiers octets), erreur si format non supporté"""
         file_type = self.detect_file_type(jd_path)
+        if file_type == 'unknown':
+            raise UnsupportedFileTypeError(f"❌ Format de job description non supporté (contenu non reconnu): {os.path.basename(jd_path)}")
+        return file_type
+    
+    def read_job_description(self, jd_path: str) -> str:
+        """Lire la job description (type détecté par le contenu, pas de repli texte silencieux)"""
+        file_type = self._jd_file_type(jd_path)
         
-        if file_type == 'pdf':
-            return self.extract_from_pdf(jd_path)
-        elif file_type == 'docx':
-            return self.extract_from_docx(jd_path)
-        else:
-            return self.extract_from_txt(jd_path)
+        text = self.normalize_extracted_text(self._extract_with_cache(jd_path, file_type), 'jd')
+        self._require_text(text, "Job description", self.MIN_JD_CHARS)
+        return text
     
-    def analyze_cv_matching(self, parsed_cv: Dict[str, Any], jd_text: str) -> Dict[str, Any]:
-        """
-        Analyser le matching entre CV et JD sans enrichir le contenu.
-        Retourne uniquement: score_matching, domaines_analyses, synthese_matching
+    def matching_pipeline(self, cv_path: str, jd_path: str) -> TaskGraph:
         """
-        import time
+        Graphe des étapes du matching:
         
-        print(f"🔍 Analyse du matching CV/JD...", flush=True)
+            extract_cv ──┬──→ parse_cv ──→ match
+            extract_jd ──┴─────────────────┘
         
-        start_time = time.time()
+        Les deux extractions (OCR éventuel + normalisation) tournent en parallèle. parse_cv attend aussi
+        extract_jd: une JD vide ou illisible échoue avant le premier appel payant.
         
-        try:
-            client = self._get_anthropic_client()
-            
-            # Reconstruire le CV en texte pour le prompt
-            cv_text = f"""
-PROFIL: {parsed_cv.get('profil_resume', '')}
-
-TITRE: {parsed_cv.get('titre_professionnel', '')}
-
-COMPÉTENCES:
-{chr(10).join(['- ' + comp for comp in parsed_cv.get('competences', [])])}
-
-EXPÉRIENCES:
-"""
-            for exp in parsed_cv.get('experiences', []):
-                cv_text += f"\n{exp.get('periode', '')} | {exp.get('entreprise', '')} | {exp.get('poste', '')}\n"
-                for resp in exp.get('responsabilites', []):
-                    cv_text += f"  - {resp}\n"
-            
-            cv_text += "\nFORMATION:\n"
-            for form in parsed_cv.get('formation', []):
-                cv_text += f"- {form.get('diplome', '')} | {form.get('institution', '')} | {form.get('annee', '')}\n"
+        En mode 'single_call', un seul appel LLM après les deux extractions:
         
-            # PROMPT FOCALISÉ SUR L'ANALYSE DE MATCHING UNIQUEMENT - VERSION ULTRA-STRICTE V1.3.9
-            prompt = f"""Tu es un système d'évaluation automatisé ULTRA-STRICT qui analyse le matching entre CV et Job Description.
-
-🎯 ANALYSE DE MATCHING PONDÉRÉE (VERSION ULTRA-STRICTE V1.3.9):
+            extract_cv ──┬──→ parse_and_score
+            extract_jd ──┘
+        """
+        graph = TaskGraph('matching')
+        graph.add('extract_cv', lambda: self.extract_cv_text(cv_path))
+        graph.add('extract_jd', lambda: self.read_job_description(jd_path))
+        if self.analysis_mode == 'single_call':
+            graph.add('parse_and_score', self.parse_and_score, deps=['extract_cv', 'extract_jd'])
+        else:
+            graph.add('parse_cv', lambda cv_text, jd_text: self.parse_cv_with_claude(cv_text),
+                      deps=['extract_cv', 'extract_jd'])
+            graph.add('match', self.analyze_cv_matching, deps=['parse_cv', 'extract_jd'])
+        return graph
+    
+    def run_matching_pipeline(self, cv_path: str, jd_path: str) -> Dict[str, Any]:
+        """
+        Extraction, parsing et matching avec les étapes indépendantes en parallèle (voir matching_pipeline).
+        Le format de la JD est vérifié avant de lancer le graphe, son contenu avant le premier appel LLM:
+        pas d'appel API pour une JD illisible ou vide.
+        
+        Returns:
+            dict: {'cv_text', 'jd_text', 'parsed_cv', 'matching_analysis'}
+        """
+        self._jd_file_type(jd_path)
+        
+        graph = self.matching_pipeline(cv_path, jd_path)
+        results = graph.run()
+        graph.print_report()
+        
+        if 'parse_and_score' in results:
+            parsed_cv, matching_analysis = results['parse_and_score']
+        else:
+            parsed_cv, matching_analysis = results['parse_cv'], results['match']
+        if '_metadata' in matching_analysis:
+            matching_analysis['_metadata']['pipeline'] = graph.report()
+        return {
+            'cv_text': results['extract_cv'],
+            'jd_text': results['extract_jd'],
+            'parsed_cv': parsed_cv,
+            'matching_analysis': matching_analysis
+        }
+    
+    # Grille de matching V1.3.9 et format JSON de sortie (partagés avec le mode parse_and_score)
+    MATCHING_RUBRIC = """🎯 ANALYSE DE MATCHING PONDÉRÉE (VERSION ULTRA-STRICTE V1.3.9):
 
 ⚠️ PRINCIPE FONDAMENTAL - ÉVALUATION ULTRA-RIGOUREUSE:
 - Tu es un RECRUTEUR SENIOR EXTRÊMEMENT EXIGEANT avec 15+ ans d'expérience
@@ -750,35 +1278,19 @@ RÈGLES CRITIQUES:
 - Include score + match level (EXCELLENT 85+, GOOD 70-84, MODERATE 55-69, WEAK <55)
 - Be specific with numbers/metrics when available
 - Professional but direct tone
-- Clear go/no-go recommendation at the end
-
-═══════════════════════════════════════════════════
-📄 FORMAT DE SORTIE JSON
-═══════════════════════════════════════════════════
-
-📄 JOB DESCRIPTION:
-{jd_text}
-
-📄 CV DU CANDIDAT:
-{cv_text}
-
-═══════════════════════════════════════════════════
-
-🎯 GÉNÈRE MAINTENANT TON ANALYSE - FORMAT JSON STRICT:
-
-Retourne UNIQUEMENT un JSON avec cette structure (sans texte avant/après):
-
-{{
+- Clear go/no-go recommendation at the end"""
+    
+    MATCHING_JSON_FORMAT = """{
     "score_matching": 58,
     "domaines_analyses": [
-        {{
+        {
             "domaine": "Nom du domaine technique/compétence exact",
             "poids": 20,
             "score": 10,
             "score_max": 20,
             "match": "bon",
             "commentaire": "Justification FACTUELLE ultra-détaillée basée sur des éléments PRÉCIS du CV avec années d'expérience, projets, réalisations, metrics. Minimum 2-3 phrases complètes."
-        }}
+        }
     ],
     "synthese_matching": "COMPREHENSIVE PROFESSIONAL ANALYSIS (4-6 DETAILED PARAGRAPHS, 250-350 WORDS):
 
@@ -796,7 +1308,7 @@ Retourne UNIQUEMENT un JSON avec cette structure (sans texte avant/après):
 
 [Paragraph 5 - Final Recommendation]
 [Detailed recommendation text...]"
-}}
+}
 
 ⚠️ RÈGLES JSON CRITIQUES:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -810,125 +1322,123 @@ Retourne UNIQUEMENT un JSON avec cette structure (sans texte avant/après):
 ⚠️ LANGUE: ALL output must be in ENGLISH.
 - Domain names in English (e.g., "Python Backend Development", not "Développement Backend Python")
 - All comments in English
-- Synthesis in English (4-5 lines max)
+- Synthesis in English (4-5 lines max)"""
+    
+    def analyze_cv_matching(self, parsed_cv: Dict[str, Any], jd_text: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Analyser le matching entre CV et JD sans enrichir le contenu.
+        Retourne uniquement: score_matching, domaines_analyses, synthese_matching
+        (use_cache=False: ignorer le cache des résultats)
+        """
+        return self._run_flow(self._cached_flow('matching', self._analyze_matching_flow(parsed_cv, jd_text), use_cache,
+                                                parsed_cv=parsed_cv, jd_text=jd_text))
+    
+    def _matching_system_prompt(self) -> str:
+        """Consignes system du matching: grille et format de sortie (voir _result_cache_key)"""
+        return f"""Tu es un système d'évaluation automatisé ULTRA-STRICT qui analyse le matching entre CV et Job Description.
+
+{self.MATCHING_RUBRIC}
+
+═══════════════════════════════════════════════════
+📄 FORMAT DE SORTIE JSON
+═══════════════════════════════════════════════════
+
+Retourne UNIQUEMENT un JSON avec cette structure (sans texte avant/après):
+
+{self.MATCHING_JSON_FORMAT}"""
+    
+    def _analyze_matching_flow(self, parsed_cv: Dict[str, Any], jd_text: str):
+        """Étape matching en générateur (voir _parse_cv_flow)"""
+        import time
+        
+        # Pas d'appel API payant sans CV parsé ni JD exploitable
+        if not parsed_cv:
+            raise EmptyDocumentError("❌ CV: aucune donnée structurée à analyser (parsing vide)")
+        self._require_text(jd_text, "Job description", self.MIN_JD_CHARS)
+        
+        print(f"🔍 Analyse du matching CV/JD...", flush=True)
+        
+        start_time = time.time()
+        
+        try:
+            # Reconstruire le CV en texte pour le prompt
+            cv_text = f"""
+PROFIL: {parsed_cv.get('profil_resume', '')}
+
+TITRE: {parsed_cv.get('titre_professionnel', '')}
+
+COMPÉTENCES:
+{chr(10).join(['- ' + comp for comp in parsed_cv.get('competences', [])])}
+
+EXPÉRIENCES:
+"""
+            for exp in parsed_cv.get('experiences', []):
+                cv_text += f"\n{exp.get('periode', '')} | {exp.get('entreprise', '')} | {exp.get('poste', '')}\n"
+                for resp in exp.get('responsabilites', []):
+                    cv_text += f"  - {resp}\n"
+            
+            cv_text += "\nFORMATION:\n"
+            for form in parsed_cv.get('formation', []):
+                cv_text += f"- {form.get('diplome', '')} | {form.get('institution', '')} | {form.get('annee', '')}\n"
+        
+            # PROMPT FOCALISÉ SUR L'ANALYSE DE MATCHING UNIQUEMENT - VERSION ULTRA-STRICTE V1.3.9
+            # Grille + format en system (identiques pour tous les candidats), puis JD (partagée par un batch), puis CV
+            system_prompt = self._matching_system_prompt()
+            prompt_blocks = [
+                f"📄 JOB DESCRIPTION:\n{jd_text}",
+                f"""📄 CV DU CANDIDAT:
+{cv_text}
+
+═══════════════════════════════════════════════════
+
+🎯 GÉNÈRE MAINTENANT TON ANALYSE - FORMAT JSON STRICT
 
 Génère l'analyse maintenant:"""
+            ]
             
             print(f">>> Calling Claude API for matching analysis...", flush=True)
             
-            # ✅ RETRY LOGIC FOR TIMEOUTS
-            max_retries = 2
-            response = None
-            last_error = None
-            
-            for attempt in range(max_retries):
-                try:
-                    response = client.messages.create(
-                        model="claude-sonnet-4-5-20250929",
-                        max_tokens=4000,
-                        timeout=900.0,  # 15 minutes
-                        messages=[{"role": "user", "content": prompt}]
-                    )
-                    break  # Success - exit retry loop
-                    
-                except Exception as e:
-                    last_error = e
-                    error_name = type(e).__name__
-                    
-                    # Check if it's a timeout error
-                    if 'timeout' in error_name.lower() or 'timeout' in str(e).lower():
-                        if attempt < max_retries - 1:
-                            print(f"⏱️ Timeout attempt {attempt+1}/{max_retries}, retrying...", flush=True)
-                            continue
-                        else:
-                            # Final timeout - return error result
-                            print(f"❌ Final timeout after {max_retries} attempts", flush=True)
-                            return {
-                                'error': 'timeout',
-                                'score_matching': 0,
-                                'domaines_analyses': [],
-                                'synthese_matching': "⏱️ L'analyse a pris trop de temps (timeout après plusieurs tentatives). Veuillez réessayer avec un CV plus court ou contactez le support."
-                            }
-                    else:
-                        # Other error - re-raise
-                        raise
-            
-            if response is None:
-                # Should not happen, but safety check
-                raise last_error
-            
-            # Extraire tokens
-            usage = response.usage
-            input_tokens = usage.input_tokens
-            output_tokens = usage.output_tokens
-            total_tokens = input_tokens + output_tokens
+            # Retries (timeouts, 429, 529) gérés par _call_with_retry: ici seulement l'échec final
+            try:
+                response = yield self._llm_request(
+                    system_prompt,
+                    prompt_blocks,
+                    model=self.MODEL,
+                    max_tokens=4000,
+                    **tool_params('matching')
+                )
+            except Exception as e:
+                if not is_timeout_error(e):
+                    raise
+                print(f"❌ Final timeout after retries", flush=True)
+                return {
+                    'error': 'timeout',
+                    'score_matching': 0,
+                    'domaines_analyses': [],
+                    'synthese_matching': "⏱️ L'analyse a pris trop de temps (timeout après plusieurs tentatives). Veuillez réessayer avec un CV plus court ou contactez le support."
+                }
             
-            print(f">>> API Response received. Tokens: {total_tokens}", flush=True)
+            # Extraire tokens (cache compris)
+            tokens = self._usage_tokens(response)
+            total_tokens = sum(tokens.values())
             
-            # Parser la réponse
-            response_text = response.content[0].text.strip()
+            print(f">>> API Response received. Tokens: {total_tokens} "
+                  f"(cache read {tokens['cache_read_input_tokens']})", flush=True)
             
-            # Nettoyer le JSON
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
+            # Parser la réponse: entrée de l'outil, sinon texte JSON
+            structured = tool_input(response, 'matching')
+            response_text = '' if structured is not None else text_of(response).strip()
             
             # Parser le JSON
             try:
-                matching_result = json.loads(response_text)
+                # Texte: réparation locale par paliers avant l'appel payant de correction
+                matching_result, path = ((structured, 'tool_use') if structured is not None
+                                         else loads_with_repair(response_text, stage_schema('matching')))
+                self._record_output_path('matching', path)
                 print(f">>> JSON parsed successfully!", flush=True)
                 
-                # V1.3.4.1 FIX: Recalculer le score_matching pour garantir cohérence
-                # Somme des scores de tous les domaines
-                if 'domaines_analyses' in matching_result and matching_result['domaines_analyses']:
-                    calculated_score = sum(d.get('score', 0) for d in matching_result['domaines_analyses'])
-                    original_score = matching_result.get('score_matching', 0)
-                    
-                    # Si différence > 2 points, utiliser le score calculé
-                    if abs(calculated_score - original_score) > 2:
-                        print(f"⚠️ Score mismatch detected: Claude={original_score}, Calculated={calculated_score}")
-                        print(f"   Using calculated score for consistency: {calculated_score}/100")
-                        matching_result['score_matching'] = round(calculated_score)
-                    else:
-                        # Petite différence acceptable (arrondis)
-                        matching_result['score_matching'] = round(calculated_score)
-                    
-                    # ✅ V1.3.4.2 FIX: CAP SCORE AT 100 MAXIMUM
-                    if matching_result['score_matching'] > 100:
-                        print(f"⚠️ Score exceeded 100: {matching_result['score_matching']} → Capping at 100")
-                        matching_result['score_matching'] = 100
-                    
-                    # ✅ V1.3.4.3 FIX: Update synthese_matching with correct score
-                    # If score was recalculated, update any score mentions in the synthesis
-                    if abs(calculated_score - original_score) > 2 and 'synthese_matching' in matching_result:
-                        synthese = matching_result['synthese_matching']
-                        # Replace score mentions in common formats
-                        import re
-                        # Format: "score of XX" or "XX/100" or "XX out of 100"
-                        synthese = re.sub(
-                            rf'\b{original_score}/100\b',
-                            f'{matching_result["score_matching"]}/100',
-                            synthese
-                        )
-                        synthese = re.sub(
-                            rf'\bscore of {original_score}\b',
-                            f'score of {matching_result["score_matching"]}',
-                            synthese,
-                            flags=re.IGNORECASE
-                        )
-                        synthese = re.sub(
-                            rf'\b{original_score} out of 100\b',
-                            f'{matching_result["score_matching"]} out of 100',
-                            synthese,
-                            flags=re.IGNORECASE
-                        )
-                        matching_result['synthese_matching'] = synthese
-                        print(f"   ✅ Updated synthese_matching to reflect corrected score: {matching_result['score_matching']}/100")
-                        
+                matching_result = self._finalize_matching(matching_result)
+            
             except json.JSONDecodeError as e:
                 print(f"⚠️ JSON Error: {e}", flush=True)
                 print(f">>> Attempting to fix JSON...", flush=True)
@@ -940,79 +1450,36 @@ Génère l'analyse maintenant:"""
 
 Return the corrected JSON directly:"""
                 
-                # ✅ RETRY LOGIC FOR JSON FIX
-                fix_response = None
-                for fix_attempt in range(2):
-                    try:
-                        fix_response = client.messages.create(
-                            model="claude-sonnet-4-5-20250929",
-                            max_tokens=4000,
-                            timeout=300.0,  # 5 minutes for fix
-                            messages=[{"role": "user", "content": fix_prompt}]
-                        )
-                        break
-                    except Exception as fix_error:
-                        if 'timeout' in type(fix_error).__name__.lower() or 'timeout' in str(fix_error).lower():
-                            if fix_attempt < 1:
-                                print(f"⏱️ JSON fix timeout, retrying...", flush=True)
-                                continue
-                            else:
-                                # Can't fix JSON - return error
-                                return {
-                                    'error': 'json_parse_timeout',
-                                    'score_matching': 0,
-                                    'domaines_analyses': [],
-                                    'synthese_matching': "❌ Erreur de parsing JSON et timeout lors de la correction. Veuillez réessayer."
-                                }
-                        else:
-                            raise
-                
-                if fix_response is None:
+                try:
+                    fix_response = yield dict(
+                        model=self.MODEL,
+                        max_tokens=4000,
+                        messages=[{"role": "user", "content": fix_prompt}],
+                        **tool_params('matching')
+                    )
+                except Exception as fix_error:
+                    if not is_timeout_error(fix_error):
+                        raise
+                    # Can't fix JSON - return error
                     return {
-                        'error': 'json_fix_failed',
+                        'error': 'json_parse_timeout',
                         'score_matching': 0,
                         'domaines_analyses': [],
-                        'synthese_matching': "❌ Impossible de corriger le JSON malformé."
+                        'synthese_matching': "❌ Erreur de parsing JSON et timeout lors de la correction. Veuillez réessayer."
                     }
                 
-                fixed_text = fix_response.content[0].text.strip()
-                if fixed_text.startswith('```json'):
-                    fixed_text = fixed_text[7:]
-                if fixed_text.startswith('```'):
-                    fixed_text = fixed_text[3:]
-                if fixed_text.endswith('```'):
-                    fixed_text = fixed_text[:-3]
-                fixed_text = fixed_text.strip()
-                
-                matching_result = json.loads(fixed_text)
+                fixed = tool_input(fix_response, 'matching')
+                fixed_text = text_of(fix_response).strip()
+                matching_result = fixed if fixed is not None else loads_with_repair(fixed_text, stage_schema('matching'))[0]
+                self._record_output_path('matching', 'llm_repair')
                 print(f">>> JSON successfully fixed and parsed!", flush=True)
             
-            # Calculer le temps et coût
-            processing_time = round(time.time() - start_time, 2)
-            cost_input = (input_tokens / 1_000_000) * 3.0
-            cost_output = (output_tokens / 1_000_000) * 15.0
-            total_cost = round(cost_input + cost_output, 4)
-            
-            # Ajouter les métadonnées
-            matching_result['_metadata'] = {
-                'processing_time_seconds': processing_time,
-                'input_tokens': input_tokens,
-                'output_tokens': output_tokens,
-                'total_tokens': total_tokens,
-                'estimated_cost_usd': total_cost
-            }
-            
-            print(f"✅ Analyse de matching réussie!")
-            print(f"   Score matching: {matching_result.get('score_matching', 0)}/100")
-            print(f"   Domaines analysés: {len(matching_result.get('domaines_analyses', []))}")
-            print(f"   ⏱️ Temps: {processing_time}s")
-            print(f"   📊 Tokens: {total_tokens:,}")
-            print(f"   💰 Coût: ${total_cost}")
-            
-            return matching_result
+            return self._attach_matching_metadata(matching_result, start_time, tokens)
             
         except Exception as e:
             print(f"❌ Erreur analyse matching: {e}", flush=True)
+            if isinstance(e, json.JSONDecodeError):
+                self._record_output_path('matching', 'failed')
             import traceback
             print(traceback.format_exc(), flush=True)
             return {
@@ -1021,12 +1488,197 @@ Return the corrected JSON directly:"""
                 'synthese_matching': f'Erreur lors de l\'analyse: {str(e)}'
             }
     
+    def _finalize_matching(self, matching_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Cohérence du score: score_matching = somme des domaines, plafonné à 100, synthèse mise à jour"""
+        # V1.3.4.1 FIX: Recalculer le score_matching pour garantir cohérence
+        # Somme des scores de tous les domaines
+        if 'domaines_analyses' in matching_result and matching_result['domaines_analyses']:
+            calculated_score = sum(d.get('score', 0) for d in matching_result['domaines_analyses'])
+            original_score = matching_result.get('score_matching', 0)
+        
+            # Si différence > 2 points, utiliser le score calculé
+            if abs(calculated_score - original_score) > 2:
+                print(f"⚠️ Score mismatch detected: Claude={original_score}, Calculated={calculated_score}")
+                print(f"   Using calculated score for consistency: {calculated_score}/100")
+                matching_result['score_matching'] = round(calculated_score)
+            else:
+                # Petite différence acceptable (arrondis)
+                matching_result['score_matching'] = round(calculated_score)
+        
+            # ✅ V1.3.4.2 FIX: CAP SCORE AT 100 MAXIMUM
+            if matching_result['score_matching'] > 100:
+                print(f"⚠️ Score exceeded 100: {matching_result['score_matching']} → Capping at 100")
+                matching_result['score_matching'] = 100
+        
+            # ✅ V1.3.4.3 FIX: Update synthese_matching with correct score
+            # If score was recalculated, update any score mentions in the synthesis
+            if abs(calculated_score - original_score) > 2 and 'synthese_matching' in matching_result:
+                synthese = matching_result['synthese_matching']
+                # Replace score mentions in common formats
+                import re
+                # Format: "score of XX" or "XX/100" or "XX out of 100"
+                synthese = re.sub(
+                    rf'\b{original_score}/100\b',
+                    f'{matching_result["score_matching"]}/100',
+                    synthese
+                )
+                synthese = re.sub(
+                    rf'\bscore of {original_score}\b',
+                    f'score of {matching_result["score_matching"]}',
+                    synthese,
+                    flags=re.IGNORECASE
+                )
+                synthese = re.sub(
+                    rf'\b{original_score} out of 100\b',
+                    f'{matching_result["score_matching"]} out of 100',
+                    synthese,
+                    flags=re.IGNORECASE
+                )
+                matching_result['synthese_matching'] = synthese
+                print(f"   ✅ Updated synthese_matching to reflect corrected score: {matching_result['score_matching']}/100")
+        return matching_result
+    
+    def _attach_matching_metadata(self, matching_result: Dict[str, Any], start_time: float,
+                                  tokens: Dict[str, int], **extra) -> Dict[str, Any]:
+        """Ajouter _metadata (temps, tokens dont cache, coût, retries, normalisation, OCR, langue) au résultat du matching"""
+        total_tokens = sum(tokens.values())
+        # Calculer le temps et coût
+        processing_time = round(time.time() - start_time, 2)
+        total_cost = self._estimate_cost_usd(tokens)
+        
+        # Ajouter les métadonnées (input_tokens = tokens d'entrée hors cache)
+        matching_result['_metadata'] = {
+            'processing_time_seconds': processing_time,
+            **tokens,
+            'total_tokens': total_tokens,
+            'estimated_cost_usd': total_cost,
+            'text_normalization': dict(self.normalization_stats),
+            'ocr_page_cache': self.ocr_engine.cache_stats(),
+            'detected_language': self.detected_language,
+            'structured_output': output_path_stats(),
+            'api_attempts': self.api_attempts.summary(),
+            'rate_limiter': self.rate_limiter.stats() if self.rate_limiter else None,
+            'http_pool': self._http_pool_stats(),
+            'result_cache': {'hit': False, 'stages': result_cache_stats()},
+            **extra
+        }
+        
+        print(f"✅ Analyse de matching réussie!")
+        print(f"   Score matching: {matching_result.get('score_matching', 0)}/100")
+        print(f"   Domaines analysés: {len(matching_result.get('domaines_analyses', []))}")
+        print(f"   ⏱️ Temps: {processing_time}s")
+        print(f"   📊 Tokens: {total_tokens:,} (cache: {tokens['cache_read_input_tokens']:,} read, "
+              f"{tokens['cache_creation_input_tokens']:,} written)")
+        print(f"   💰 Coût: ${total_cost}")
+        return matching_result
+    
+    def parse_and_score(self, cv_text: str, jd_text: str, use_cache: bool = True):
+        """
+        Parsing du CV et matching CV/JD en un seul appel LLM structuré (mode 'single_call').
+        Repli automatique sur le chemin deux appels (parsing puis matching) si la réponse est inexploitable.
+        use_cache=False: ignorer le cache des résultats.
+        
+        Returns:
+            tuple: (parsed_cv, matching_analysis) au même format que parse_cv_with_claude / analyze_cv_matching
+        """
+        return self._run_flow(self._cached_flow('parse_and_score', self._parse_and_score_flow(cv_text, jd_text),
+                                                use_cache, cv_text=cv_text, jd_text=jd_text))
+    
+    def _parse_and_score_system_prompt(self) -> str:
+        """Consignes system de parse_and_score: parsing, grille et format (voir _result_cache_key)"""
+        return f"""Tu es un expert en analyse de CV et un système d'évaluation automatisé ULTRA-STRICT. En UNE seule réponse JSON:
+1. Extrait TOUTES les informations du CV et structure-les (clé "parsed_cv")
+2. Analyse le matching entre ce CV et la Job Description (clé "matching")
+
+═══════════════════════════════════════════════════
+🧾 PARTIE 1 - PARSING DU CV → "parsed_cv"
+═══════════════════════════════════════════════════
+
+{self.CV_PARSE_INSTRUCTIONS}
+
+═══════════════════════════════════════════════════
+🧮 PARTIE 2 - MATCHING CV / JD → "matching"
+═══════════════════════════════════════════════════
+
+{self.MATCHING_RUBRIC}
+
+Structure de l'objet "matching":
+
+{self.MATCHING_JSON_FORMAT}
+
+═══════════════════════════════════════════════════
+
+🎯 Retourne UNIQUEMENT un JSON (sans markdown, sans texte avant/après):
+{{"parsed_cv": {{...objet de la PARTIE 1...}}, "matching": {{...objet de la PARTIE 2...}}}}"""
+    
+    def _parse_and_score_flow(self, cv_text: str, jd_text: str):
+        """Étape parse_and_score en générateur (voir _parse_cv_flow)"""
+        # Pas d'appel API payant sur un texte vide ou illisible
+        self._require_text(cv_text, "CV", self.MIN_CV_CHARS)
+        self._require_text(jd_text, "Job description", self.MIN_JD_CHARS)
+        
+        print("🤖 Parsing + matching du CV en un seul appel...", flush=True)
+        start_time = time.time()
+        
+        system_prompt = self._parse_and_score_system_prompt()
+        
+        try:
+            print(f">>> Calling Claude API for parse_and_score...", flush=True)
+            response = yield self._llm_request(
+                system_prompt,
+                [f"📄 JOB DESCRIPTION:\n{jd_text}", f"CV À ANALYSER:\n{cv_text}"],
+                model=self.MODEL,
+                max_tokens=12000,  # parsing (8000) + matching (4000)
+                **tool_params('parse_and_score')
+            )
+        except Exception as e:
+            print(f"⚠️ parse_and_score call failed ({repr(e)}) → two-call fallback", flush=True)
+            response = None
+        
+        result = None
+        if response is not None:
+            result = tool_input(response, 'parse_and_score')
+            path = 'tool_use'
+            if result is None:
+                try:
+                    result, path = loads_with_repair(text_of(response), stage_schema('parse_and_score'))
+                except json.JSONDecodeError as e:
+                    print(f"⚠️ parse_and_score JSON unusable: {e}", flush=True)
+        
+        parsed_cv = result.get('parsed_cv') if isinstance(result, dict) else None
+        matching_result = result.get('matching') if isinstance(result, dict) else None
+        if not (isinstance(parsed_cv, dict) and parsed_cv and isinstance(matching_result, dict)
+                and matching_result.get('domaines_analyses')):
+            if response is not None:
+                print(f"⚠️ parse_and_score response incomplete → two-call fallback", flush=True)
+                # Repli deux appels après une réponse inexploitable = appels LLM supplémentaires, compté comme
+                # réparation (pas après une erreur API: aucune sortie à réparer)
+                self._record_output_path('parse_and_score', 'llm_repair')
+            parsed_cv = yield from self._parse_cv_flow(cv_text)
+            matching_result = yield from self._analyze_matching_flow(parsed_cv, jd_text)
+            if '_metadata' in matching_result:
+                matching_result['_metadata']['analysis_mode'] = 'two_call_fallback'
+            return parsed_cv, matching_result
+        
+        self._record_output_path('parse_and_score', path)
+        print(f"✅ Parsing réussi!")
+        print(f"   Langues: {', '.join(parsed_cv.get('langues', []))}")
+        print(f"   Compétences: {len(parsed_cv.get('competences', []))}")
+        print(f"   Expériences: {len(parsed_cv.get('experiences', []))}")
+        
+        matching_result = self._finalize_matching(matching_result)
+        matching_result = self._attach_matching_metadata(
+            matching_result, start_time, self._usage_tokens(response), analysis_mode='single_call'
+        )
+        return parsed_cv, matching_result
+    
     def enrich_cv_with_prompt(
         self, 
         parsed_cv: Dict[str, Any], 
         jd_text: str, 
         language: str = "French",
-        matching_analysis: Dict[str, Any] = None  # ✅ FIX: Nouveau paramètre pour réutiliser le matching
+        matching_analysis: Dict[str, Any] = None,  # ✅ FIX: Nouveau paramètre pour réutiliser le matching
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Enrichir le CV avec l'IA
@@ -1037,47 +1689,31 @@ Return the corrected JSON directly:"""
             language: Langue cible (French/English)
             matching_analysis: Résultat optionnel du matching préalable (Step 1)
                               Si fourni, réutilise le score au lieu de le recalculer
+            use_cache: False pour ignorer le cache des résultats (nouvelle génération)
         
         Returns:
             CV enrichi avec tous les champs nécessaires
         """
-        import time
-        
-        # ⚠️ CRITICIAL: Déterminer si on réutilise le scoring du Step 1
-        reuse_scoring = matching_analysis is not None
-        
-        print(f"✨ Enrichissement du CV avec l'IA...", flush=True)
-        print(f"   Langue cible: {language}", flush=True)
-        print(f"   Mode: {'Réutilisation scoring Step 1' if reuse_scoring else 'Scoring complet'}", flush=True)
-        
-        # ⏱️ Démarrer le chronomètre
-        start_time = time.time()
-        
-        try:
-            client = self._get_anthropic_client()
-            
-            # Reconstruire le CV en texte pour le prompt
-            cv_text = f"""
-PROFIL: {parsed_cv.get('profil_resume', '')}
-
-TITRE: {parsed_cv.get('titre_professionnel', '')}
-
-COMPÉTENCES:
-{chr(10).join(['- ' + comp for comp in parsed_cv.get('competences', [])])}
-
-EXPÉRIENCES:
-"""
-            for exp in parsed_cv.get('experiences', []):
-                cv_text += f"\n{exp.get('periode', '')} | {exp.get('entreprise', '')} | {exp.get('poste', '')}\n"
-                for resp in exp.get('responsabilites', []):
-                    cv_text += f"  - {resp}\n"
-            
-            cv_text += "\nFORMATION:\n"
-            for form in parsed_cv.get('formation', []):
-                cv_text += f"- {form.get('diplome', '')} | {form.get('institution', '')} | {form.get('annee', '')}\n"
-        
-            # PROMPT ULTRA-RENFORCÉ POUR COHÉRENCE ABSOLUE
-            language_instruction = f"""
+        return self._run_flow(self._cached_enrich_flow(parsed_cv, jd_text, language, matching_analysis, use_cache))
+    
+    def _cached_enrich_flow(self, parsed_cv: Dict[str, Any], jd_text: str, language: str,
+                            matching_analysis: Dict[str, Any], use_cache: bool):
+        """Enrichissement derrière le cache: le scoring repris du Step 1 fait partie de la clé (fusionné au résultat)"""
+        reused = None
+        if matching_analysis is not None:
+            reused = {k: matching_analysis.get(k) for k in ('score_matching', 'domaines_analyses',
+                                                             'synthese_matching', 'points_forts')}
+        return self._cached_flow('enrich', self._enrich_cv_flow(parsed_cv, jd_text, language, matching_analysis),
+                                 use_cache, parsed_cv=parsed_cv, jd_text=jd_text, language=language,
+                                 reused_matching=reused)
+    
+    def _enrich_system_prompt(self, language: str, reuse_scoring: bool) -> str:
+        """
+        Consignes system de l'enrichissement: règles de langue, puis enrichissement seul (scoring du Step 1 réutilisé)
+        ou enrichissement + scoring complet (voir _result_cache_key)
+        """
+        # PROMPT ULTRA-RENFORCÉ POUR COHÉRENCE ABSOLUE
+        language_instruction = f"""
 🚨 RÈGLE ABSOLUE - LANGUE {language.upper()} 🚨
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
@@ -1134,12 +1770,12 @@ Si UNE SEULE phrase n'est pas en {language} → RECOMMENCE TOUT.
 - Tu notes comme un examinateur professionnel, pas comme un vendeur
 """
             
-            # ✅ FIX: Choisir le prompt selon si on réutilise le matching ou non
-            if reuse_scoring:
-                # ============================================
-                # VERSION SIMPLIFIÉE - Matching déjà fait au Step 1
-                # ============================================
-                prompt = f"""Voici la job description et le CV actuel ci-dessous.
+        # ✅ FIX: Choisir le prompt selon si on réutilise le matching ou non
+        if reuse_scoring:
+            # ============================================
+            # VERSION SIMPLIFIÉE - Matching déjà fait au Step 1
+            # ============================================
+            system_prompt = f"""Voici la job description et le CV actuel ci-dessous.
 
 🔹 Améliore le CV pour qu'il soit parfaitement aligné avec la job description tout en gardant le format d'origine (titres, mise en page, structure, ton professionnel).
 {language_instruction}
@@ -1211,32 +1847,15 @@ FORMAT OBLIGATOIRE (COPIER format compétences):
 
 ---
 
-JOB DESCRIPTION:
-{jd_text}
-
----
-
-CV ACTUEL:
-{cv_text}
-
----
-
-IMPORTANT FINAL - RÈGLES JSON STRICTES:
-- Génère UNIQUEMENT du JSON valide
-- PAS de commentaires (// ou /* */)
-- PAS de virgules finales (trailing commas)
-- PAS de markdown (```json ou ```)
-- TOUS les strings doivent utiliser des guillemets doubles ""
-- Vérifie que TOUTES les accolades et crochets sont fermés
-- Si tu hésites sur un champ, mets une valeur par défaut plutôt qu'une erreur
+IMPORTANT FINAL - FORMAT DE RÉPONSE:
+- Réponds UNIQUEMENT en appelant l'outil record_enriched_cv avec exactement la structure ci-dessus
+- Si tu hésites sur un champ, mets une valeur par défaut plutôt qu'une erreur"""
 
-Réponds UNIQUEMENT avec du JSON pur, sans rien d'autre avant ou après."""
-
-            else:
-                # ============================================
-                # VERSION COMPLÈTE - Mode legacy/fallback avec matching inclus
-                # ============================================
-                prompt = f"""Voici la job description et le CV actuel ci-dessous.
+        else:
+            # ============================================
+            # VERSION COMPLÈTE - Mode legacy/fallback avec matching inclus
+            # ============================================
+            system_prompt = f"""Voici la job description et le CV actuel ci-dessous.
 
 🔹 Améliore le CV pour qu'il soit parfaitement aligné avec la job description tout en gardant le format d'origine (titres, mise en page, structure, ton professionnel).
 {language_instruction}
@@ -1513,40 +2132,66 @@ Si tu trouves une incohérence → RECALCULE TOUT depuis le début
 
 ---
 
-JOB DESCRIPTION:
-{jd_text}
-
----
-
-CV ACTUEL:
-{cv_text}
+IMPORTANT FINAL - FORMAT DE RÉPONSE:
+- Réponds UNIQUEMENT en appelant l'outil record_enriched_cv avec exactement la structure ci-dessus
+- Si tu hésites sur un champ, mets une valeur par défaut plutôt qu'une erreur"""
+        return system_prompt
+    
+    def _enrich_cv_flow(self, parsed_cv: Dict[str, Any], jd_text: str, language: str,
+                        matching_analysis: Dict[str, Any] = None):
+        """Étape enrichissement en générateur (voir _parse_cv_flow)"""
+        import time
+        
+        # ⚠️ CRITICIAL: Déterminer si on réutilise le scoring du Step 1
+        reuse_scoring = matching_analysis is not None
+        # Schéma de sortie: enrichissement seul, ou enrichissement + scoring complet
+        stage = 'enrich' if reuse_scoring else 'enrich_with_matching'
+        
+        print(f"✨ Enrichissement du CV avec l'IA...", flush=True)
+        print(f"   Langue cible: {language}", flush=True)
+        print(f"   Mode: {'Réutilisation scoring Step 1' if reuse_scoring else 'Scoring complet'}", flush=True)
+        
+        # ⏱️ Démarrer le chronomètre
+        start_time = time.time()
+        
+        try:
+            # Reconstruire le CV en texte pour le prompt
+            cv_text = f"""
+PROFIL: {parsed_cv.get('profil_resume', '')}
 
----
+TITRE: {parsed_cv.get('titre_professionnel', '')}
 
-IMPORTANT FINAL - RÈGLES JSON STRICTES:
-- Génère UNIQUEMENT du JSON valide
-- PAS de commentaires (// ou /* */)
-- PAS de virgules finales (trailing commas)
-- PAS de markdown (```json ou ```)
-- TOUS les strings doivent utiliser des guillemets doubles ""
-- Vérifie que TOUTES les accolades et crochets sont fermés
-- Si tu hésites sur un champ, mets une valeur par défaut plutôt qu'une erreur
+COMPÉTENCES:
+{chr(10).join(['- ' + comp for comp in parsed_cv.get('competences', [])])}
 
-Réponds UNIQUEMENT avec du JSON pur, sans rien d'autre avant ou après."""
+EXPÉRIENCES:
+"""
+            for exp in parsed_cv.get('experiences', []):
+                cv_text += f"\n{exp.get('periode', '')} | {exp.get('entreprise', '')} | {exp.get('poste', '')}\n"
+                for resp in exp.get('responsabilites', []):
+                    cv_text += f"  - {resp}\n"
+            
+            cv_text += "\nFORMATION:\n"
+            for form in parsed_cv.get('formation', []):
+                cv_text += f"- {form.get('diplome', '')} | {form.get('institution', '')} | {form.get('annee', '')}\n"
+        
+            system_prompt = self._enrich_system_prompt(language, reuse_scoring)
 
-            print(f">>> Calling Claude API for enrichment with timeout=300s...", flush=True)
-            response = client.messages.create(
-                model="claude-sonnet-4-5-20250929",
+            print(f">>> Calling Claude API for enrichment (budget {self.retry_policy.deadline('enrich'):.0f}s)...", flush=True)
+            # Consignes (par langue et par mode) en system → cache; JD puis CV en message user
+            response = yield self._llm_request(
+                system_prompt,
+                [f"JOB DESCRIPTION:\n{jd_text}", f"CV ACTUEL:\n{cv_text}"],
+                model=self.MODEL,
                 max_tokens=8000,
-                timeout=300.0,  # 5 minutes max
-                messages=[{"role": "user", "content": prompt}]
+                **tool_params(stage)
             )
             print(f">>> Enrichment API call completed successfully", flush=True)
             
             # 📊 Capturer les métadonnées API
-            input_tokens = response.usage.input_tokens if hasattr(response, 'usage') else 0
-            output_tokens = response.usage.output_tokens if hasattr(response, 'usage') else 0
-            total_tokens = input_tokens + output_tokens
+            tokens = self._usage_tokens(response)
+            input_tokens, output_tokens = tokens['input_tokens'], tokens['output_tokens']
+            total_tokens = sum(tokens.values())
             
         except Exception as e:
             print(f">>> ERROR calling anthropic for enrichment: {repr(e)}", flush=True)
@@ -1555,19 +2200,11 @@ Réponds UNIQUEMENT avec du JSON pur, sans rien d'autre avant ou après."""
             return {}
         
         print(f">>> API Response received, extracting text...", flush=True)
-        response_text = response.content[0].text.strip()
+        structured = tool_input(response, stage)
+        response_text = '' if structured is not None else text_of(response).strip()
         print(f">>> Response length: {len(response_text)} characters", flush=True)
         print(f">>> Response preview (first 500 chars):\n{response_text[:500]}", flush=True)
         
-        # Nettoyer JSON
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
-        
         print(f">>> Attempting to parse JSON...", flush=True)
         
         # 🔧 NOUVEAU: Tentative de parsing avec retry et correction
@@ -1577,8 +2214,10 @@ Réponds UNIQUEMENT avec du JSON pur, sans rien d'autre avant ou après."""
         for attempt in range(max_retries):
             try:
                 if attempt == 0:
-                    # Première tentative: parsing direct
-                    enriched = json.loads(response_text)
+                    # Première tentative: entrée de l'outil, sinon réparation locale du texte par paliers
+                    enriched, path = ((structured, 'tool_use') if structured is not None
+                                      else loads_with_repair(response_text, stage_schema(stage)))
+                    self._record_output_path('enrich', path)
                     print(f">>> JSON parsed successfully on first attempt!", flush=True)
                     break
                 else:
@@ -1591,24 +2230,17 @@ Réponds UNIQUEMENT avec du JSON pur, sans rien d'autre avant ou après."""
 
 Return the corrected JSON directly:"""
                     
-                    fix_response = client.messages.create(
-                        model="claude-sonnet-4-5-20250929",
+                    fix_response = yield dict(
+                        model=self.MODEL,
                         max_tokens=8000,
-                        timeout=300.0,  # Same as main enrichment call
-                        messages=[{"role": "user", "content": fix_prompt}]
+                        messages=[{"role": "user", "content": fix_prompt}],
+                        **tool_params(stage)
                     )
                     
-                    fixed_text = fix_response.content[0].text.strip()
-                    # Nettoyer le JSON corrigé
-                    if fixed_text.startswith('```json'):
-                        fixed_text = fixed_text[7:]
-                    if fixed_text.startswith('```'):
-                        fixed_text = fixed_text[3:]
-                    if fixed_text.endswith('```'):
-                        fixed_text = fixed_text[:-3]
-                    fixed_text = fixed_text.strip()
-                    
-                    enriched = json.loads(fixed_text)
+                    fixed = tool_input(fix_response, stage)
+                    fixed_text = text_of(fix_response).strip()
+                    enriched = fixed if fixed is not None else loads_with_repair(fixed_text, stage_schema(stage))[0]
+                    self._record_output_path('enrich', 'llm_repair')
                     print(f">>> JSON successfully fixed and parsed on attempt {attempt}!", flush=True)
                     break
                     
@@ -1621,6 +2253,7 @@ Return the corrected JSON directly:"""
                 if attempt == max_retries - 1:
                     # Dernier essai échoué: retourner dict vide
                     print(f">>> All parsing attempts failed. Returning empty dict.", flush=True)
+                    self._record_output_path('enrich', 'failed')
                     print(f">>> Full response text:\n{response_text}", flush=True)
                     return {}
                 else:
@@ -1636,18 +2269,18 @@ Return the corrected JSON directly:"""
         # ⏱️ Calculer le temps de traitement
         processing_time = round(time.time() - start_time, 2)
         
-        # 💰 Calculer le coût (prix Claude Sonnet 4.5: $3/MTok input, $15/MTok output)
-        cost_input = (input_tokens / 1_000_000) * 3.0
-        cost_output = (output_tokens / 1_000_000) * 15.0
-        total_cost = round(cost_input + cost_output, 4)
+        # 💰 Calculer le coût (prix Claude Sonnet 4.5, lectures / écritures cache comprises)
+        total_cost = self._estimate_cost_usd(tokens)
         
-        # 📈 Ajouter les métadonnées dans le résultat
+        # 📈 Ajouter les métadonnées dans le résultat (input_tokens = tokens d'entrée hors cache)
         enriched['_metadata'] = {
             'processing_time_seconds': processing_time,
-            'input_tokens': input_tokens,
-            'output_tokens': output_tokens,
+            **tokens,
             'total_tokens': total_tokens,
-            'estimated_cost_usd': total_cost
+            'estimated_cost_usd': total_cost,
+            'structured_output': output_path_stats(),
+            'api_attempts': self.api_attempts.summary(),
+            'result_cache': {'hit': False, 'stages': result_cache_stats()}
         }
         
         print(f"✅ Enrichissement réussi!")
@@ -1668,7 +2301,8 @@ Return the corrected JSON directly:"""
             print(f"   Domaines analysés: {len(enriched.get('domaines_analyses', []))}")
         print(f"   Mots-clés en gras: {len(enriched.get('mots_cles_a_mettre_en_gras', []))}")
         print(f"   ⏱️ Temps de traitement: {processing_time}s")
-        print(f"   📊 Tokens: {total_tokens:,} ({input_tokens:,} in + {output_tokens:,} out)")
+        print(f"   📊 Tokens: {total_tokens:,} ({input_tokens:,} in + {tokens['cache_read_input_tokens']:,} cached "
+              f"+ {tokens['cache_creation_input_tokens']:,} cache write + {output_tokens:,} out)")
         print(f"   💰 Coût estimé: ${total_cost}")
         
         if enriched.get('domaines_analyses'):
@@ -2282,6 +2916,7 @@ def main():
         # MODULE 1: Extraction
         print("\n[1/5] Extraction du CV...")
         cv_text = enricher.extract_cv_text(args.cv_path)
+        jd_text = enricher.read_job_description(args.jd_path)
         print(f"      ✅ {len(cv_text)} caractères extraits")
         
         # MODULE 2: Parsing
@@ -2290,7 +2925,6 @@ def main():
         
         # MODULE 3: Enrichissement
         print("\n[3/5] Enrichissement avec IA...")
-        jd_text = enricher.read_job_description(args.jd_path)
         enriched_cv = enricher.enrich_cv_with_prompt(parsed_cv, jd_text)
         
         # MODULE 4: Mapping TMC
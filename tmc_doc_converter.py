@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+TMC DOC Converter
+Conversion des Word 97-2003 (.doc binaires) en texte via un pool de convertisseurs chauds
+"""
+
+import os
+import time
+import queue
+import socket
+import shutil
+import atexit
+import tempfile
+import threading
+import subprocess
+from typing import Tuple
+
+from tmc_cache import DiskLRUCache, default_cache_dir, file_sha256
+
+
+class DocConversionError(RuntimeError):
+    """Aucun convertisseur n'a pu produire de texte"""
+
+
+class DocConverter:
+    """
+    Convertisseur .doc → texte, backends par ordre de préférence:
+    1. antiword: natif, quelques dizaines de ms, pas d'état à maintenir
+    2. unoserver: pool de LibreOffice headless longue durée (un process par slot, gardé chaud)
+    3. soffice --convert-to: un profil LibreOffice persistant par slot (évite l'initialisation à froid)
+    Les résultats sont mis en cache par SHA-256 du fichier.
+    """
+
+    def __init__(self, slots: int = None, timeout: float = None, cache: DiskLRUCache = None):
+        """
+        Args:
+            slots: Nombre de conversions LibreOffice simultanées (défaut: TMC_DOC_CONVERTER_SLOTS ou 2)
+            timeout: Timeout d'une conversion en secondes (défaut: TMC_DOC_CONVERT_TIMEOUT ou 60)
+            cache: Cache des résultats (défaut: cache disque TMC_DOC_CACHE_MB, 64 Mo)
+        """
+        self.slots = max(1, int(slots or os.getenv('TMC_DOC_CONVERTER_SLOTS') or 2))
+        self.timeout = float(timeout or os.getenv('TMC_DOC_CONVERT_TIMEOUT') or 60)
+        if cache is None:
+            cache_mb = float(os.getenv('TMC_DOC_CACHE_MB', '64'))
+            if cache_mb > 0:
+                try:
+                    cache = DiskLRUCache(default_cache_dir('doc_conversion'), int(cache_mb * 1024 * 1024))
+                except OSError as e:
+                    print(f"⚠️ DOC conversion cache disabled: {e}", flush=True)
+        self.cache = cache
+
+        self.antiword = shutil.which('antiword')
+        self.unoconvert = shutil.which('unoconvert')
+        self.unoserver = shutil.which('unoserver')
+        self.soffice = shutil.which('soffice') or shutil.which('libreoffice')
+
+        # Slots LibreOffice: chaque slot a son profil (et son serveur unoserver le cas échéant)
+        self._slots = queue.Queue()
+        for i in range(self.slots):
+            self._slots.put(i)
+        self._servers = {}
+        self._servers_lock = threading.Lock()
+        self._profile_root = default_cache_dir('lo_profiles')
+
+    @property
+    def available(self) -> bool:
+        """Au moins un backend de conversion est installé"""
+        return bool(self.antiword or (self.unoconvert and self.unoserver) or self.soffice)
+
+    def convert_to_text(self, doc_path: str) -> Tuple[str, str]:
+        """
+        Convertir un .doc en texte.
+
+        Returns:
+            tuple: (texte, backend utilisé)
+        Raises:
+            DocConversionError: si aucun backend n'a produit de texte
+        """
+        cache_key = None
+        if self.cache:
+            cache_key = file_sha256(doc_path)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ DOC conversion cache hit ({cached['backend']})", flush=True)
+                return cached['text'], cached['backend']
+
+        errors = []
+        for backend, convert in (
+            ('antiword', self._convert_antiword if self.antiword else None),
+            ('unoserver', self._convert_unoserver if self.unoconvert and self.unoserver else None),
+            ('soffice', self._convert_soffice if self.soffice else None),
+        ):
+            if convert is None:
+                continue
+            start = time.time()
+            try:
+                text = convert(doc_path)
+            except (subprocess.SubprocessError, OSError, DocConversionError) as e:
+                errors.append(f"{backend}: {e}")
+                print(f"⚠️ DOC conversion with {backend} failed: {e}", flush=True)
+                continue
+            if text.strip():
+                print(f"✅ DOC converted with {backend} in {round((time.time() - start) * 1000)} ms", flush=True)
+                if cache_key:
+                    self.cache.set(cache_key, {'text': text, 'backend': backend})
+                return text, backend
+            errors.append(f"{backend}: empty output")
+
+        if not errors:
+            raise DocConversionError("no .doc converter installed (antiword, unoserver or LibreOffice)")
+        raise DocConversionError("; ".join(errors))
+
+    # ===== Backends =====
+
+    def _convert_antiword(self, doc_path: str) -> str:
+        """antiword: sortie UTF-8 sur stdout"""
+        result = subprocess.run(
+            [self.antiword, '-m', 'UTF-8.txt', doc_path],
+            capture_output=True,
+            timeout=self.timeout,
+            check=True
+        )
+        return result.stdout.decode('utf-8', errors='replace')
+
+    def _acquire_slot(self) -> int:
+        """Réserver un slot LibreOffice (attente bornée par le timeout de conversion)"""
+        try:
+            return self._slots.get(timeout=self.timeout)
+        except queue.Empty:
+            raise DocConversionError("all LibreOffice slots busy")
+
+    def _profile_url(self, slot: int) -> str:
+        """Profil LibreOffice persistant du slot (créé au premier usage puis réutilisé chaud)"""
+        path = os.path.join(self._profile_root, f"slot_{slot}")
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        return 'file://' + path
+
+    def _convert_unoserver(self, doc_path: str) -> str:
+        """unoconvert vers le serveur LibreOffice longue durée du slot"""
+        slot = self._acquire_slot()
+        try:
+            port = self._ensure_server(slot)
+            with tempfile.TemporaryDirectory(prefix='tmc_doc_') as tmp_dir:
+                out_path = os.path.join(tmp_dir, 'out.txt')
+                subprocess.run(
+                    [self.unoconvert, '--port', str(port), '--convert-to', 'txt', doc_path, out_path],
+                    capture_output=True,
+                    timeout=self.timeout,
+                    check=True
+                )
+                with open(out_path, 'r', encoding='utf-8', errors='replace') as f:
+                    return f.read()
+        except subprocess.TimeoutExpired:
+            # Serveur probablement bloqué: il sera relancé au prochain usage du slot
+            self._stop_server(slot)
+            raise
+        finally:
+            self._slots.put(slot)
+
+    def _convert_soffice(self, doc_path: str) -> str:
+        """soffice --convert-to avec le profil chaud du slot"""
+        slot = self._acquire_slot()
+        try:
+            with tempfile.TemporaryDirectory(prefix='tmc_doc_') as tmp_dir:
+                subprocess.run(
+                    [self.soffice, f'-env:UserInstallation={self._profile_url(slot)}',
+                     '--headless', '--norestore', '--convert-to', 'txt:Text (encoded):UTF8',
+                     '--outdir', tmp_dir, doc_path],
+                    capture_output=True,
+                    timeout=self.timeout,
+                    check=True
+                )
+                out_path = os.path.join(tmp_dir, os.path.splitext(os.path.basename(doc_path))[0] + '.txt')
+                if not os.path.exists(out_path):
+                    raise DocConversionError("soffice produced no output")
+                with open(out_path, 'r', encoding='utf-8', errors='replace') as f:
+                    return f.read()
+        finally:
+            self._slots.put(slot)
+
+    # ===== Pool unoserver =====
+
+    def _ensure_server(self, slot: int) -> int:
+        """Démarrer (une seule fois) le serveur unoserver du slot et attendre qu'il écoute"""
+        with self._servers_lock:
+            server = self._servers.get(slot)
+            if server and server['process'].poll() is None:
+                return server['port']
+
+            port = _free_port()
+            process = subprocess.Popen(
+                [self.unoserver, '--port', str(port), '--uno-port', str(_free_port()),
+                 f'--user-installation={self._profile_url(slot)}'],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            self._servers[slot] = {'process': process, 'port': port}
+
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            if process.poll() is not None:
+                raise DocConversionError(f"unoserver exited with code {process.returncode}")
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=1):
+                    print(f"🔥 unoserver slot {slot} ready on port {port}", flush=True)
+                    return port
+            except OSError:
+                time.sleep(0.2)
+        self._stop_server(slot)
+        raise DocConversionError("unoserver did not start in time")
+
+    def _stop_server(self, slot: int):
+        """Arrêter le serveur unoserver d'un slot"""
+        with self._servers_lock:
+            server = self._servers.pop(slot, None)
+        if server and server['process'].poll() is None:
+            server['process'].terminate()
+            try:
+                server['process'].wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                server['process'].kill()
+
+    def warm_up(self):
+        """
+        Démarrer les serveurs LibreOffice à l'avance (appel en arrière-plan au chargement).
+        Les slots sont pris dans la même file que les conversions: une conversion ne voit jamais un serveur
+        lancé par le warm-up mais pas encore à l'écoute. Un slot déjà occupé démarre son serveur lui-même.
+        """
+        if self.antiword or not (self.unoconvert and self.unoserver):
+            return
+        free_slots = []
+        while True:
+            try:
+                free_slots.append(self._slots.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            while free_slots:
+                slot = free_slots.pop(0)
+                try:
+                    self._ensure_server(slot)
+                except DocConversionError as e:
+                    print(f"⚠️ unoserver warm-up failed for slot {slot}: {e}", flush=True)
+                finally:
+                    self._slots.put(slot)
+        finally:
+            # Erreur inattendue: rendre aussi les slots pas encore chauffés
+            for slot in free_slots:
+                self._slots.put(slot)
+
+    def shutdown(self):
+        """Arrêter tous les serveurs du pool"""
+        for slot in list(self._servers):
+            self._stop_server(slot)
+
+
+def _free_port() -> int:
+    """Port TCP libre sur localhost"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+_DOC_CONVERTER = None
+_DOC_CONVERTER_LOCK = threading.Lock()
+
+
+def get_doc_converter() -> DocConverter:
+    """Convertisseur partagé par le process (pool chaud commun à toutes les sessions)"""
+    global _DOC_CONVERTER
+    with _DOC_CONVERTER_LOCK:
+        if _DOC_CONVERTER is None:
+            _DOC_CONVERTER = DocConverter()
+            atexit.register(_DOC_CONVERTER.shutdown)
+            threading.Thread(target=_DOC_CONVERTER.warm_up, daemon=True).start()
+        return _DOC_CONVERTER
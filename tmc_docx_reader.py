@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+TMC DOCX Reader
+Extraction DOCX en une seule passe iterparse par partie XML (sans objets python-docx)
+"""
+
+import re
+from zipfile import ZipFile
+from xml.etree import ElementTree as ET
+from typing import Dict, List, Any, Iterator
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+MC_NS = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+
+W = f'{{{W_NS}}}'
+TAG_P = f'{W}p'
+TAG_R = f'{W}r'
+TAG_T = f'{W}t'
+TAG_TAB = f'{W}tab'
+TAG_BR = f'{W}br'
+TAG_CR = f'{W}cr'
+TAG_TBL = f'{W}tbl'
+TAG_TR = f'{W}tr'
+TAG_TC = f'{W}tc'
+TAG_VMERGE = f'{W}vMerge'
+TAG_HMERGE = f'{W}hMerge'
+ATTR_VAL = f'{W}val'
+TAG_TXBX = f'{W}txbxContent'
+TAG_FALLBACK = f'{{{MC_NS}}}Fallback'
+
+HEADER_RE = re.compile(r'^word/header\d*\.xml$')
+FOOTER_RE = re.compile(r'^word/footer\d*\.xml$')
+
+# Étiquettes des sections dans le texte envoyé au LLM, par source
+SOURCE_LABELS = {
+    'header': '[EN-TÊTE]',
+    'body': '[CORPS]',
+    'footer': '[PIED DE PAGE]',
+    'note': '[NOTES]'
+}
+TEXTBOX_LABEL = '[ZONE TEXTE]'
+
+
+def _iter_part_blocks(stream, source: str) -> Iterator[Dict[str, Any]]:
+    """
+    Parcourir une partie XML WordprocessingML (document, header, footer, notes) en une passe.
+
+    Produit des blocs {'source', 'kind', 'text'} dans l'ordre du document:
+    - 'paragraph': paragraphe hors tableau / zone texte
+    - 'table_row': ligne de tableau, cellules non vides jointes par " | ". Une cellule fusionnée
+      horizontalement (w:gridSpan) n'a qu'un w:tc; les cellules de continuation (w:vMerge / w:hMerge
+      sans val="restart") sont ignorées. Deux cellules voisines de même texte sont gardées ("Python | 5 | 5").
+    - 'textbox': contenu d'une zone texte (w:txbxContent, y compris VML v:textbox)
+    Les sous-arbres mc:Fallback sont ignorés: ils dupliquent le contenu mc:Choice.
+    """
+    paragraphs = []   # pile des paragraphes ouverts (listes de fragments)
+    containers = []   # pile des conteneurs ouverts: ('cell' | 'textbox', [paragraphes])
+    rows = []         # pile des lignes de tableau ouvertes (listes de cellules)
+    merged = []       # pile des cellules ouvertes: True si continuation d'une fusion (w:tcPr)
+    run_depth = 0
+    skip_depth = 0
+
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        tag = elem.tag
+
+        # Contenu de repli (mc:Fallback) = copie VML du mc:Choice → ignoré
+        if tag == TAG_FALLBACK:
+            skip_depth += 1 if event == 'start' else -1
+            if event == 'end':
+                elem.clear()
+            continue
+        if skip_depth:
+            continue
+
+        if event == 'start':
+            if tag == TAG_P:
+                paragraphs.append([])
+            elif tag == TAG_R:
+                run_depth += 1
+            elif tag == TAG_TC:
+                containers.append(('cell', []))
+                merged.append(False)
+            elif tag == TAG_TXBX:
+                containers.append(('textbox', []))
+            elif tag == TAG_TR:
+                rows.append([])
+            continue
+
+        # event == 'end'
+        if tag == TAG_T:
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag == TAG_TAB and run_depth and paragraphs:
+            paragraphs[-1].append('\t')
+        elif tag in (TAG_BR, TAG_CR) and run_depth and paragraphs:
+            paragraphs[-1].append('\n')
+        elif tag == TAG_R:
+            run_depth -= 1
+        elif tag in (TAG_VMERGE, TAG_HMERGE) and merged:
+            merged[-1] = elem.get(ATTR_VAL, 'continue') != 'restart'
+        elif tag == TAG_P:
+            text = ''.join(paragraphs.pop()).strip() if paragraphs else ''
+            if containers:
+                if text:
+                    containers[-1][1].append(text)
+            elif text:
+                yield {'source': source, 'kind': 'paragraph', 'text': text}
+        elif tag == TAG_TXBX:
+            _, texts = containers.pop()
+            if texts:
+                yield {'source': source, 'kind': 'textbox', 'text': ' '.join(texts)}
+        elif tag == TAG_TC:
+            _, texts = containers.pop()
+            continuation = merged.pop() if merged else False
+            if rows and not continuation:
+                rows[-1].append('\n'.join(texts).strip())
+        elif tag == TAG_TR:
+            cells = rows.pop() if rows else []
+            row_text = ' | '.join(cell for cell in cells if cell)
+            if row_text:
+                if containers and containers[-1][0] == 'cell':
+                    # Tableau imbriqué: la ligne devient un paragraphe de la cellule parente
+                    containers[-1][1].append(row_text)
+                else:
+                    yield {'source': source, 'kind': 'table_row', 'text': row_text}
+
+        # Libérer la mémoire des blocs terminés de premier niveau
+        if tag in (TAG_P, TAG_TBL) and not paragraphs and not containers and not rows:
+            elem.clear()
+
+
+def iter_docx_blocks(docx_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Parcourir un .docx en une seule ouverture du zip, chaque bloc étiqueté par sa source:
+    'header' (en-têtes), 'body' (corps, ordre du document), 'footer' (pieds de page),
+    'note' (notes de bas de page et de fin).
+    Les blocs identiques hors corps (en-têtes première page / paire / défaut) ne sont produits qu'une fois.
+    """
+    with ZipFile(docx_path, 'r') as docx:
+        names = docx.namelist()
+        parts = (
+            (sorted(n for n in names if HEADER_RE.match(n)), 'header'),
+            (['word/document.xml'], 'body'),
+            (sorted(n for n in names if FOOTER_RE.match(n)), 'footer'),
+            (['word/footnotes.xml', 'word/endnotes.xml'], 'note'),
+        )
+
+        seen = set()
+        for part_names, source in parts:
+            for name in part_names:
+                if name not in names:
+                    continue
+                with docx.open(name) as stream:
+                    for block in _iter_part_blocks(stream, source):
+                        if source != 'body':
+                            if block['text'] in seen:
+                                continue
+                            seen.add(block['text'])
+                        yield block
+
+
+def extract_docx_blocks(docx_path: str) -> List[Dict[str, Any]]:
+    """Liste complète des blocs d'un .docx (voir iter_docx_blocks)"""
+    return list(iter_docx_blocks(docx_path))
+
+
+def group_blocks_by_source(blocks: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Regrouper le texte des blocs par source: {'header': [...], 'body': [...], ...}"""
+    grouped = {source: [] for source in SOURCE_LABELS}
+    for block in blocks:
+        text = block['text']
+        if block['kind'] == 'textbox':
+            text = f"{TEXTBOX_LABEL} {text}"
+        grouped.setdefault(block['source'], []).append(text)
+    return grouped
+
+
+def format_labeled_blocks(blocks: List[Dict[str, Any]]) -> str:
+    """
+    Texte compact étiqueté par source pour le prompt LLM:
+    [EN-TÊTE] / [CORPS] / [PIED DE PAGE] / [NOTES], zones textes préfixées [ZONE TEXTE].
+    Sans en-tête, pied ni notes, le corps est rendu sans étiquette.
+    """
+    grouped = group_blocks_by_source(blocks)
+    if not any(texts for source, texts in grouped.items() if source != 'body'):
+        return "\n".join(grouped['body'])
+
+    sections = []
+    for source, label in SOURCE_LABELS.items():
+        if grouped.get(source):
+            sections.append(label + "\n" + "\n".join(grouped[source]))
+    return "\n\n".join(sections)
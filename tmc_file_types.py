@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+TMC File Types
+Détection du type de document par signature binaire (magic bytes) et erreurs d'extraction typées
+"""
+
+import codecs
+from zipfile import ZipFile, BadZipFile
+from typing import Optional
+
+PDF_MAGIC = b'%PDF-'
+ZIP_MAGIC = b'PK\x03\x04'
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+RTF_MAGIC = b'{\\rtf'
+# Nom du flux principal d'un .doc dans le répertoire OLE (UTF-16LE)
+OLE_WORD_STREAM = 'WordDocument'.encode('utf-16-le')
+
+# BOM → encodage (UTF-32 avant UTF-16: même préfixe FF FE)
+TEXT_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+SNIFF_BYTES = 8192
+# Le %PDF- peut être précédé de quelques octets parasites (tolérés par les lecteurs PDF)
+PDF_HEADER_WINDOW = 1024
+# Taille max lue pour chercher le flux WordDocument dans un conteneur OLE
+OLE_SCAN_BYTES = 16 * 1024 * 1024
+
+
+class DocumentExtractionError(ValueError):
+    """Document inexploitable: levée avant tout appel API payant"""
+
+
+class UnsupportedFileTypeError(DocumentExtractionError):
+    """Le contenu du fichier ne correspond à aucun format supporté"""
+
+
+class EmptyDocumentError(DocumentExtractionError):
+    """Le fichier est lisible mais ne contient pas assez de texte exploitable"""
+
+
+def detect_text_encoding(head: bytes) -> Optional[str]:
+    """
+    Encodage d'un fichier texte d'après ses premiers octets:
+    BOM si présent, sinon 'utf-8' si valide, sinon 'cp1252' si aucun caractère de contrôle binaire.
+    None si le contenu ressemble à du binaire.
+    """
+    for bom, encoding in TEXT_BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    if b'\x00' in head:
+        return None
+
+    try:
+        head.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # Caractère multi-octets coupé en fin d'échantillon: toujours de l'UTF-8
+        if len(head) == SNIFF_BYTES and e.start >= len(head) - 3:
+            return 'utf-8'
+
+    control = sum(1 for b in head if b < 32 and b not in (9, 10, 12, 13))
+    if control > len(head) * 0.01:
+        return None
+    return 'cp1252'
+
+
+def _sniff_zip(file_path: str) -> str:
+    """OOXML Word = zip avec [Content_Types].xml et word/document.xml"""
+    try:
+        with ZipFile(file_path, 'r') as archive:
+            names = set(archive.namelist())
+    except (BadZipFile, OSError):
+        return 'unknown'
+    if '[Content_Types].xml' in names and 'word/document.xml' in names:
+        return 'docx'
+    return 'unknown'
+
+
+def _sniff_ole(file_path: str) -> str:
+    """Conteneur OLE (Word, Excel, PowerPoint 97-2003): Word seulement si le flux WordDocument existe"""
+    with open(file_path, 'rb') as f:
+        data = f.read(OLE_SCAN_BYTES)
+    return 'doc' if OLE_WORD_STREAM in data else 'unknown'
+
+
+def sniff_file_type(file_path: str) -> str:
+    """
+    Type réel d'un document d'après son contenu (l'extension est ignorée):
+    'pdf', 'docx', 'doc', 'txt', ou 'unknown' (RTF, images, autres formats Office, binaire).
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(SNIFF_BYTES)
+
+    if not head:
+        return 'unknown'
+    if PDF_MAGIC in head[:PDF_HEADER_WINDOW]:
+        return 'pdf'
+    if head.startswith(ZIP_MAGIC):
+        return _sniff_zip(file_path)
+    if head.startswith(OLE_MAGIC):
+        return _sniff_ole(file_path)
+    if head.startswith(RTF_MAGIC):
+        return 'unknown'
+    if detect_text_encoding(head):
+        return 'txt'
+    return 'unknown'
+
+
+def sniff_text_encoding(file_path: str) -> Optional[str]:
+    """Encodage probable d'un fichier texte (voir detect_text_encoding)"""
+    with open(file_path, 'rb') as f:
+        return detect_text_encoding(f.read(SNIFF_BYTES))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+TMC HTTP Client
+Clients Anthropic partagés par le process: un seul pool de connexions httpx (keep-alive, HTTP/2 si h2 est installé)
+pour toutes les sessions Streamlit et tous les enrichisseurs, au lieu d'un pool (et d'un handshake TLS) par analyse.
+Statistiques du pool: requêtes, nouvelles connexions, connexions réutilisées, handshakes TLS, requêtes HTTP/2.
+"""
+
+import os
+import asyncio
+import threading
+import weakref
+from typing import Dict, Any, Optional
+
+import httpx
+import anthropic
+
+try:
+    import h2  # noqa: F401  (httpx[http2])
+    H2_AVAILABLE = True
+except ImportError:  # HTTP/1.1 keep-alive seulement
+    H2_AVAILABLE = False
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        print(f"⚠️ Invalid {name}={os.getenv(name)!r}, using {default}", flush=True)
+        return default
+
+
+def pool_limits() -> httpx.Limits:
+    """Taille du pool (TMC_HTTP_MAX_CONNECTIONS, TMC_HTTP_KEEPALIVE_CONNECTIONS, TMC_HTTP_KEEPALIVE_EXPIRY)"""
+    return httpx.Limits(
+        max_connections=int(_env_number('TMC_HTTP_MAX_CONNECTIONS', 20)),
+        max_keepalive_connections=int(_env_number('TMC_HTTP_KEEPALIVE_CONNECTIONS', 10)),
+        keepalive_expiry=_env_number('TMC_HTTP_KEEPALIVE_EXPIRY', 60.0)
+    )
+
+
+def http2_enabled() -> bool:
+    """HTTP/2 si h2 est installé et TMC_HTTP2 != 0 (négocié par ALPN: HTTP/1.1 sur un serveur qui ne le parle pas)"""
+    return H2_AVAILABLE and os.getenv('TMC_HTTP2', '1') != '0'
+
+
+class PoolStats:
+    """
+    Compteurs du pool via l'extension 'trace' de httpcore, posée sur chaque requête par un event hook:
+    une requête sans connect_tcp a réutilisé une connexion ouverte.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.http2_requests = 0
+        self._lock = threading.Lock()
+
+    def _count(self, event_name: str):
+        with self._lock:
+            if event_name == 'connection.connect_tcp.started':
+                self.new_connections += 1
+            elif event_name == 'connection.start_tls.started':
+                self.tls_handshakes += 1
+            elif event_name.endswith('send_request_headers.started'):
+                self.requests += 1
+                self.http2_requests += event_name.startswith('http2.')
+
+    def trace(self, event_name: str, info: Dict[str, Any]):
+        self._count(event_name)
+
+    async def trace_async(self, event_name: str, info: Dict[str, Any]):
+        self._count(event_name)
+
+    def on_request(self, request: httpx.Request):
+        request.extensions['trace'] = self.trace
+
+    async def on_request_async(self, request: httpx.Request):
+        request.extensions['trace'] = self.trace_async
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': reused,
+                'reuse_rate': round(reused / self.requests, 3) if self.requests else 0.0,
+                'tls_handshakes': self.tls_handshakes,
+                'http2_requests': self.http2_requests
+            }
+
+
+_SYNC_STATS = PoolStats()
+_ASYNC_STATS = PoolStats()
+
+_HTTP_CLIENT = None
+_CLIENTS: Dict[tuple, Any] = {}
+# Clients async par boucle d'événements: un AsyncClient httpx ne peut pas servir deux boucles
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _shared_http_client() -> httpx.Client:
+    """Pool httpx sync du process (créé au premier appel, sous _CLIENTS_LOCK)"""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        limits = pool_limits()
+        _HTTP_CLIENT = anthropic.DefaultHttpxClient(
+            limits=limits, http2=http2_enabled(), event_hooks={'request': [_SYNC_STATS.on_request]}
+        )
+        print(f">>> Shared HTTP pool created (HTTP/2: {http2_enabled()}, "
+              f"max {limits.max_connections} connections, keep-alive {limits.keepalive_expiry}s)", flush=True)
+    return _HTTP_CLIENT
+
+
+def get_anthropic_client(api_key: str, base_url: Optional[str] = None) -> anthropic.Anthropic:
+    """
+    Client Anthropic partagé par le process pour (api_key, base_url), sur le pool httpx commun.
+    Retries du SDK désactivés: politique unique dans tmc_retry.
+    """
+    with _CLIENTS_LOCK:
+        key = (api_key, base_url)
+        if key not in _CLIENTS:
+            _CLIENTS[key] = anthropic.Anthropic(api_key=api_key, base_url=base_url, max_retries=0,
+                                                http_client=_shared_http_client())
+        return _CLIENTS[key]
+
+
+def get_async_anthropic_client(api_key: str, base_url: Optional[str] = None) -> anthropic.AsyncAnthropic:
+    """Client AsyncAnthropic partagé sur la boucle courante (un pool httpx async par boucle)"""
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        if 'http' not in clients:
+            clients['http'] = anthropic.DefaultAsyncHttpxClient(
+                limits=pool_limits(), http2=http2_enabled(),
+                event_hooks={'request': [_ASYNC_STATS.on_request_async]}
+            )
+        key = (api_key, base_url)
+        if key not in clients:
+            clients[key] = anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url, max_retries=0,
+                                                    http_client=clients['http'])
+        return clients[key]
+
+
+def http_pool_stats() -> Dict[str, Any]:
+    """Statistiques des pools sync et async depuis le démarrage du process"""
+    return {'http2_enabled': http2_enabled(), 'sync': _SYNC_STATS.stats(), 'async': _ASYNC_STATS.stats()}
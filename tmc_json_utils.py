@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+TMC JSON Utils
+Réparation locale des réponses JSON des étapes LLM, par paliers, avant tout appel payant de correction:
+parsing strict → json_repair → complétion d'un JSON tronqué → validation du schéma
+"""
+
+import re
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import json_repair
+
+from tmc_structured_output import coerce_scalars, schema_errors
+
+# Paliers locaux, dans l'ordre (nom enregistré dans les compteurs de tmc_structured_output)
+REPAIR_TIERS = ('strict', 'json_repair', 'completion')
+
+_PARTIAL_LITERAL_RE = re.compile(r'([\[:,]\s*)[A-Za-z][A-Za-z]*$')
+# Élément de tableau ouvert sans contenu ("[{...}, {")
+_OPENED_ELEMENT_RE = re.compile(r'([\[,]\s*)[{\[]$')
+# Nombre coupé avant d'être valide ("1.", "-", "2e", "3e+")
+_PARTIAL_NUMBER_RE = re.compile(r'([\[:,]\s*)-?\d*(?:\.\d*)?(?:[eE][+-]?)?(?<=[-+.eE])$')
+_DANGLING_KEY_RE = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+
+
+def strip_code_fences(text: str) -> str:
+    """Retirer les balises ```json ... ``` autour d'une réponse"""
+    text = text.strip()
+    if text.startswith('```json'):
+        text = text[7:]
+    if text.startswith('```'):
+        text = text[3:]
+    if text.endswith('```'):
+        text = text[:-3]
+    return text.strip()
+
+
+def _scan(text: str):
+    """(fermetures attendues, chaîne encore ouverte, début de la dernière chaîne) d'un JSON partiel"""
+    stack = []
+    in_string = escape = False
+    string_start = 0
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            string_start = index
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+    return stack, in_string, string_start
+
+
+def complete_truncated(text: str) -> str:
+    """
+    Fermer un JSON coupé en cours de génération (max_tokens, connexion perdue):
+    chaîne ouverte, littéral ou nombre partiel, clé orpheline, élément de tableau à peine ouvert
+    et virgule finale retirés, puis ] et } manquants ajoutés.
+    La dernière valeur incomplète est abandonnée plutôt qu'inventée ('{"a": 1, "b": "hel' → '{"a": 1}');
+    un objet déjà commencé garde ses paires complètes (le schéma décide s'il est exploitable).
+    """
+    stack, in_string, string_start = _scan(text)
+    # Chaîne coupée (valeur ou clé): abandonnée entière
+    completed = text[:string_start] if in_string else text
+
+    # Nettoyer la fin jusqu'à stabilité: littéral partiel (tru, nul), nombre partiel (1.), clé sans valeur,
+    # élément de tableau ouvert sans contenu, virgule ou deux-points final
+    previous = None
+    while completed != previous:
+        previous = completed
+        completed = completed.rstrip()
+        completed = _PARTIAL_LITERAL_RE.sub(r'\1', completed).rstrip()
+        completed = _PARTIAL_NUMBER_RE.sub(r'\1', completed).rstrip()
+        completed = _OPENED_ELEMENT_RE.sub(r'\1', completed).rstrip()
+        stack = _scan(completed)[0]
+        if stack and stack[-1] == '}':
+            completed = _DANGLING_KEY_RE.sub(lambda m: '' if m.group(1) == ',' else m.group(1), completed)
+        completed = completed.rstrip().rstrip(',:').rstrip()
+    return completed + ''.join(reversed(_scan(completed)[0]))
+
+
+def _candidates(text: str):
+    """Paliers locaux: (nom, fonction texte → objet)"""
+    yield 'strict', json.loads
+    yield 'json_repair', json_repair.loads
+    yield 'completion', lambda t: json.loads(complete_truncated(t))
+
+
+def loads_with_repair(text: str, schema: Optional[Dict[str, Any]] = None) -> Tuple[Any, str]:
+    """
+    Parser une réponse JSON avec les paliers locaux; le premier résultat qui est un objet
+    conforme au schéma (si fourni, scalaires convertis au type attendu) est retenu.
+
+    Returns:
+        tuple: (objet, palier) avec palier dans REPAIR_TIERS
+
+    Raises:
+        json.JSONDecodeError: aucun palier n'a produit de JSON conforme (erreur du parsing strict)
+                              → l'appelant peut escalader vers une réparation LLM
+    """
+    text = strip_code_fences(text)
+    strict_error = None
+    for tier, loads in _candidates(text):
+        try:
+            data = loads(text)
+        except (json.JSONDecodeError, ValueError, RecursionError) as e:
+            if tier == 'strict':
+                strict_error = e
+            continue
+        if not isinstance(data, dict):
+            continue
+        if schema:
+            data = coerce_scalars(data, schema)
+        errors = schema_errors(data, schema) if schema else []
+        if errors:
+            print(f"⚠️ JSON {tier}: schema mismatch ({'; '.join(errors[:3])})", flush=True)
+            continue
+        if tier != 'strict':
+            print(f"🔧 JSON repaired locally ({tier})", flush=True)
+        return data, tier
+
+    if isinstance(strict_error, json.JSONDecodeError):
+        raise strict_error
+    raise json.JSONDecodeError("No local repair produced a valid object", text, 0)
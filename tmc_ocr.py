@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+TMC OCR Engine
+OCR parallèle page par page pour les PDF scannés (pdf2image + pytesseract)
+"""
+
+import os
+import math
+import hashlib
+import tempfile
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Any
+
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
+import pytesseract
+
+from tmc_cache import DiskLRUCache, default_cache_dir, file_sha256
+from tmc_ocr_preprocess import preprocess_page
+from tmc_text_normalizer import detect_language
+
+
+# Mode langue 'auto': première page en bilingue, pages suivantes avec le seul modèle détecté
+DUAL_LANG = 'eng+fra'
+TESSERACT_LANGS = {'fr': 'fra', 'en': 'eng'}
+
+
+# Pool de processus partagé (réutilisé entre les appels pour éviter le coût de démarrage)
+_POOL = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def _init_ocr_worker():
+    """Initialiser un worker OCR: tesseract mono-thread (le parallélisme est géré par le pool)"""
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Retourner le pool partagé, le (re)créer si nécessaire"""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            # spawn: pas de fork d'un process Streamlit multi-threadé
+            _POOL = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_ocr_worker
+            )
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def _reset_pool():
+    """Abandonner le pool courant (ex: BrokenProcessPool après un crash de worker)"""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+        _POOL_WORKERS = 0
+
+
+def _recycle_pool(pool: ProcessPoolExecutor):
+    """
+    Tuer les workers d'un pool dont des pages ont dépassé l'échéance: une tâche déjà en cours ne s'annule pas
+    (Future.cancel sans effet), elle garderait sa place et ferait attendre l'OCR suivant.
+    Le prochain _get_pool crée un pool neuf.
+    """
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+            _POOL_WORKERS = 0
+    for process in list((getattr(pool, '_processes', None) or {}).values()):
+        try:
+            process.kill()
+        except Exception:
+            pass
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Cache OCR par page, un par process (les workers spawn ouvrent le même dossier disque)
+_PAGE_CACHES = {}
+
+
+def _get_page_cache(options: Dict[str, Any]):
+    """Cache disque des pages déjà reconnues (None si désactivé ou inaccessible)"""
+    if not options.get('page_cache_bytes'):
+        return None
+    key = (options['page_cache_dir'], options['page_cache_bytes'])
+    if key not in _PAGE_CACHES:
+        try:
+            _PAGE_CACHES[key] = DiskLRUCache(options['page_cache_dir'], options['page_cache_bytes'])
+        except OSError as e:
+            print(f"⚠️ OCR page cache disabled: {e}", flush=True)
+            _PAGE_CACHES[key] = None
+    return _PAGE_CACHES[key]
+
+
+def _bitmap_digest(source) -> str:
+    """
+    SHA-256 exact du bitmap rasterisé (fichier ppm ou pixels PIL).
+    Une même page scannée rendue à la même résolution donne le même bitmap, quel que soit le PDF qui la contient.
+    """
+    if isinstance(source, str):
+        return file_sha256(source)
+    digest = hashlib.sha256(f"{source.mode}:{source.size}:".encode())
+    digest.update(source.tobytes())
+    return digest.hexdigest()
+
+
+def _preprocessed(source, dpi: int):
+    """Page prête pour tesseract: image prétraitée (voir tmc_ocr_preprocess) depuis une image PIL ou un fichier"""
+    if isinstance(source, str):
+        with Image.open(source) as image:
+            return preprocess_page(image, dpi)[0]
+    return preprocess_page(source, dpi)[0]
+
+
+def _recognize_cached(source, options: Dict[str, Any], with_confidence: bool, dpi: int, config: str = None):
+    """
+    OCR d'une page via le cache par bitmap: clé = hash du bitmap brut + langue + configuration tesseract
+    + prétraitement. Le prétraitement n'est fait qu'en cas de miss.
+
+    Returns:
+        tuple: (texte, confiance ou None, servi depuis le cache?)
+    """
+    cache = _get_page_cache(options)
+    config = config or (options['fast_config'] if with_confidence else options['config'])
+    cache_key = None
+    if cache:
+        try:
+            mode = 'data' if with_confidence else 'string'
+            preprocess = 'pre' if options['preprocess'] else 'raw'
+            cache_key = hashlib.sha256(
+                f"{_bitmap_digest(source)}:{options['lang']}:{config}:{mode}:{preprocess}".encode()
+            ).hexdigest()
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached['text'], cached.get('confidence'), True
+        except (OSError, KeyError):
+            cache_key = None
+
+    if options['preprocess']:
+        source = _preprocessed(source, dpi)
+
+    if with_confidence:
+        text, confidence = _recognize_with_confidence(source, options, config)
+    else:
+        text, confidence = _recognize(source, options), None
+
+    if cache_key:
+        cache.set(cache_key, {'text': text, 'confidence': confidence})
+    return text, confidence, False
+
+
+def _page_windows(page_numbers: List[int], window: int) -> List[List[int]]:
+    """Découper les pages en fenêtres contiguës d'au plus `window` pages"""
+    windows = []
+    for n in page_numbers:
+        if windows and n == windows[-1][-1] + 1 and len(windows[-1]) < window:
+            windows[-1].append(n)
+        else:
+            windows.append([n])
+    return windows
+
+
+def _recognize(image, options: Dict[str, Any]) -> str:
+    """OCR d'une image PIL ou d'un chemin de fichier image (lu directement par tesseract)"""
+    return pytesseract.image_to_string(
+        image,
+        lang=options['lang'],
+        config=options['config'],
+        timeout=options['page_timeout']
+    )
+
+
+def _recognize_with_confidence(image, options: Dict[str, Any], config: str = None):
+    """
+    OCR avec image_to_data: texte reconstruit ligne par ligne + confiance moyenne des mots.
+    Par défaut sans OSD (PSM 3, fast_config) pour la première passe basse résolution.
+
+    Returns:
+        tuple: (texte, confiance moyenne 0-100)
+    """
+    data = pytesseract.image_to_data(
+        image,
+        lang=options['lang'],
+        config=config or options['fast_config'],
+        output_type=pytesseract.Output.DICT,
+        timeout=options['page_timeout']
+    )
+
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data['text']):
+        conf = float(data['conf'][i])
+        if conf < 0 or not word.strip():
+            continue
+        confidences.append(conf)
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(key, []).append(word)
+
+    text_parts = []
+    previous_par = None
+    for (block, par, line), words in lines.items():
+        if previous_par is not None and (block, par) != previous_par:
+            text_parts.append('')
+        text_parts.append(' '.join(words))
+        previous_par = (block, par)
+
+    confidence = sum(confidences) / len(confidences) if confidences else 0.0
+    return "\n".join(text_parts), confidence
+
+
+def _iter_rendered_pages(file_path: str, pages: List[int], dpi: int, options: Dict[str, Any]):
+    """
+    Rasteriser une fenêtre de pages contiguës et les produire une à une: (page, image ou chemin).
+    Chaque page est libérée dès que le consommateur passe à la suivante.
+
+    Mode streaming: pages rendues sur disque (paths_only) et lues par tesseract,
+    chaque fichier est supprimé après usage → aucun bitmap décodé en mémoire.
+    """
+    timeout = options['page_timeout'] * len(pages)
+
+    if options['streaming']:
+        with tempfile.TemporaryDirectory(prefix='tmc_ocr_') as tmp_dir:
+            # ppm: non compressé → le plus rapide à écrire et à relire, supprimé aussitôt
+            paths = convert_from_path(
+                file_path,
+                dpi=dpi,
+                fmt='ppm',
+                first_page=pages[0],
+                last_page=pages[-1],
+                output_folder=tmp_dir,
+                paths_only=True,
+                timeout=timeout
+            )
+            paths = sorted(paths)
+            for i, page_num in enumerate(pages):
+                if i >= len(paths):
+                    yield page_num, None
+                    continue
+                try:
+                    yield page_num, paths[i]
+                finally:
+                    os.remove(paths[i])
+    else:
+        images = convert_from_path(
+            file_path,
+            dpi=dpi,
+            fmt='jpeg',
+            first_page=pages[0],
+            last_page=pages[-1],
+            timeout=timeout
+        )
+        for i, page_num in enumerate(pages):
+            if i >= len(images):
+                yield page_num, None
+                continue
+            try:
+                yield page_num, images[i]
+            finally:
+                images[i].close()
+                images[i] = None
+
+
+def ocr_window(file_path: str, pages: List[int], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Rasteriser une fenêtre de pages contiguës puis la passer à tesseract.
+    Exécuté dans un worker du pool: ne retourne que du texte (pas d'image à sérialiser).
+
+    Mode adaptatif: première passe à basse résolution (low_dpi), seules les pages
+    dont la confiance moyenne est sous min_confidence sont refaites à pleine résolution.
+
+    Langue auto (fallback_lang défini): chaque page est reconnue avec le modèle détecté,
+    puis refaite avec fallback_lang si la confiance est sous min_confidence.
+
+    Chaque page passe par le cache par bitmap: une page déjà reconnue (même dans un autre PDF)
+    n'est que rasterisée, pas relue par tesseract.
+
+    Returns:
+        list: [{'page', 'text', 'dpi', 'confidence', 'lang', 'cache_hit', 'error'}] pour chaque page de la fenêtre
+    """
+    results = {
+        n: {'page': n, 'text': '', 'dpi': options['dpi'], 'confidence': None, 'lang': options['lang'],
+            'cache_hit': False, 'error': None}
+        for n in pages
+    }
+    adaptive = options['adaptive']
+    fallback_lang = options.get('fallback_lang')
+    retry_pages = []
+
+    try:
+        first_dpi = options['low_dpi'] if adaptive else options['dpi']
+        for page_num, source in _iter_rendered_pages(file_path, pages, first_dpi, options):
+            result = results[page_num]
+            if source is None:
+                result['error'] = 'no image rendered'
+                continue
+            try:
+                if adaptive:
+                    text, confidence, hit = _recognize_cached(source, options, with_confidence=True, dpi=first_dpi)
+                    result.update(text=text, dpi=first_dpi, confidence=round(confidence, 1), cache_hit=hit)
+                    if confidence < options['min_confidence']:
+                        retry_pages.append(page_num)
+                elif fallback_lang:
+                    text, confidence, hit = _recognize_cached(
+                        source, options, with_confidence=True, dpi=first_dpi, config=options['config']
+                    )
+                    if confidence < options['min_confidence']:
+                        dual_options = dict(options, lang=fallback_lang)
+                        dual_text, dual_confidence, dual_hit = _recognize_cached(
+                            source, dual_options, with_confidence=True, dpi=first_dpi, config=options['config']
+                        )
+                        if dual_confidence >= confidence:
+                            text, confidence, hit = dual_text, dual_confidence, dual_hit
+                            result['lang'] = fallback_lang
+                    result.update(text=text, confidence=round(confidence, 1), cache_hit=hit)
+                else:
+                    result['text'], _, result['cache_hit'] = _recognize_cached(
+                        source, options, with_confidence=False, dpi=first_dpi
+                    )
+            except Exception as e:
+                result['error'] = f"{type(e).__name__}: {e}"
+
+        # Deuxième passe pleine résolution, uniquement pour les pages peu fiables
+        # (avec le modèle bilingue en langue auto: la faible confiance peut venir de la langue)
+        retry_options = dict(options, lang=fallback_lang) if fallback_lang else options
+        for page_num in retry_pages:
+            result = results[page_num]
+            for _, source in _iter_rendered_pages(file_path, [page_num], options['dpi'], options):
+                if source is None:
+                    continue
+                try:
+                    text, _, hit = _recognize_cached(
+                        source, retry_options, with_confidence=False, dpi=options['dpi']
+                    )
+                    result.update(text=text, dpi=options['dpi'], lang=retry_options['lang'], cache_hit=hit)
+                except Exception as e:
+                    # On garde le texte basse résolution plutôt que rien
+                    print(f"  ⚠️ Page {page_num}: {options['dpi']} DPI retry failed ({e})", flush=True)
+    except Exception as e:
+        for result in results.values():
+            result['error'] = result['error'] or f"{type(e).__name__}: {e}"
+
+    return [results[n] for n in pages]
+
+
+def _ocr_setting(value, env: str, default, cast, positive: bool = False):
+    """
+    Réglage OCR: argument explicite, sinon variable d'environnement, sinon défaut.
+    Tester None et non la valeur: 0 est un réglage valide (ex. TMC_OCR_MIN_CONFIDENCE=0).
+    """
+    source = "variable d'environnement"
+    if value is None:
+        value = os.getenv(env)
+        if value is None or value == '':
+            value, source = default, 'défaut'
+    else:
+        source = 'argument'
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"❌ Réglage OCR invalide pour {env} ({source}): {value!r}")
+    if positive and value <= 0:
+        raise ValueError(f"❌ {env} doit être strictement positif ({source}): {value!r}")
+    return value
+
+
+def count_pdf_pages(file_path: str) -> int:
+    """Nombre de pages du PDF (pdfinfo, fallback PyPDF2)"""
+    try:
+        return int(pdfinfo_from_path(file_path)['Pages'])
+    except Exception:
+        import PyPDF2
+        with open(file_path, 'rb') as f:
+            return len(PyPDF2.PdfReader(f).pages)
+
+
+class OCREngine:
+    """Moteur OCR: rasterisation + reconnaissance des pages en parallèle (pool de processus)"""
+
+    def __init__(self, workers: int = None, page_timeout: float = None,
+                 streaming: bool = None, window: int = None,
+                 adaptive: bool = None, min_confidence: float = None, low_dpi: int = None,
+                 page_cache_mb: float = None, preprocess: bool = None, dpi: int = 300, lang: str = None,
+                 config: str = '--psm 1 --oem 3'):
+        """
+        Args:
+            workers: Nombre de processus OCR (défaut: TMC_OCR_WORKERS ou min(4, nb CPU))
+            page_timeout: Timeout par page en secondes, rasterisation et OCR (défaut: TMC_OCR_PAGE_TIMEOUT ou 120)
+            streaming: Rasteriser sur disque page par page au lieu de garder les bitmaps en mémoire
+                       (défaut: TMC_OCR_STREAMING, activé sauf si "0")
+            window: Nombre de pages rasterisées par appel poppler en mode série (défaut: TMC_OCR_WINDOW ou 2)
+            adaptive: Première passe basse résolution, pleine résolution seulement si confiance insuffisante
+                      (défaut: TMC_OCR_ADAPTIVE, désactivé sauf si "1")
+            min_confidence: Confiance moyenne minimale (0-100) pour garder la passe basse résolution
+                            (défaut: TMC_OCR_MIN_CONFIDENCE ou 75)
+            low_dpi: Résolution de la première passe adaptative (défaut: TMC_OCR_LOW_DPI ou 150)
+            page_cache_mb: Taille max du cache OCR par bitmap de page, 0 pour désactiver
+                           (défaut: TMC_OCR_CACHE_MB ou 128)
+            preprocess: Niveaux de gris, redressement, binarisation adaptative et recadrage avant tesseract
+                        (défaut: TMC_OCR_PREPROCESS, désactivé sauf si "1")
+            dpi: Résolution de rasterisation
+            lang: Modèles tesseract, ou 'auto': première page en anglais + français, pages suivantes
+                  avec le seul modèle de la langue détectée (défaut: TMC_OCR_LANG ou 'eng+fra')
+            config: PSM 1 = automatic page segmentation with OSD
+        """
+        self.workers = _ocr_setting(workers, 'TMC_OCR_WORKERS', min(4, os.cpu_count() or 1), int, positive=True)
+        self.page_timeout = _ocr_setting(page_timeout, 'TMC_OCR_PAGE_TIMEOUT', 120, float, positive=True)
+        if streaming is None:
+            streaming = os.getenv('TMC_OCR_STREAMING', '1') != '0'
+        self.streaming = streaming
+        self.window = max(1, _ocr_setting(window, 'TMC_OCR_WINDOW', 2, int))
+        if adaptive is None:
+            adaptive = os.getenv('TMC_OCR_ADAPTIVE', '0') == '1'
+        self.adaptive = adaptive
+        self.min_confidence = _ocr_setting(min_confidence, 'TMC_OCR_MIN_CONFIDENCE', 75, float)
+        self.low_dpi = _ocr_setting(low_dpi, 'TMC_OCR_LOW_DPI', 150, int, positive=True)
+        if dpi is None or dpi <= 0:
+            raise ValueError(f"❌ Résolution OCR invalide (dpi): {dpi!r}")
+        self.dpi = dpi
+        self.lang = lang or os.getenv('TMC_OCR_LANG') or DUAL_LANG
+        self.config = config
+        self.fast_config = '--psm 3 --oem 3'
+        
+        if preprocess is None:
+            preprocess = os.getenv('TMC_OCR_PREPROCESS', '0') == '1'
+        self.preprocess = preprocess
+        
+        if page_cache_mb is None:
+            page_cache_mb = float(os.getenv('TMC_OCR_CACHE_MB', '128'))
+        self.page_cache_bytes = int(page_cache_mb * 1024 * 1024) if page_cache_mb > 0 else 0
+        self.page_cache_dir = default_cache_dir('ocr_pages')
+        # Compteurs du cache par page depuis la création du moteur
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # Langue détectée lors du dernier OCR en mode 'auto' ('fr', 'en' ou None)
+        self.detected_language = None
+        
+        # Résolution retenue par page lors du dernier OCR: [{'page', 'dpi', 'confidence'}]
+        self.last_dpi_report = []
+
+    def _options(self) -> Dict[str, Any]:
+        """Options transmises aux workers"""
+        return {
+            'dpi': self.dpi,
+            'lang': DUAL_LANG if self.lang == 'auto' else self.lang,
+            'config': self.config,
+            'page_timeout': self.page_timeout,
+            'streaming': self.streaming,
+            'adaptive': self.adaptive,
+            'low_dpi': self.low_dpi,
+            'min_confidence': self.min_confidence,
+            'fast_config': self.fast_config,
+            'preprocess': self.preprocess,
+            'page_cache_dir': self.page_cache_dir,
+            'page_cache_bytes': self.page_cache_bytes
+        }
+
+    def output_signature(self) -> Dict[str, Any]:
+        """Options qui changent le texte reconnu (clé du cache d'extraction): langue, config, DPI, prétraitement"""
+        return {
+            'lang': self.lang,
+            'config': self.config,
+            'fast_config': self.fast_config,
+            'dpi': self.dpi,
+            'adaptive': self.adaptive,
+            'low_dpi': self.low_dpi if self.adaptive else None,
+            'min_confidence': self.min_confidence if self.adaptive else None,
+            'preprocess': self.preprocess
+        }
+
+    def ocr_pages(self, file_path: str, page_numbers: List[int] = None) -> List[Dict[str, Any]]:
+        """
+        OCR des pages demandées (toutes par défaut), résultats triés par numéro de page.
+        """
+        if page_numbers is None:
+            page_numbers = list(range(1, count_pdf_pages(file_path) + 1))
+        if not page_numbers:
+            return []
+
+        options = self._options()
+        self.detected_language = None
+        if self.lang == 'auto':
+            results = self._run_auto_language(file_path, page_numbers, options)
+        else:
+            results = self._run(file_path, page_numbers, options)
+
+        results = sorted(results, key=lambda r: r['page'])
+        self.last_dpi_report = [
+            {'page': r['page'], 'dpi': r['dpi'], 'confidence': r.get('confidence')}
+            for r in results if not r['error']
+        ]
+        if self.page_cache_bytes:
+            recognized = [r for r in results if not r['error']]
+            hits = sum(1 for r in recognized if r.get('cache_hit'))
+            self.cache_hits += hits
+            self.cache_misses += len(recognized) - hits
+            if recognized:
+                print(f"  🗂️ OCR page cache: {hits}/{len(recognized)} pages served from cache "
+                      f"(session hit rate {self.cache_stats()['hit_rate']:.0%})", flush=True)
+        if self.lang == 'auto':
+            dual = sum(1 for r in results[1:] if not r['error'] and r.get('lang') == DUAL_LANG)
+            if dual and self.detected_language:
+                print(f"  🌐 {dual} page(s) fell back to {DUAL_LANG} (low confidence)", flush=True)
+        if self.adaptive and self.last_dpi_report:
+            high = sum(1 for r in self.last_dpi_report if r['dpi'] == self.dpi)
+            print(f"  📐 Adaptive OCR: {len(self.last_dpi_report) - high} pages at {self.low_dpi} DPI, "
+                  f"{high} re-run at {self.dpi} DPI", flush=True)
+        return results
+
+    def _run(self, file_path: str, page_numbers: List[int], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """OCR en série ou dans le pool selon le nombre de pages"""
+        workers = min(self.workers, len(page_numbers))
+        if workers <= 1:
+            return self._run_serial(file_path, page_numbers, options)
+        try:
+            return self._run_parallel(file_path, page_numbers, options, workers)
+        except BrokenProcessPool as e:
+            print(f"⚠️ OCR pool broken ({e}), falling back to serial OCR", flush=True)
+            _reset_pool()
+            return self._run_serial(file_path, page_numbers, options)
+
+    def _run_auto_language(self, file_path: str, page_numbers: List[int],
+                           options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Langue 'auto': première page avec le modèle bilingue, détection de la langue sur son texte,
+        puis pages suivantes avec le seul modèle détecté (repli bilingue par page si la confiance baisse).
+        Langue indéterminée (CV bilingue, page vide) → modèle bilingue pour tout le document.
+        """
+        results = self._run(file_path, page_numbers[:1], options)
+        self.detected_language = detect_language(results[0]['text'])
+        single_lang = TESSERACT_LANGS.get(self.detected_language)
+        print(f"  🌐 OCR language: {self.detected_language or 'undetermined'} "
+              f"→ {single_lang or DUAL_LANG} for the remaining pages", flush=True)
+
+        if page_numbers[1:]:
+            if single_lang:
+                options = dict(options, lang=single_lang, fallback_lang=DUAL_LANG)
+            results += self._run(file_path, page_numbers[1:], options)
+        return results
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Compteurs du cache OCR par page (mêmes clés que DiskLRUCache.stats)"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': round(self.cache_hits / lookups, 3) if lookups else 0.0
+        }
+
+    def _run_serial(self, file_path: str, page_numbers: List[int], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """OCR dans le process courant, fenêtre par fenêtre (mémoire bornée par la fenêtre)"""
+        results = []
+        for pages in _page_windows(page_numbers, self.window):
+            print(f"  🔎 OCR processing pages {pages[0]}-{pages[-1]}...", flush=True)
+            for result in ocr_window(file_path, pages, options):
+                self._log_page(result)
+                results.append(result)
+        return results
+
+    def _run_parallel(self, file_path: str, page_numbers: List[int],
+                      options: Dict[str, Any], workers: int) -> List[Dict[str, Any]]:
+        """OCR des pages en parallèle dans le pool partagé (une page par tâche)"""
+        print(f"  ⚡ OCR of {len(page_numbers)} pages on {workers} workers...", flush=True)
+        pool = _get_pool(self.workers)
+        futures = {n: pool.submit(ocr_window, file_path, [n], options) for n in page_numbers}
+
+        # Garde-fou global, une seule échéance pour tout le document: chaque page est bornée par page_timeout
+        # dans le worker (rasterisation + tesseract), les pages passent par vagues de `workers`
+        waves = math.ceil(len(page_numbers) / workers)
+        done, pending = wait(futures.values(), timeout=options['page_timeout'] * 2 * waves + 30)
+        if pending:
+            print(f"⚠️ OCR: {len(pending)} page(s) past the deadline, recycling the OCR pool", flush=True)
+            _recycle_pool(pool)
+
+        results = []
+        for page_num, future in futures.items():
+            if future in done:
+                result = future.result()[0]
+            else:
+                result = {'page': page_num, 'text': '', 'dpi': options['dpi'], 'confidence': None,
+                          'lang': options['lang'], 'cache_hit': False, 'error': 'timeout'}
+            self._log_page(result)
+            results.append(result)
+        return results
+
+    def _log_page(self, result: Dict[str, Any]):
+        """Log d'une page traitée"""
+        if result['error']:
+            print(f"  ❌ Page {result['page']}: OCR failed ({result['error']})", flush=True)
+        elif result.get('cache_hit'):
+            print(f"  ✓ Page {result['page']}: {len(result['text'])} chars (OCR cache)", flush=True)
+        elif result.get('confidence') is not None:
+            print(f"  ✓ Page {result['page']}: {len(result['text'])} chars extracted "
+                  f"({result['dpi']} DPI, confidence {result['confidence']})", flush=True)
+        else:
+            print(f"  ✓ Page {result['page']}: {len(result['text'])} chars extracted", flush=True)
+
+    def extract_text(self, file_path: str, page_numbers: List[int] = None) -> str:
+        """OCR du PDF, texte au format '--- Page N ---' (pages vides ignorées)"""
+        all_text = []
+        for result in self.ocr_pages(file_path, page_numbers):
+            if result['text'].strip():
+                all_text.append(f"--- Page {result['page']} ---\n{result['text']}")
+        return "\n\n".join(all_text)
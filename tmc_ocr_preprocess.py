@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+TMC OCR Preprocess
+Préparation des pages avant tesseract (Pillow uniquement): niveaux de gris, redressement,
+binarisation adaptative et recadrage des marges
+"""
+
+from typing import Dict, Any, Tuple
+
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+# Redressement: angles testés dans [-MAX_SKEW, +MAX_SKEW], correction appliquée au-delà de MIN_SKEW
+MAX_SKEW = 5.0
+MIN_SKEW = 0.3
+# Largeur de l'image réduite utilisée pour estimer l'angle et le cadre du texte
+ANALYSIS_WIDTH = 800
+# Un pixel est de l'encre s'il est plus sombre que la moyenne locale d'au moins THRESHOLD_OFFSET niveaux
+THRESHOLD_OFFSET = 10
+
+
+def adaptive_threshold(gray: Image.Image, radius: int, offset: int = THRESHOLD_OFFSET) -> Image.Image:
+    """
+    Binarisation par moyenne locale (fond coloré, éclairage inégal des photos):
+    noir si le pixel est plus sombre que la moyenne de son voisinage de plus de `offset`.
+
+    Returns:
+        Image mode 'L': texte 0, fond 255
+    """
+    local_mean = gray.filter(ImageFilter.BoxBlur(radius))
+    darker = ImageChops.subtract(local_mean, gray)
+    return darker.point(lambda v: 0 if v > offset else 255)
+
+
+def _ink_mask(gray: Image.Image) -> Image.Image:
+    """Encre en blanc sur fond noir (pour les sommes par ligne et getbbox)"""
+    radius = max(4, gray.width // 60)
+    return ImageOps.invert(adaptive_threshold(gray, radius))
+
+
+def _row_profile_score(ink: Image.Image, angle: float) -> float:
+    """Somme des carrés des densités d'encre par ligne: maximale quand les lignes de texte sont horizontales"""
+    rotated = ink.rotate(angle, resample=Image.NEAREST, fillcolor=0)
+    rows = rotated.resize((1, rotated.height), Image.BOX).getdata()
+    return float(sum(v * v for v in rows))
+
+
+def estimate_skew(gray: Image.Image, max_angle: float = MAX_SKEW) -> float:
+    """
+    Angle (degrés, sens trigonométrique de Image.rotate) qui remet les lignes de texte à l'horizontale.
+    Profil de projection sur une version réduite: pas de 1° puis affinage à 0.1°.
+    """
+    scale = ANALYSIS_WIDTH / gray.width if gray.width > ANALYSIS_WIDTH else 1.0
+    small = gray.resize((max(1, int(gray.width * scale)), max(1, int(gray.height * scale))), Image.BILINEAR)
+    ink = _ink_mask(small)
+    bbox = ink.getbbox()
+    if not bbox:
+        return 0.0
+    ink = ink.crop(bbox)
+
+    steps = int(max_angle)
+    best = max(range(-steps, steps + 1), key=lambda a: _row_profile_score(ink, a))
+    fine = [round(best + i * 0.1, 1) for i in range(-5, 6)]
+    return max(fine, key=lambda a: _row_profile_score(ink, a))
+
+
+def _text_bbox(binary: Image.Image, margin: int) -> Tuple[int, int, int, int]:
+    """Cadre du texte (taches isolées ignorées) élargi de `margin` pixels, borné à l'image"""
+    scale = ANALYSIS_WIDTH / binary.width if binary.width > ANALYSIS_WIDTH else 1.0
+    small = ImageOps.invert(binary).resize(
+        (max(1, int(binary.width * scale)), max(1, int(binary.height * scale))), Image.BOX
+    )
+    # Filtre médian: poussières et bords de numérisation ne comptent pas comme du texte
+    bbox = small.point(lambda v: 255 if v > 64 else 0).filter(ImageFilter.MedianFilter(3)).getbbox()
+    if not bbox:
+        return 0, 0, binary.width, binary.height
+    left, top, right, bottom = (int(c / scale) for c in bbox)
+    return (max(0, left - margin), max(0, top - margin),
+            min(binary.width, right + margin), min(binary.height, bottom + margin))
+
+
+def preprocess_page(image: Image.Image, dpi: int) -> Tuple[Image.Image, Dict[str, Any]]:
+    """
+    Préparer une page rasterisée pour tesseract:
+    1. Niveaux de gris
+    2. Binarisation adaptative (fenêtre ≈ 1/20 de pouce de rayon)
+    3. Redressement si l'inclinaison dépasse MIN_SKEW (au plus MAX_SKEW)
+    4. Recadrage des marges blanches (0.1 pouce de marge conservée)
+
+    Returns:
+        tuple: (image mode '1', {'skew', 'crop'} pour les logs et le benchmark)
+    """
+    gray = image.convert('L')
+    binary = adaptive_threshold(gray, radius=max(8, dpi // 20))
+
+    # Rotation après binarisation: les coins ajoutés sont blancs comme le fond, sans bord artificiel
+    angle = estimate_skew(gray)
+    if abs(angle) >= MIN_SKEW:
+        binary = binary.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+        binary = binary.point(lambda v: 0 if v < 128 else 255)
+    else:
+        angle = 0.0
+
+    crop = _text_bbox(binary, margin=max(10, dpi // 10))
+    binary = binary.crop(crop)
+
+    # Mode '1': fichier temporaire de pytesseract bien plus petit qu'en RGB
+    return binary.convert('1', dither=Image.Dither.NONE), {'skew': angle, 'crop': crop}
@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+"""
+TMC PDF Text
+Backends d'extraction de la couche texte PDF (page par page):
+- 'layout': interpréteur de content stream léger, positions des glyphes → détection des colonnes
+  et ordre de lecture (CV deux colonnes remis dans l'ordre avant le LLM)
+- 'pypdf2': PyPDF2.PageObject.extract_text() (ordre du flux, repli)
+"""
+
+import os
+import re
+import math
+import struct
+from itertools import accumulate, repeat
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+try:
+    from PyPDF2._cmap import build_char_map
+except ImportError:  # API interne PyPDF2: le backend 'layout' se replie alors sur extract_text()
+    build_char_map = None
+
+
+# ===== Tokenizer du content stream =====
+
+_TOKEN_RE = re.compile(rb"""
+    (?P<ws>[\s\x00]+|%[^\r\n]*)
+  | (?P<num>[+-]?(?:\d+\.?\d*|\.\d+))
+  | (?P<name>/[^\s/\[\]()<>{}%]*)
+  | (?P<dopen><<)
+  | (?P<dclose>>>)
+  | (?P<hex><[0-9A-Fa-f\s]*>)
+  | (?P<aopen>\[)
+  | (?P<aclose>\])
+  | (?P<str>\()
+  | (?P<op>[^\s/\[\]()<>{}%]+)
+""", re.X)
+_STRING_SPECIAL_RE = re.compile(rb'[()\\]')
+_NAME_ESCAPE_RE = re.compile(rb'#([0-9A-Fa-f]{2})')
+_INLINE_IMAGE_END_RE = re.compile(rb'\sEI(?=[\s/\[<(]|$)')
+_STRING_ESCAPES = {
+    ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b', ord('f'): b'\f',
+    ord('('): b'(', ord(')'): b')', ord('\\'): b'\\'
+}
+
+
+def _read_literal_string(data: bytes, pos: int) -> Tuple[bytes, int]:
+    """Lire une chaîne (...) à partir de pos (après la parenthèse ouvrante), parenthèses imbriquées et échappements"""
+    out = bytearray()
+    depth = 1
+    while True:
+        match = _STRING_SPECIAL_RE.search(data, pos)
+        if not match:
+            out += data[pos:]
+            return bytes(out), len(data)
+        start = match.start()
+        out += data[pos:start]
+        char = data[start]
+        if char == 0x5C:  # backslash
+            nxt = data[start + 1] if start + 1 < len(data) else None
+            if nxt is None:
+                return bytes(out), len(data)
+            if nxt in _STRING_ESCAPES:
+                out += _STRING_ESCAPES[nxt]
+                pos = start + 2
+            elif 0x30 <= nxt <= 0x37:
+                end = start + 1
+                while end < start + 4 and end < len(data) and 0x30 <= data[end] <= 0x37:
+                    end += 1
+                out.append(int(data[start + 1:end], 8) & 0xFF)
+                pos = end
+            elif nxt in (0x0D, 0x0A):  # continuation de ligne
+                pos = start + 2
+                if nxt == 0x0D and pos < len(data) and data[pos] == 0x0A:
+                    pos += 1
+            else:
+                out.append(nxt)
+                pos = start + 2
+        elif char == 0x28:
+            depth += 1
+            out.append(char)
+            pos = start + 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return bytes(out), start + 1
+            out.append(char)
+            pos = start + 1
+
+
+def iter_content_operations(data: bytes) -> Iterator[Tuple[bytes, List[Any]]]:
+    """
+    Parcourir un content stream PDF: (opérateur, opérandes).
+    Chaînes → bytes, noms → str ('/F1'), tableaux → list, dictionnaires → {} (non utilisés), images inline ignorées.
+    """
+    operands: List[Any] = []
+    stack: List[List[Any]] = []
+    pos = 0
+    length = len(data)
+    match_token = _TOKEN_RE.match
+
+    while pos < length:
+        match = match_token(data, pos)
+        if not match:
+            pos += 1  # octet parasite (ex: '}' ou '>' isolé)
+            continue
+        kind = match.lastgroup
+        pos = match.end()
+
+        if kind == 'ws':
+            continue
+        if kind == 'num':
+            operands.append(float(match.group()))
+        elif kind == 'name':
+            name = _NAME_ESCAPE_RE.sub(lambda m: bytes((int(m.group(1), 16),)), match.group())
+            operands.append(name.decode('latin-1'))
+        elif kind == 'str':
+            value, pos = _read_literal_string(data, pos)
+            operands.append(value)
+        elif kind == 'hex':
+            digits = re.sub(rb'\s', b'', match.group()[1:-1])
+            if len(digits) % 2:
+                digits += b'0'
+            operands.append(bytes.fromhex(digits.decode('ascii')))
+        elif kind in ('aopen', 'dopen'):
+            stack.append(operands)
+            operands = []
+        elif kind in ('aclose', 'dclose'):
+            value = operands if kind == 'aclose' else {}
+            operands = stack.pop() if stack else []
+            operands.append(value)
+        else:
+            op = match.group()
+            if stack:
+                # Mot-clé dans un tableau / dictionnaire (true, false, null)
+                operands.append(op)
+                continue
+            if op == b'BI':
+                # Image inline: sauter jusqu'au EI qui suit les données binaires
+                data_start = data.find(b'ID', pos)
+                end = _INLINE_IMAGE_END_RE.search(data, data_start + 3) if data_start != -1 else None
+                pos = end.end() if end else length
+                operands = []
+                continue
+            yield op, operands
+            operands = []
+
+
+# ===== Polices =====
+
+def _mult(m: List[float], n: List[float]) -> List[float]:
+    """Produit de matrices PDF [a b c d e f]"""
+    return [
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    ]
+
+
+class _Font:
+    """
+    Décodage des codes de caractères (encodage + ToUnicode via PyPDF2) et largeurs des glyphes (/Widths, /W).
+    Tables précalculées à la création: str.translate et sum(map()) évitent une boucle Python par glyphe.
+    """
+
+    def __init__(self, name: str = None, resources=None):
+        self.two_bytes = False
+        self.widths: Dict[int, float] = {}
+        self.default_width = 500.0
+        encoding: Any = 'charmap'
+        map_dict: Dict[Any, str] = {}
+
+        if name is not None:
+            font = resources['/Font'][name].get_object()
+            _, _, encoding, map_dict, _ = build_char_map(name, 200.0, {'/Resources': resources})
+            self.two_bytes = encoding == 'utf-16-be' or map_dict.get(-1) == 2
+            if font.get('/Subtype') == '/Type0':
+                descendant = font['/DescendantFonts'][0].get_object()
+                self.default_width = float(descendant.get('/DW', 1000))
+                w_array = descendant.get('/W')
+                if w_array is not None:
+                    self._parse_cid_widths(w_array.get_object())
+            else:
+                first_char = int(font.get('/FirstChar', 0))
+                widths = font.get('/Widths')
+                if widths is not None:
+                    for i, width in enumerate(widths.get_object()):
+                        self.widths[first_char + i] = float(width)
+                descriptor = font.get('/FontDescriptor')
+                if descriptor is not None and '/MissingWidth' in descriptor.get_object():
+                    self.default_width = float(descriptor.get_object()['/MissingWidth'])
+                elif str(font.get('/BaseFont', '')).startswith('/Courier'):
+                    self.default_width = 600.0
+
+        if self.two_bytes:
+            # Codes 2 octets décodés en UTF-16BE puis traduits par la CMap ToUnicode
+            self.translation = {
+                ord(char): text for char, text in map_dict.items() if isinstance(char, str) and len(char) == 1
+            }
+        else:
+            # Code 1 octet → texte final (encodage puis ToUnicode), largeurs indexées par code
+            self.translation = {}
+            for code in range(256):
+                if isinstance(encoding, str):
+                    try:
+                        char = bytes((code,)).decode(encoding, 'surrogatepass')
+                    except Exception:
+                        char = chr(code)
+                else:
+                    char = encoding.get(code, chr(code))
+                self.translation[code] = map_dict.get(char, char)
+            self.byte_widths = [self.widths.get(code, self.default_width) for code in range(256)]
+
+    def _parse_cid_widths(self, w_array):
+        """/W: [c [w1 w2 ...] cfirst clast w ...]"""
+        i = 0
+        items = [item.get_object() if hasattr(item, 'get_object') else item for item in w_array]
+        while i + 1 < len(items):
+            first = int(items[i])
+            if isinstance(items[i + 1], list):
+                for j, width in enumerate(items[i + 1]):
+                    self.widths[first + j] = float(width)
+                i += 2
+            elif i + 2 < len(items):
+                last = int(items[i + 1])
+                for code in range(first, last + 1):
+                    self.widths[code] = float(items[i + 2])
+                i += 3
+            else:
+                break
+
+    def decode(self, raw: bytes) -> str:
+        """Codes bruts → texte unicode"""
+        if self.two_bytes:
+            return raw[:len(raw) - len(raw) % 2].decode('utf-16-be', 'surrogatepass').translate(self.translation)
+        return raw.decode('latin-1').translate(self.translation)
+
+    def measure(self, raw: bytes) -> Tuple[float, int, int]:
+        """(largeur en 1/1000 em, nombre de codes, nombre d'espaces simples pour Tw)"""
+        if self.two_bytes:
+            codes = struct.unpack(f'>{len(raw) // 2}H', raw[:len(raw) - len(raw) % 2])
+            return sum(map(self.widths.get, codes, repeat(self.default_width))), len(codes), 0
+        return sum(map(self.byte_widths.__getitem__, raw)), len(raw), raw.count(32)
+
+
+# Police par défaut (avant tout Tf, police introuvable ou illisible): latin-1, largeur moyenne
+_FALLBACK_FONT = _Font()
+
+
+# ===== Backends =====
+
+class PyPDF2TextBackend:
+    """Ordre du content stream, tel que rendu par PyPDF2 (repli)"""
+
+    name = 'pypdf2'
+
+    def extract_page(self, page) -> str:
+        return page.extract_text() or ""
+
+
+class LayoutTextBackend:
+    """
+    Extraction avec positions des glyphes:
+    1. Interprétation du content stream (BT/ET, Tf, Td/TD/Tm/T*, Tj/TJ/'/", cm, q/Q, formulaires Do)
+       → fragments (x début, x fin, ligne de base, taille de police, texte)
+    2. Regroupement en lignes par ligne de base (tolérance proportionnelle à la taille)
+    3. Détection des gouttières (bandes verticales sans texte) → colonnes lues l'une après l'autre,
+       les lignes qui traversent une gouttière (titres pleine largeur) coupent les colonnes en sections
+    Toute page non interprétable est extraite par PyPDF2 (repli page par page).
+    """
+
+    name = 'layout'
+
+    # Largeur minimale d'une gouttière (en points) et part minimale de lignes de chaque côté
+    MIN_GUTTER_WIDTH = 8.0
+    MIN_COLUMN_LINES = 3
+    MIN_COLUMN_CHAR_SHARE = 0.08
+    # Au-delà de cette part de lignes alignées des deux côtés, c'est un tableau (lecture ligne à ligne)
+    MAX_ALIGNED_SHARE = 0.7
+    MAX_FORM_DEPTH = 5
+
+    def __init__(self):
+        self._fallback = PyPDF2TextBackend()
+        self._fonts: Dict[Any, _Font] = {}
+        self._fonts_owner = None
+        self.fallback_pages = 0
+
+    def extract_page(self, page) -> str:
+        if build_char_map is None or int(page.get('/Rotate', 0) or 0) % 360:
+            self.fallback_pages += 1
+            return self._fallback.extract_page(page)
+        try:
+            fragments = self._collect_fragments(page)
+        except Exception as e:
+            print(f"⚠️ Layout text extraction failed ({e}), falling back to PyPDF2", flush=True)
+            self.fallback_pages += 1
+            return self._fallback.extract_page(page)
+        return self._layout(fragments)
+
+    # ----- Interprétation -----
+
+    def _get_font(self, name: str, resources) -> _Font:
+        """Police partagée entre les pages d'un même document (cache par objet indirect)"""
+        try:
+            ref = resources['/Font'].raw_get(name)
+        except Exception:
+            return _FALLBACK_FONT
+        if hasattr(ref, 'idnum'):
+            # Nouveau document → on repart d'un cache vide (mémoire bornée à un PDF)
+            if ref.pdf is not self._fonts_owner:
+                self._fonts = {}
+                self._fonts_owner = ref.pdf
+            key = (ref.idnum, ref.generation)
+        else:
+            key = (id(resources), name)
+        font = self._fonts.get(key)
+        if font is None:
+            try:
+                font = _Font(name, resources)
+            except Exception:
+                font = _FALLBACK_FONT
+            self._fonts[key] = font
+        return font
+
+    def _collect_fragments(self, page) -> List[List[Any]]:
+        resources = page.get('/Resources')
+        resources = resources.get_object() if resources is not None else {}
+        contents = page.get('/Contents')
+        if contents is None:
+            return []
+        contents = contents.get_object()
+        if isinstance(contents, list):
+            data = b'\n'.join(part.get_object().get_data() for part in contents)
+        else:
+            data = contents.get_data()
+        fragments: List[List[Any]] = []
+        self._run(data, resources, [1.0, 0.0, 0.0, 1.0, 0.0, 0.0], fragments, 0)
+        return fragments
+
+    def _run(self, data: bytes, resources, ctm: List[float], fragments: List[List[Any]], depth: int):
+        """
+        Interpréter un content stream et ajouter ses fragments de texte,
+        [x0, x1, ligne de base, taille, texte, droit?] en coordonnées page
+        """
+        stack = []
+        tm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+        tlm = tm
+        font = _FALLBACK_FONT
+        font_size = 12.0
+        char_spacing = 0.0
+        word_spacing = 0.0
+        h_scale = 1.0
+        leading = 0.0
+
+        def show(raw: bytes):
+            nonlocal tm
+            width, count, spaces = font.measure(raw)
+            advance = (width / 1000.0 * font_size + char_spacing * count + word_spacing * spaces) * h_scale
+            m = _mult(tm, ctm)
+            x0, y0 = m[4], m[5]
+            tm = [tm[0], tm[1], tm[2], tm[3], tm[4] + advance * tm[0], tm[5] + advance * tm[1]]
+            x1 = tm[4] * ctm[0] + tm[5] * ctm[2] + ctm[4]
+            text = font.decode(raw)
+            if not text.strip():
+                return
+            size = font_size * math.hypot(m[2], m[3])
+            # Texte droit uniquement dans la mise en page; le texte tourné est ajouté en fin de page
+            upright = m[0] > 0 and m[3] > 0 and abs(m[1]) <= 0.1 * m[0]
+            fragments.append([x0, x1, y0, size if size > 0 else font_size, text, upright])
+
+        for op, operands in iter_content_operations(data):
+            try:
+                if op == b'Tj' or op == b"'" or op == b'"':
+                    if op != b'Tj':
+                        if op == b'"':
+                            word_spacing, char_spacing = operands[0], operands[1]
+                        tlm = [tlm[0], tlm[1], tlm[2], tlm[3],
+                               tlm[4] - leading * tlm[2], tlm[5] - leading * tlm[3]]
+                        tm = tlm
+                    if operands and isinstance(operands[-1], bytes):
+                        show(operands[-1])
+                elif op == b'TJ':
+                    for item in operands[0] if operands else []:
+                        if isinstance(item, bytes):
+                            show(item)
+                        elif isinstance(item, float):
+                            shift = -item / 1000.0 * font_size * h_scale
+                            tm = [tm[0], tm[1], tm[2], tm[3], tm[4] + shift * tm[0], tm[5] + shift * tm[1]]
+                elif op == b'Td' or op == b'TD':
+                    tx, ty = operands[0], operands[1]
+                    if op == b'TD':
+                        leading = -ty
+                    tlm = [tlm[0], tlm[1], tlm[2], tlm[3],
+                           tlm[4] + tx * tlm[0] + ty * tlm[2], tlm[5] + tx * tlm[1] + ty * tlm[3]]
+                    tm = tlm
+                elif op == b'Tm':
+                    tlm = [float(v) for v in operands[:6]]
+                    tm = tlm
+                elif op == b'T*':
+                    tlm = [tlm[0], tlm[1], tlm[2], tlm[3],
+                           tlm[4] - leading * tlm[2], tlm[5] - leading * tlm[3]]
+                    tm = tlm
+                elif op == b'Tf':
+                    font = self._get_font(operands[0], resources)
+                    font_size = operands[1]
+                elif op == b'BT':
+                    tm = tlm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+                elif op == b'Tc':
+                    char_spacing = operands[0]
+                elif op == b'Tw':
+                    word_spacing = operands[0]
+                elif op == b'Tz':
+                    h_scale = operands[0] / 100.0
+                elif op == b'TL':
+                    leading = operands[0]
+                elif op == b'cm':
+                    ctm = _mult([float(v) for v in operands[:6]], ctm)
+                elif op == b'q':
+                    stack.append((ctm, font, font_size, char_spacing, word_spacing, h_scale, leading))
+                elif op == b'Q':
+                    if stack:
+                        ctm, font, font_size, char_spacing, word_spacing, h_scale, leading = stack.pop()
+                elif op == b'Do' and depth < self.MAX_FORM_DEPTH:
+                    xobjects = resources.get('/XObject') if resources else None
+                    xobj = xobjects.get_object().get(operands[0]) if xobjects is not None else None
+                    xobj = xobj.get_object() if xobj is not None else None
+                    if xobj is not None and xobj.get('/Subtype') == '/Form':
+                        matrix = [float(v) for v in xobj.get('/Matrix', [1, 0, 0, 1, 0, 0])]
+                        form_resources = xobj.get('/Resources')
+                        form_resources = form_resources.get_object() if form_resources is not None else resources
+                        self._run(xobj.get_data(), form_resources, _mult(matrix, ctm), fragments, depth + 1)
+            except (IndexError, TypeError, ValueError, KeyError):
+                # Opérateur mal formé: ignoré comme le ferait un lecteur PDF
+                continue
+
+    # ----- Mise en page -----
+
+    def _layout(self, fragments: List[List[Any]]) -> str:
+        upright = [f for f in fragments if f[5]]
+        rotated = [f[4].strip() for f in fragments if not f[5]]
+        if not upright:
+            return "\n".join(rotated)
+
+        rows = self._group_rows(upright)
+        gutters = self._find_gutters(rows, upright)
+
+        lines: List[str] = []
+        if not gutters:
+            self._emit_column(rows, lines)
+        else:
+            # Colonnes lues l'une après l'autre, sections coupées par les lignes pleine largeur
+            bounds = [-math.inf] + [(g[0] + g[1]) / 2 for g in gutters] + [math.inf]
+            pending = [[] for _ in range(len(bounds) - 1)]
+            for row in rows:
+                if self._row_crosses(row, gutters):
+                    self._flush_columns(pending, lines)
+                    self._emit_column([row], lines)
+                    continue
+                for col in range(len(pending)):
+                    part = [f for f in row[1] if bounds[col] <= (f[0] + f[1]) / 2 < bounds[col + 1]]
+                    if part:
+                        pending[col].append((row[0], part))
+            self._flush_columns(pending, lines)
+
+        lines.extend(rotated)
+        return "\n".join(lines).strip()
+
+    def _group_rows(self, fragments: List[List[Any]]) -> List[Tuple[float, List[List[Any]]]]:
+        """Lignes (ligne de base, fragments) de haut en bas"""
+        rows: List[Tuple[float, List[List[Any]]]] = []
+        for frag in sorted(fragments, key=lambda f: (-f[2], f[0])):
+            if rows and abs(rows[-1][0] - frag[2]) <= 0.5 * min(frag[3], rows[-1][1][0][3]):
+                rows[-1][1].append(frag)
+            else:
+                rows.append((frag[2], [frag]))
+        return rows
+
+    def _find_gutters(self, rows, fragments) -> List[Tuple[float, float]]:
+        """Bandes verticales vides de texte séparant au moins deux colonnes réelles"""
+        if len(rows) < 2 * self.MIN_COLUMN_LINES:
+            return []
+        left = min(f[0] for f in fragments)
+        right = max(f[1] for f in fragments)
+        if right - left < 4 * self.MIN_GUTTER_WIDTH:
+            return []
+
+        # Histogramme d'occupation par tranche de 1 pt: nombre de lignes couvrant chaque tranche
+        # (intervalles fusionnés par ligne, puis somme cumulée d'un tableau de différences)
+        bins = int(right - left) + 1
+        deltas = [0] * (bins + 1)
+        for _, frags in rows:
+            spans = sorted((max(0, int(f[0] - left)), min(bins, int(f[1] - left) + 1)) for f in frags)
+            start, end = spans[0]
+            for span_start, span_end in spans[1:]:
+                if span_start > end:
+                    deltas[start] += 1
+                    deltas[end] -= 1
+                    start = span_start
+                end = max(end, span_end)
+            deltas[start] += 1
+            deltas[end] -= 1
+        coverage = list(accumulate(deltas[:bins]))
+
+        # Quelques lignes pleine largeur (nom, coordonnées, titres) peuvent traverser la gouttière
+        tolerance = max(2, int(len(rows) * 0.08))
+        sizes = sorted(f[3] for f in fragments)
+        min_width = max(self.MIN_GUTTER_WIDTH, 1.5 * sizes[len(sizes) // 2])
+        total_chars = sum(len(f[4]) for f in fragments)
+
+        gutters = []
+        start = None
+        for b in range(bins + 1):
+            empty = b < bins and coverage[b] <= tolerance
+            if empty and start is None:
+                start = b
+            elif not empty and start is not None:
+                if start > 0 and b < bins and b - start >= min_width:
+                    gutter = (left + start, left + b)
+                    if self._is_column_gutter(gutter, rows, total_chars):
+                        gutters.append(gutter)
+                start = None
+        return gutters[:2]
+
+    def _is_column_gutter(self, gutter, rows, total_chars) -> bool:
+        """
+        Assez de lignes et de texte de chaque côté, et pas un tableau: dans un tableau (dates / postes)
+        les deux côtés partagent exactement les mêmes lignes de base, pas dans des colonnes indépendantes
+        """
+        left_baselines, right_baselines = set(), set()
+        left_chars = right_chars = 0
+        for _, frags in rows:
+            for f in frags:
+                if f[1] <= gutter[0] + 1:
+                    left_baselines.add(round(f[2]))
+                    left_chars += len(f[4])
+                elif f[0] >= gutter[1] - 1:
+                    right_baselines.add(round(f[2]))
+                    right_chars += len(f[4])
+
+        smaller = min(len(left_baselines), len(right_baselines))
+        if smaller < self.MIN_COLUMN_LINES:
+            return False
+        if min(left_chars, right_chars) < self.MIN_COLUMN_CHAR_SHARE * total_chars:
+            return False
+        aligned = sum(1 for y in left_baselines if y in right_baselines or y - 1 in right_baselines or y + 1 in right_baselines)
+        return aligned <= self.MAX_ALIGNED_SHARE * smaller
+
+    def _row_crosses(self, row, gutters) -> bool:
+        """
+        Ligne pleine largeur: un texte continu traverse le milieu d'une gouttière
+        (fragment à cheval, ou fragments de part et d'autre séparés d'un simple espace)
+        """
+        for g in gutters:
+            middle = (g[0] + g[1]) / 2
+            left_end, right_start = -math.inf, math.inf
+            for f in row[1]:
+                if f[0] < middle < f[1]:
+                    return True
+                if f[1] <= middle:
+                    left_end = max(left_end, f[1])
+                else:
+                    right_start = min(right_start, f[0])
+            size = max(f[3] for f in row[1])
+            if right_start - left_end < size:
+                return True
+        return False
+
+    def _flush_columns(self, pending, lines: List[str]):
+        for col in pending:
+            if col:
+                if lines and lines[-1]:
+                    lines.append("")
+                self._emit_column(col, lines)
+                col.clear()
+
+    def _emit_column(self, rows, lines: List[str]):
+        """Lignes d'une colonne, ligne vide entre paragraphes (interligne nettement au-dessus de l'interligne médian)"""
+        gaps = sorted(a[0] - b[0] for a, b in zip(rows, rows[1:]))
+        paragraph_gap = 1.4 * gaps[len(gaps) // 2] if gaps else math.inf
+        previous_y = None
+        for y, frags in rows:
+            text = self._join_fragments(frags)
+            if not text:
+                continue
+            size = max(f[3] for f in frags)
+            gap = previous_y - y if previous_y is not None else 0
+            if gap > paragraph_gap and gap > 1.2 * size and lines and lines[-1]:
+                lines.append("")
+            lines.append(text)
+            previous_y = y
+
+    def _join_fragments(self, frags: List[List[Any]]) -> str:
+        """Fragments d'une ligne de gauche à droite, espace si l'écart dépasse 0,2 em"""
+        parts = []
+        previous = None
+        for f in sorted(frags, key=lambda f: f[0]):
+            if previous is not None:
+                # Faux gras (texte redessiné décalé d'une fraction de point) → ignoré
+                if f[4] == previous[4] and abs(f[0] - previous[0]) < 0.2 * f[3]:
+                    continue
+                gap = f[0] - previous[1]
+                if gap > 0.2 * f[3] and not parts[-1].endswith(' ') and not f[4].startswith(' '):
+                    parts.append(' ')
+            parts.append(f[4])
+            previous = f
+        return re.sub(r'[ \t]+', ' ', ''.join(parts)).strip()
+
+
+PDF_TEXT_BACKENDS = {
+    'layout': LayoutTextBackend,
+    'pypdf2': PyPDF2TextBackend
+}
+
+
+def get_pdf_text_backend(name: Optional[str] = None):
+    """Nouvelle instance du backend (défaut: TMC_PDF_TEXT_BACKEND ou 'layout')"""
+    name = (name or os.getenv('TMC_PDF_TEXT_BACKEND') or 'layout').lower()
+    backend_class = PDF_TEXT_BACKENDS.get(name)
+    if backend_class is None:
+        print(f"⚠️ Unknown PDF text backend '{name}', using 'layout'", flush=True)
+        backend_class = LayoutTextBackend
+    return backend_class()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+TMC Pipeline
+Petit exécuteur de graphe de tâches (DAG): les étapes indépendantes tournent en parallèle dans des threads
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Any, Iterable
+
+
+class TaskCancelledError(RuntimeError):
+    """Tâche abandonnée: le graphe a déjà échoué sur une autre tâche"""
+
+
+# Événement d'annulation du graphe dont le thread courant exécute une tâche (voir TaskGraph._timed)
+_current = threading.local()
+
+
+def task_cancelled() -> bool:
+    """
+    Vrai dans une tâche dont le graphe a échoué: son résultat ne sera jamais lu, elle ne doit plus lancer
+    d'appel payant ni écrire dans un état partagé. Faux hors d'un TaskGraph.
+    """
+    cancelled = getattr(_current, 'cancelled', None)
+    return cancelled is not None and cancelled.is_set()
+
+
+class TaskGraph:
+    """
+    Graphe de tâches: chaque tâche démarre dès que ses dépendances sont terminées et reçoit
+    leurs résultats en arguments (dans l'ordre des dépendances).
+    Les dépendances doivent être ajoutées avant la tâche → graphe acyclique par construction.
+
+    Exemple:
+        graph = TaskGraph('matching')
+        graph.add('extract_cv', lambda: enricher.extract_cv_text(cv_path))
+        graph.add('extract_jd', lambda: enricher.read_job_description(jd_path))
+        graph.add('parse_cv', enricher.parse_cv_with_claude, deps=['extract_cv'])
+        graph.add('match', enricher.analyze_cv_matching, deps=['parse_cv', 'extract_jd'])
+        results = graph.run()
+    """
+
+    def __init__(self, name: str = 'pipeline', max_workers: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self._tasks: Dict[str, tuple] = {}
+        # Temps par tâche du dernier run, en secondes depuis son début: {nom: (début, fin)}
+        self.timings: Dict[str, tuple] = {}
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, name: str, fn: Callable, deps: Iterable[str] = ()) -> 'TaskGraph':
+        """Ajouter une tâche (fn(*résultats des dépendances))"""
+        if name in self._tasks:
+            raise ValueError(f"Tâche déjà définie: {name}")
+        deps = tuple(deps)
+        unknown = [d for d in deps if d not in self._tasks]
+        if unknown:
+            raise ValueError(f"Dépendances inconnues pour {name}: {', '.join(unknown)}")
+        self._tasks[name] = (fn, deps)
+        return self
+
+    def dependencies(self) -> Dict[str, List[str]]:
+        """Le DAG: {tâche: [dépendances]}"""
+        return {name: list(deps) for name, (_, deps) in self._tasks.items()}
+
+    def levels(self) -> List[List[str]]:
+        """Tâches groupées par profondeur: celles d'un même niveau peuvent tourner en parallèle"""
+        depth = {}
+        for name, (_, deps) in self._tasks.items():
+            depth[name] = 1 + max((depth[d] for d in deps), default=-1)
+        levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for name, level in depth.items():
+            levels[level].append(name)
+        return levels
+
+    def _timed(self, name: str, fn: Callable, args: List[Any], origin: float, cancelled: threading.Event):
+        start = time.perf_counter() - origin
+        _current.cancelled = cancelled
+        try:
+            return fn(*args)
+        finally:
+            _current.cancelled = None
+            with self._lock:
+                self.timings[name] = (round(start, 3), round(time.perf_counter() - origin, 3))
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Exécuter le graphe. À la première tâche en erreur, l'exception est relevée aussitôt:
+        les tâches non démarrées sont annulées, celles en cours finissent en arrière-plan
+        avec task_cancelled() vrai (voir TaskCancelledError).
+
+        Returns:
+            dict: {tâche: résultat}
+        """
+        self.timings = {}
+        origin = time.perf_counter()
+        results: Dict[str, Any] = {}
+        pending = dict(self._tasks)
+        running = {}
+        failed = False
+        cancelled = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"tmc_{self.name}")
+        try:
+            while pending or running:
+                for name, (fn, deps) in list(pending.items()):
+                    if all(d in results for d in deps):
+                        del pending[name]
+                        args = [results[d] for d in deps]
+                        running[pool.submit(self._timed, name, fn, args, origin, cancelled)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+        except BaseException:
+            failed = True
+            cancelled.set()
+            raise
+        finally:
+            pool.shutdown(wait=not failed, cancel_futures=failed)
+            self.elapsed = round(time.perf_counter() - origin, 3)
+        return results
+
+    def report(self) -> Dict[str, Any]:
+        """DAG + temps du dernier run (pour les logs et _metadata)"""
+        return {
+            'elapsed_seconds': self.elapsed,
+            'tasks': {
+                name: {
+                    'deps': list(deps),
+                    'start': self.timings.get(name, (None, None))[0],
+                    'end': self.timings.get(name, (None, None))[1]
+                }
+                for name, (_, deps) in self._tasks.items()
+            }
+        }
+
+    def print_report(self):
+        """Log des temps par tâche (début → fin, secondes depuis le début du graphe)"""
+        print(f"⏱️ Pipeline {self.name}: {self.elapsed}s", flush=True)
+        for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1]):
+            deps = self._tasks[name][1]
+            after = f" (after {', '.join(deps)})" if deps else ""
+            print(f"   {name}: {start:.2f}s → {end:.2f}s{after}", flush=True)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+TMC Rate Limit
+Limiteur côté client partagé par le process (toutes les sessions Streamlit, batchs async):
+seaux de jetons requêtes / tokens d'entrée / tokens de sortie par minute, file d'attente bornée avec priorités
+(analyse interactive avant les batchs) et estimation honnête de l'attente pour l'UI.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from typing import Dict, Any, Optional
+
+# Priorités de la file (plus petit = servi d'abord)
+PRIORITIES = {'interactive': 0, 'batch': 1}
+
+# Limites par défaut: désactivées (0) tant que TMC_RATE_LIMIT_* n'est pas défini, pour ne pas brider une organisation
+# à un palier qui n'est pas le sien (palier 1 Claude Sonnet, pour référence: 50 RPM, 30000 ITPM, 8000 OTPM)
+DEFAULT_RPM = 0
+DEFAULT_ITPM = 0
+DEFAULT_OTPM = 0
+
+
+class RateLimitQueueFull(RuntimeError):
+    """File d'attente du limiteur pleine: la requête est refusée au lieu d'attendre indéfiniment"""
+
+
+class RateLimitWaitTimeout(TimeoutError):
+    """Attente dans la file plus longue que le budget restant de l'étape"""
+
+
+class TokenBucket:
+    """Seau de jetons: capacité = limite par minute, rechargé en continu (capacity / 60 par seconde)"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Secondes avant que `amount` jetons soient disponibles (0 si déjà disponibles)"""
+        if not self.enabled:
+            return 0.0
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.rate)
+
+    def take(self, amount: float):
+        if self.enabled:
+            self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        """Ajuster après coup (estimation → usage réel): positif rend des jetons, négatif en reprend"""
+        if self.enabled:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Ticket:
+    """Requête en attente ou servie: besoins estimés en tokens, rang dans la file"""
+
+    def __init__(self, priority: int, seq: int, input_tokens: int, output_tokens: int):
+        self.priority = priority
+        self.seq = seq
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.enqueued = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RateLimiter:
+    """
+    Limiteur RPM / ITPM / OTPM à file de priorité: seule la tête de file peut prendre des jetons,
+    une grosse requête n'est donc pas doublée indéfiniment par de petites.
+    Les tokens de sortie sont réservés sur estimation (moyenne observée par étape, sinon max_tokens / 2)
+    puis ajustés à l'usage réel (settle). Un 429 avec retry-after suspend tout le limiteur (pause).
+
+    Usage:
+        ticket = limiter.acquire(input_tokens, output_tokens, priority='batch', timeout=120)
+        ... appel API ...
+        limiter.settle(ticket, stage, actual_input, actual_output)
+    """
+
+    def __init__(self, rpm: float = DEFAULT_RPM, itpm: float = DEFAULT_ITPM, otpm: float = DEFAULT_OTPM,
+                 max_queue: int = 32):
+        self.buckets = {'requests': TokenBucket(rpm), 'input_tokens': TokenBucket(itpm),
+                        'output_tokens': TokenBucket(otpm)}
+        self.max_queue = max_queue
+        self._queue = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+        # Estimation des tokens de sortie par étape (moyenne glissante de l'usage réel)
+        self._output_estimates: Dict[str, float] = {}
+        self.admitted = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return any(bucket.enabled for bucket in self.buckets.values())
+
+    # ===== Estimations =====
+
+    def estimate_output(self, stage: str, max_tokens: int) -> int:
+        """Tokens de sortie à réserver pour une étape"""
+        estimate = self._output_estimates.get(stage)
+        return int(min(max_tokens, estimate)) if estimate else max(1, max_tokens // 2)
+
+    def _learn_output(self, stage: str, output_tokens: int):
+        previous = self._output_estimates.get(stage)
+        self._output_estimates[stage] = output_tokens if previous is None else 0.8 * previous + 0.2 * output_tokens
+
+    # ===== File et jetons =====
+
+    def _enqueue(self, priority: str, input_tokens: int, output_tokens: int) -> _Ticket:
+        with self._condition:
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise RateLimitQueueFull(
+                    f"⏳ Trop de requêtes en attente ({len(self._queue)}/{self.max_queue}), réessayez dans une minute"
+                )
+            ticket = _Ticket(PRIORITIES.get(priority, PRIORITIES['batch']), next(self._seq),
+                             input_tokens, output_tokens)
+            heapq.heappush(self._queue, ticket)
+            return ticket
+
+    def _try_take(self, ticket: _Ticket) -> float:
+        """Sous le verrou: 0 si le ticket a pris ses jetons (retiré de la file), sinon secondes à attendre"""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._queue[0] is not ticket:
+            # Pas en tête: réveillé quand la tête avance (notify_all), au plus tard après 1s
+            return 1.0
+        for bucket in self.buckets.values():
+            bucket.refill(now)
+        needs = {'requests': 1, 'input_tokens': ticket.input_tokens, 'output_tokens': ticket.output_tokens}
+        wait = max(self.buckets[name].wait_for(amount) for name, amount in needs.items())
+        if wait > 0:
+            return wait
+        for name, amount in needs.items():
+            self.buckets[name].take(amount)
+        heapq.heappop(self._queue)
+        self.admitted += 1
+        self.waited_seconds += now - ticket.enqueued
+        self._condition.notify_all()
+        return 0.0
+
+    def _abandon(self, ticket: _Ticket):
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._condition.notify_all()
+
+    def _check_deadline(self, ticket: _Ticket, deadline: Optional[float], wait: float):
+        if deadline is not None and time.monotonic() + min(wait, 0.05) >= deadline:
+            self._abandon(ticket)
+            raise RateLimitWaitTimeout(
+                f"⏳ Attente du limiteur trop longue ({time.monotonic() - ticket.enqueued:.0f}s, "
+                f"{len(self._queue)} requêtes devant)"
+            )
+
+    def acquire(self, input_tokens: int, output_tokens: int, priority: str = 'interactive',
+                timeout: float = None) -> Optional[_Ticket]:
+        """Attendre son tour et les jetons (bloquant); None si le limiteur est désactivé"""
+        if not self.enabled:
+            return None
+        ticket = self._enqueue(priority, input_tokens, output_tokens)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            try:
+                while True:
+                    wait = self._try_take(ticket)
+                    if wait == 0:
+                        return ticket
+                    self._check_deadline(ticket, deadline, wait)
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    self._condition.wait(wait if remaining is None else min(wait, remaining))
+            except BaseException:
+                # Un ticket abandonné ne doit pas bloquer la tête de file
+                self._abandon(ticket)
+                raise
+
+    async def acquire_async(self, input_tokens: int, output_tokens: int, priority: str = 'interactive',
+                            timeout: float = None) -> Optional[_Ticket]:
+        """Équivalent async de acquire: l'attente ne bloque pas la boucle"""
+        if not self.enabled:
+            return None
+        ticket = self._enqueue(priority, input_tokens, output_tokens)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_take(ticket)
+                    if wait == 0:
+                        return ticket
+                    self._check_deadline(ticket, deadline, wait)
+                # Sondage borné: un ticket libéré dans un autre thread n'est pas notifié à la boucle
+                await asyncio.sleep(min(wait, 0.25))
+        except asyncio.CancelledError:
+            with self._condition:
+                self._abandon(ticket)
+            raise
+
+    def settle(self, ticket: Optional[_Ticket], stage: str, input_tokens: int = None, output_tokens: int = None):
+        """Remplacer l'estimation par l'usage réel (None = rien consommé, ex: erreur avant la réponse)"""
+        if ticket is None:
+            return
+        with self._condition:
+            self.buckets['input_tokens'].give_back(ticket.input_tokens - (input_tokens or 0))
+            self.buckets['output_tokens'].give_back(ticket.output_tokens - (output_tokens or 0))
+            if output_tokens:
+                self._learn_output(stage, output_tokens)
+            self._condition.notify_all()
+
+    def pause(self, seconds: float):
+        """Suspendre toutes les requêtes (429 avec retry-after: la limite de l'organisation est atteinte)"""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    # ===== Pour l'UI =====
+
+    def stats(self, priority: str = None) -> Dict[str, Any]:
+        """
+        Profondeur de file (totale et par priorité) et attente estimée pour une nouvelle requête de priorité
+        `priority`: seuls les tickets servis avant elle comptent (priorité égale ou plus haute; toute la file
+        si None), temps de recharge des seaux pour les servir, pause retry-after comprise
+        """
+        with self._condition:
+            now = time.monotonic()
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+            level = PRIORITIES.get(priority, PRIORITIES['batch']) if priority else max(PRIORITIES.values())
+            ahead = [t for t in self._queue if t.priority <= level]
+            needs = {
+                'requests': len(ahead) + 1,
+                'input_tokens': sum(t.input_tokens for t in ahead),
+                'output_tokens': sum(t.output_tokens for t in ahead)
+            }
+            wait = max(
+                (max(0.0, needs[name] - bucket.tokens) / bucket.rate
+                 for name, bucket in self.buckets.items() if bucket.enabled),
+                default=0.0
+            )
+            by_priority = {name: sum(1 for t in self._queue if t.priority == level)
+                           for name, level in PRIORITIES.items()}
+            return {
+                'queue_depth': len(ahead),
+                'queue_total': len(self._queue),
+                'queue_by_priority': by_priority,
+                'max_queue': self.max_queue,
+                'estimated_wait_seconds': round(wait + max(0.0, self._paused_until - now), 1),
+                'available': {name: int(bucket.tokens) for name, bucket in self.buckets.items() if bucket.enabled},
+                'limits_per_minute': {name: int(bucket.capacity) for name, bucket in self.buckets.items()},
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'mean_wait_seconds': round(self.waited_seconds / self.admitted, 2) if self.admitted else 0.0
+            }
+
+
+def _env_limit(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        print(f"⚠️ Invalid {name}={os.getenv(name)!r}, using {default}", flush=True)
+        return default
+
+
+_RATE_LIMITER = None
+_RATE_LIMITER_LOCK = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Limiteur partagé par le process. Limites de l'organisation via TMC_RATE_LIMIT_RPM, TMC_RATE_LIMIT_ITPM,
+    TMC_RATE_LIMIT_OTPM (0 ou absente désactive une dimension), file bornée par TMC_RATE_LIMIT_MAX_QUEUE.
+    """
+    global _RATE_LIMITER
+    with _RATE_LIMITER_LOCK:
+        if _RATE_LIMITER is None:
+            _RATE_LIMITER = RateLimiter(
+                rpm=_env_limit('TMC_RATE_LIMIT_RPM', DEFAULT_RPM),
+                itpm=_env_limit('TMC_RATE_LIMIT_ITPM', DEFAULT_ITPM),
+                otpm=_env_limit('TMC_RATE_LIMIT_OTPM', DEFAULT_OTPM),
+                max_queue=int(_env_limit('TMC_RATE_LIMIT_MAX_QUEUE', 32))
+            )
+            if _RATE_LIMITER.enabled:
+                limits = ', '.join(f"{name} {int(bucket.capacity)}/min"
+                                   for name, bucket in _RATE_LIMITER.buckets.items() if bucket.enabled)
+                print(f">>> Shared rate limiter enabled ({limits})", flush=True)
+            else:
+                print(">>> Shared rate limiter disabled (set TMC_RATE_LIMIT_RPM / _ITPM / _OTPM to enable)", flush=True)
+        return _RATE_LIMITER
+
+
+def estimate_input_tokens(request: Dict[str, Any]) -> int:
+    """Tokens d'entrée estimés d'une requête messages.create (~4 caractères par token, outils compris)"""
+    def text_length(content):
+        if isinstance(content, str):
+            return len(content)
+        return sum(len(block.get('text', '')) for block in content or [] if isinstance(block, dict))
+
+    chars = text_length(request.get('system'))
+    chars += sum(text_length(message.get('content')) for message in request.get('messages', []))
+    chars += len(str(request.get('tools') or ''))
+    return max(1, chars // 4)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+TMC Retry
+Politique unique de retry des appels à l'API Messages: backoff exponentiel avec jitter, respect de retry-after,
+budget de temps total par étape (tentatives et attentes comprises) et métriques par tentative.
+Le SDK est créé avec max_retries=0: toutes les nouvelles tentatives passent par ici.
+"""
+
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Any, Optional
+
+# Budget total par étape, en secondes (voir tmc_streaming.request_stage)
+STAGE_DEADLINES = {
+    'parse_cv': 600.0,
+    'matching': 900.0,
+    'parse_and_score': 900.0,
+    'enrich': 900.0,
+    'llm': 600.0,
+}
+
+# Codes HTTP transitoires: timeout serveur, conflit, rate limit (429), erreurs serveur et surcharge (529)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        print(f"⚠️ Invalid {name}={os.getenv(name)!r}, using {default}", flush=True)
+        return default
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """Code HTTP d'une erreur API (APIStatusError), None pour une erreur réseau / timeout"""
+    code = getattr(error, 'status_code', None)
+    if code is None:
+        code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return code if isinstance(code, int) else None
+
+
+def is_timeout_error(error: Exception) -> bool:
+    """Timeout de lecture / connexion (APITimeoutError, TimeoutError) ou 408"""
+    return (isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower()
+            or status_code(error) == 408)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Erreur transitoire: réseau (connexion, timeout, flux coupé: TransportError httpx non enveloppée par le SDK)
+    ou code HTTP de RETRYABLE_STATUS; jamais 400 / 401 / 403 / 404
+    """
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return bool(names & {'APIConnectionError', 'APITimeoutError', 'ConnectionError', 'TimeoutError',
+                          'TransportError'})
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Délai demandé par l'API (retry-after-ms, retry-after en secondes ou date HTTP), None si absent"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return max(0.0, float(headers['retry-after-ms']) / 1000)
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Politique de retry:
+    - au plus max_attempts tentatives par appel, dans le budget de l'étape (STAGE_DEADLINES, ou deadline pour toutes)
+    - attente: jitter complet sur base × 2^(tentative-1), plafonné à max_delay; retry-after prioritaire
+    - timeout de chaque tentative: min(attempt_timeout, budget restant)
+    - abandon si l'attente demandée dépasse le budget restant
+
+    Configuration: TMC_LLM_MAX_ATTEMPTS, TMC_LLM_BACKOFF_BASE, TMC_LLM_BACKOFF_MAX,
+    TMC_LLM_ATTEMPT_TIMEOUT, TMC_LLM_DEADLINE (remplace les budgets par étape)
+    """
+
+    def __init__(self, max_attempts: int = None, base_delay: float = None, max_delay: float = None,
+                 attempt_timeout: float = None, deadline: float = None, rng: random.Random = None):
+        self.max_attempts = max(1, int(max_attempts or _env_float('TMC_LLM_MAX_ATTEMPTS', 4)))
+        self.base_delay = base_delay if base_delay is not None else _env_float('TMC_LLM_BACKOFF_BASE', 1.0)
+        self.max_delay = max_delay if max_delay is not None else _env_float('TMC_LLM_BACKOFF_MAX', 30.0)
+        self.attempt_timeout = attempt_timeout or _env_float('TMC_LLM_ATTEMPT_TIMEOUT', 300.0)
+        self.deadline_override = deadline or (_env_float('TMC_LLM_DEADLINE', 0) or None)
+        self.rng = rng or random.Random()
+
+    def deadline(self, stage: str) -> float:
+        """Budget total de l'étape en secondes"""
+        return self.deadline_override or STAGE_DEADLINES.get(stage, STAGE_DEADLINES['llm'])
+
+    def timeout(self, remaining: float) -> float:
+        """Timeout d'une tentative"""
+        return max(1.0, min(self.attempt_timeout, remaining))
+
+    def backoff(self, attempt: int) -> float:
+        """Attente avant la tentative attempt + 1 (jitter complet)"""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def delay_before_retry(self, error: Exception, attempt: int, remaining: float) -> Optional[float]:
+        """Attente avant une nouvelle tentative, None si l'erreur est définitive ou le budget épuisé"""
+        if attempt >= self.max_attempts or not is_retryable(error):
+            return None
+        retry_after = retry_after_seconds(error)
+        delay = retry_after if retry_after is not None else self.backoff(attempt)
+        # Il faut encore le temps d'une tentative utile après l'attente
+        if delay + 1.0 >= remaining:
+            return None
+        return delay
+
+
+class AttemptLog:
+    """
+    Métriques par tentative d'un enrichisseur, et compteurs du process (retry_stats):
+    {'stage', 'attempt', 'outcome' ('ok' / nom de l'erreur), 'status', 'seconds', 'retry_after', 'delay'}
+    """
+
+    def __init__(self):
+        self.attempts: List[Dict[str, Any]] = []
+
+    def record(self, stage: str, attempt: int, seconds: float, error: Exception = None, delay: float = None):
+        entry = {
+            'stage': stage,
+            'attempt': attempt,
+            'outcome': 'ok' if error is None else type(error).__name__,
+            'status': None if error is None else status_code(error),
+            'seconds': round(seconds, 3),
+            'retry_after': None if error is None else retry_after_seconds(error),
+            'delay': None if delay is None else round(delay, 3)
+        }
+        self.attempts.append(entry)
+        _record_global(entry)
+        if error is not None:
+            what = f"{entry['outcome']}" + (f" ({entry['status']})" if entry['status'] else "")
+            if delay is None:
+                print(f"❌ {stage}: attempt {attempt} failed with {what}, giving up", flush=True)
+            else:
+                print(f"🔁 {stage}: attempt {attempt} failed with {what}, retrying in {delay:.1f}s", flush=True)
+
+    def summary(self) -> Dict[str, Any]:
+        """Résumé pour _metadata: tentatives, retries, erreurs par type, temps d'attente"""
+        errors = {}
+        for entry in self.attempts:
+            if entry['outcome'] != 'ok':
+                errors[entry['outcome']] = errors.get(entry['outcome'], 0) + 1
+        return {
+            'attempts': len(self.attempts),
+            'retries': sum(1 for entry in self.attempts if entry['attempt'] > 1),
+            'errors': errors,
+            'backoff_seconds': round(sum(entry['delay'] or 0 for entry in self.attempts), 3)
+        }
+
+
+# ===== Compteurs du process =====
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def _record_global(entry: Dict[str, Any]):
+    with _stats_lock:
+        counts = _stats.setdefault(entry['stage'], {'attempts': 0, 'retries': 0, 'failures': 0})
+        counts['attempts'] += 1
+        counts['retries'] += entry['attempt'] > 1
+        counts['failures'] += entry['outcome'] != 'ok'
+
+
+def retry_stats() -> Dict[str, Dict[str, int]]:
+    """{étape: {attempts, retries, failures}} depuis le démarrage du process"""
+    with _stats_lock:
+        return {stage: dict(counts) for stage, counts in _stats.items()}
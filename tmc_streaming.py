@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+TMC Streaming
+Consommation du flux de l'API Messages (messages.stream): parsing JSON incrémental de la sortie,
+événements par élément terminé (domaine du matching, expérience enrichie) pour l'affichage au fil de l'eau,
+un flux interrompu est relancé en erreur (nouvelle tentative complète via tmc_retry, jamais de JSON partiel accepté)
+"""
+
+import json
+import time
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import httpx
+
+from tmc_structured_output import STAGE_TOOLS
+
+# Tableaux dont chaque élément terminé produit un événement 'item' (à toute profondeur: parse_and_score → matching)
+STREAM_ITEM_KEYS = ('domaines_analyses', 'experiences_enrichies')
+
+# Silence maximale entre deux lectures d'un flux (secondes): en streaming, le timeout httpx vaut par lecture,
+# la durée totale de la tentative est bornée à part (voir _stream_request)
+STREAM_READ_TIMEOUT = 60.0
+
+# Outil forcé → étape (record_enriched_cv: enrich et enrich_with_matching → 'enrich')
+_TOOL_STAGES = {}
+for _stage, (_tool, _, _) in STAGE_TOOLS.items():
+    _TOOL_STAGES.setdefault(_tool, _stage)
+
+
+def request_stage(request: Dict[str, Any]) -> str:
+    """Étape d'une requête messages.create d'après l'outil forcé ('llm' si aucun)"""
+    return _TOOL_STAGES.get((request.get('tool_choice') or {}).get('name'), 'llm')
+
+
+class IncrementalJSONParser:
+    """
+    Parser JSON incrémental minimal: suit chaînes, clés et conteneurs ouverts au fil des fragments,
+    et rend chaque objet terminé d'un tableau surveillé dès son accolade fermante.
+
+    Exemple:
+        parser = IncrementalJSONParser()
+        parser.feed('{"domaines_analyses": [{"domaine": "Azure", "score": 3')
+        → []
+        parser.feed('2}, {"domaine"')
+        → [('domaines_analyses', 0, {'domaine': 'Azure', 'score': 32})]
+    """
+
+    def __init__(self, item_keys=STREAM_ITEM_KEYS):
+        self.item_keys = set(item_keys)
+        self.text = ''
+        # Conteneurs ouverts: [caractère ouvrant, clé, position de début, éléments rendus]
+        self._stack: List[list] = []
+        self._in_string = self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._key = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, int, Dict[str, Any]]]:
+        """Ajouter un fragment; retourne les éléments terminés: [(clé du tableau, index, objet)]"""
+        items = []
+        offset = len(self.text)
+        self.text += chunk
+        for position in range(offset, len(self.text)):
+            char = self.text[position]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = (self._string_start, position + 1)
+            elif char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char == ':' and self._stack and self._stack[-1][0] == '{' and self._last_string:
+                self._key = json.loads(self.text[slice(*self._last_string)])
+            elif char in '{[':
+                key = self._key if self._stack and self._stack[-1][0] == '{' else None
+                self._stack.append([char, key, position, 0])
+                self._key = None
+            elif char in '}]' and self._stack:
+                opening, _, start, _ = self._stack.pop()
+                parent = self._stack[-1] if self._stack else None
+                if opening == '{' and parent and parent[0] == '[' and parent[1] in self.item_keys:
+                    try:
+                        items.append((parent[1], parent[3], json.loads(self.text[start:position + 1])))
+                        parent[3] += 1
+                    except json.JSONDecodeError:
+                        pass
+            elif char == ',':
+                self._last_string = None
+        return items
+
+
+class StreamCollector:
+    """
+    Suivi d'une réponse en streaming pour une étape: événements bruts de messages.stream en entrée,
+    événements applicatifs vers on_event:
+
+        {'type': 'start', 'stage'}
+        {'type': 'progress', 'stage', 'output_chars'}
+        {'type': 'item', 'stage', 'key', 'index', 'item'}     (voir STREAM_ITEM_KEYS)
+        {'type': 'done', 'stage', 'output_chars', 'interrupted'}
+    """
+
+    def __init__(self, stage: str, on_event: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.stage = stage
+        self.on_event = on_event
+        self.parser = IncrementalJSONParser()
+        self.items = 0
+        self._emit({'type': 'start', 'stage': stage})
+
+    def _emit(self, event: Dict[str, Any]):
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                # L'affichage ne doit jamais interrompre l'appel API
+                print(f"⚠️ Stream event handler failed: {e!r}", flush=True)
+
+    def handle(self, event):
+        """Traiter un événement brut du flux (message_start, content_block_delta...)"""
+        event_type = getattr(event, 'type', None)
+        if event_type == 'content_block_delta':
+            delta = event.delta
+            chunk = getattr(delta, 'partial_json', None) or getattr(delta, 'text', None) or ''
+            if not chunk:
+                return
+            for key, index, item in self.parser.feed(chunk):
+                self.items += 1
+                self._emit({'type': 'item', 'stage': self.stage, 'key': key, 'index': index, 'item': item})
+            self._emit({'type': 'progress', 'stage': self.stage, 'output_chars': len(self.parser.text)})
+
+    def finish(self, interrupted: bool = False):
+        if interrupted and self.parser.text:
+            print(f"⚠️ {self.stage}: stream interrupted after {len(self.parser.text)} chars, "
+                  f"{self.items} items, partial output discarded", flush=True)
+        self._emit({'type': 'done', 'stage': self.stage, 'output_chars': len(self.parser.text),
+                    'interrupted': interrupted})
+
+
+
+def _stream_request(request: Dict[str, Any]):
+    """
+    (requête, fin de tentative time.monotonic ou None): le timeout de la requête devient une limite sur toute
+    la tentative, httpx ne garde qu'un timeout de lecture (STREAM_READ_TIMEOUT au plus)
+    """
+    limit = request.get('timeout')
+    if not isinstance(limit, (int, float)):
+        return request, None
+    timeout = httpx.Timeout(limit, read=min(limit, STREAM_READ_TIMEOUT))
+    return dict(request, timeout=timeout), time.monotonic() + limit
+
+
+def _check_attempt(collector: 'StreamCollector', attempt_deadline: Optional[float]):
+    """TimeoutError (retryable) si la tentative dépasse sa durée totale"""
+    if attempt_deadline is not None and time.monotonic() > attempt_deadline:
+        raise TimeoutError(f"{collector.stage}: stream exceeded the attempt timeout")
+
+
+def stream_message(client, request: Dict[str, Any], on_event=None):
+    """
+    messages.stream(**request) jusqu'au message final (même objet que messages.create).
+    Le timeout de la requête borne toute la tentative (pas seulement chaque lecture, voir _stream_request).
+    Si la connexion tombe en cours de génération, l'erreur est relancée (événement 'done' avec interrupted=True):
+    _call_with_retry renvoie la même requête; les éléments déjà affichés restent, écrasés par la nouvelle tentative.
+    """
+    collector = StreamCollector(request_stage(request), on_event)
+    request, attempt_deadline = _stream_request(request)
+    try:
+        with client.messages.stream(**request) as stream:
+            for event in stream:
+                collector.handle(event)
+                _check_attempt(collector, attempt_deadline)
+            response = stream.get_final_message()
+    except Exception:
+        collector.finish(interrupted=True)
+        raise
+    collector.finish()
+    return response
+
+
+async def stream_message_async(client, request: Dict[str, Any], on_event=None):
+    """Équivalent async de stream_message (AsyncAnthropic)"""
+    collector = StreamCollector(request_stage(request), on_event)
+    request, attempt_deadline = _stream_request(request)
+    try:
+        async with client.messages.stream(**request) as stream:
+            async for event in stream:
+                collector.handle(event)
+                _check_attempt(collector, attempt_deadline)
+            response = await stream.get_final_message()
+    except Exception:
+        collector.finish(interrupted=True)
+        raise
+    collector.finish()
+    return response
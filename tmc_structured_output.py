@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+TMC Structured Output
+Sorties structurées des étapes LLM via tool use: schémas JSON par étape, extraction de l'entrée
+de l'outil forcé (tool_choice) et compteurs du chemin de sortie emprunté (outil, réparation locale, réparation LLM)
+"""
+
+import json
+import threading
+from typing import Dict, List, Any, Optional
+
+# ===== Schémas (JSON Schema, sous-ensemble accepté par l'API Messages) =====
+
+_STRING = {"type": "string"}
+_STRINGS = {"type": "array", "items": _STRING}
+
+PARSED_CV_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "nom_complet": _STRING,
+        "titre_professionnel": _STRING,
+        "profil_resume": _STRING,
+        "lieu_residence": {"type": "string", "description": "Ville, Pays ou 'Location not specified'"},
+        "langues": {"type": "array", "items": _STRING, "description": "['Not specified'] si introuvable"},
+        "competences": _STRINGS,
+        "experiences": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"periode": _STRING, "entreprise": _STRING, "poste": _STRING, "responsabilites": _STRINGS},
+                "required": ["periode", "entreprise", "poste", "responsabilites"]
+            }
+        },
+        "formation": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"diplome": _STRING, "institution": _STRING, "annee": _STRING, "pays": _STRING},
+                "required": ["diplome", "institution", "annee"]
+            }
+        },
+        "certifications": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"nom": _STRING, "organisme": _STRING, "annee": _STRING},
+                "required": ["nom"]
+            }
+        },
+        "projets": {
+            "type": "array",
+            "items": {"type": "object", "properties": {"nom": _STRING, "description": _STRING}, "required": ["nom"]}
+        }
+    },
+    "required": ["nom_complet", "titre_professionnel", "lieu_residence", "langues", "competences",
+                 "experiences", "formation"]
+}
+
+DOMAIN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "domaine": _STRING,
+        "poids": {"type": "number"},
+        "score": {"type": "number"},
+        "score_max": {"type": "number"},
+        "match": {"type": "string", "enum": ["excellent", "bon", "partiel", "incompatible"]},
+        "commentaire": _STRING
+    },
+    "required": ["domaine", "poids", "score", "score_max", "match", "commentaire"]
+}
+
+MATCHING_PROPERTIES = {
+    "score_matching": {"type": "number", "description": "Somme exacte des scores des domaines"},
+    "domaines_analyses": {"type": "array", "items": DOMAIN_SCHEMA, "minItems": 1},
+    "synthese_matching": _STRING
+}
+
+MATCHING_SCHEMA = {
+    "type": "object",
+    "properties": MATCHING_PROPERTIES,
+    "required": ["score_matching", "domaines_analyses", "synthese_matching"]
+}
+
+PARSE_AND_SCORE_SCHEMA = {
+    "type": "object",
+    "properties": {"parsed_cv": PARSED_CV_SCHEMA, "matching": MATCHING_SCHEMA},
+    "required": ["parsed_cv", "matching"]
+}
+
+ENRICHED_PROPERTIES = {
+    "titre_professionnel_enrichi": _STRING,
+    "profil_enrichi": _STRING,
+    "mots_cles_a_mettre_en_gras": _STRINGS,
+    "competences_enrichies": {
+        "type": "object",
+        "description": "{nom de catégorie: [compétences]}",
+        "additionalProperties": _STRINGS
+    },
+    "experiences_enrichies": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"periode": _STRING, "entreprise": _STRING, "poste": _STRING,
+                           "responsabilites": _STRINGS, "environment": _STRING},
+            "required": ["periode", "entreprise", "poste", "responsabilites"]
+        }
+    }
+}
+
+ENRICHED_SCHEMA = {
+    "type": "object",
+    "properties": ENRICHED_PROPERTIES,
+    "required": list(ENRICHED_PROPERTIES)
+}
+
+# Enrichissement sans matching préalable: le scoring est dans la même réponse
+ENRICHED_WITH_MATCHING_SCHEMA = {
+    "type": "object",
+    "properties": dict(ENRICHED_PROPERTIES, **MATCHING_PROPERTIES, points_forts=_STRINGS),
+    "required": list(ENRICHED_PROPERTIES) + MATCHING_SCHEMA["required"]
+}
+
+# Étape → (nom de l'outil, description, schéma)
+STAGE_TOOLS = {
+    'parse_cv': ('record_parsed_cv', "Enregistrer les informations structurées extraites du CV", PARSED_CV_SCHEMA),
+    'matching': ('record_matching_analysis', "Enregistrer l'analyse de matching pondérée CV / JD", MATCHING_SCHEMA),
+    'parse_and_score': ('record_parse_and_score', "Enregistrer le CV structuré et l'analyse de matching",
+                        PARSE_AND_SCORE_SCHEMA),
+    'enrich': ('record_enriched_cv', "Enregistrer le CV enrichi", ENRICHED_SCHEMA),
+    'enrich_with_matching': ('record_enriched_cv', "Enregistrer le CV enrichi et l'analyse de matching",
+                             ENRICHED_WITH_MATCHING_SCHEMA),
+}
+
+
+def stage_schema(stage: str) -> Dict[str, Any]:
+    """Schéma JSON attendu en sortie de l'étape"""
+    return STAGE_TOOLS[stage][2]
+
+
+def tool_params(stage: str) -> Dict[str, Any]:
+    """kwargs de messages.create qui forcent l'appel de l'outil de l'étape (tools + tool_choice)"""
+    name, description, schema = STAGE_TOOLS[stage]
+    return {
+        'tools': [{'name': name, 'description': description, 'input_schema': schema}],
+        'tool_choice': {'type': 'tool', 'name': name}
+    }
+
+
+# ===== Validation =====
+
+# Seuls les conteneurs sont structurels: un scalaire du mauvais type ("8.5" pour un nombre, 2021 pour une chaîne)
+# est converti par coerce_scalars ou laissé au post-traitement
+_STRUCTURAL_TYPES = {'object': dict, 'array': list}
+
+
+def _coerce_scalar(value: Any, schema_type: Optional[str]) -> Any:
+    """Chaîne numérique → nombre, nombre → chaîne, selon le type attendu; sinon value inchangée"""
+    if isinstance(value, bool):
+        return value
+    if schema_type in ('number', 'integer') and isinstance(value, str):
+        try:
+            number = float(value.strip().replace(',', '.'))
+        except ValueError:
+            return value
+        if number != number or number in (float('inf'), float('-inf')):
+            return value
+        return int(number) if schema_type == 'integer' or number.is_integer() else number
+    if schema_type == 'string' and isinstance(value, (int, float)):
+        return str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+    return value
+
+
+def coerce_scalars(data: Any, schema: Dict[str, Any]) -> Any:
+    """
+    Copie de data avec les scalaires convertis vers le type du schéma (récursif):
+    "score": "8.5" → 8.5, "annee": 2021 → "2021". Les conteneurs et valeurs non convertibles sont gardés tels quels.
+    """
+    if isinstance(data, dict):
+        properties = schema.get('properties', {})
+        coerced = {}
+        for key, value in data.items():
+            sub_schema = properties.get(key) or schema.get('additionalProperties')
+            coerced[key] = coerce_scalars(value, sub_schema) if isinstance(sub_schema, dict) else value
+        return coerced
+    if isinstance(data, list):
+        items = schema.get('items')
+        return [coerce_scalars(item, items) for item in data] if isinstance(items, dict) else data
+    return _coerce_scalar(data, schema.get('type'))
+
+
+def schema_errors(data: Any, schema: Dict[str, Any], path: str = '$') -> List[str]:
+    """
+    Écarts structurels entre data et le schéma: champs requis, objet vs tableau, propriétés et items (récursif).
+    Volontairement tolérant: types scalaires, enum et bornes ne sont pas vérifiés (coerce_scalars en amont,
+    le post-traitement corrige le reste).
+    """
+    expected = _STRUCTURAL_TYPES.get(schema.get('type'))
+    if expected and not isinstance(data, expected):
+        return [f"{path}: {schema.get('type')} attendu, {type(data).__name__} reçu"]
+
+    errors = []
+    if isinstance(data, dict):
+        errors += [f"{path}.{key}: requis" for key in schema.get('required', []) if key not in data]
+        for key, value in data.items():
+            sub_schema = schema.get('properties', {}).get(key) or schema.get('additionalProperties')
+            if isinstance(sub_schema, dict):
+                errors += schema_errors(value, sub_schema, f"{path}.{key}")
+    elif isinstance(data, list) and isinstance(schema.get('items'), dict):
+        for index, item in enumerate(data):
+            errors += schema_errors(item, schema['items'], f"{path}[{index}]")
+    return errors
+
+
+# ===== Lecture des réponses =====
+
+def tool_input(response, stage: str) -> Optional[Dict[str, Any]]:
+    """
+    Entrée de l'outil de l'étape (scalaires convertis) si la réponse est complète et conforme au schéma, sinon None
+    (pas de bloc tool_use, réponse coupée par max_tokens, champs requis manquants).
+    """
+    name, _, schema = STAGE_TOOLS[stage]
+    if getattr(response, 'stop_reason', None) == 'max_tokens':
+        print(f"⚠️ {stage}: tool input truncated (max_tokens)", flush=True)
+        return None
+    for block in getattr(response, 'content', None) or []:
+        if getattr(block, 'type', None) == 'tool_use' and getattr(block, 'name', None) == name:
+            data = coerce_scalars(block.input, schema)
+            errors = schema_errors(data, schema)
+            if errors:
+                print(f"⚠️ {stage}: tool input does not match schema ({'; '.join(errors[:3])})", flush=True)
+                return None
+            return data
+    return None
+
+
+def text_of(response) -> str:
+    """Texte de la réponse (blocs text), à défaut l'entrée JSON du premier bloc tool_use (pour la réparation)"""
+    blocks = getattr(response, 'content', None) or []
+    text = "".join(getattr(block, 'text', '') for block in blocks if getattr(block, 'type', None) == 'text')
+    if text:
+        return text
+    for block in blocks:
+        if getattr(block, 'type', None) == 'tool_use':
+            return json.dumps(block.input, ensure_ascii=False)
+    return ''
+
+
+# ===== Compteurs =====
+
+# Chemins de sortie: outil conforme, texte JSON par palier de réparation locale (tmc_json_utils),
+# appel LLM de réparation, échec
+OUTPUT_PATHS = ('tool_use', 'strict', 'json_repair', 'completion', 'llm_repair', 'failed')
+
+_output_paths: Dict[str, Dict[str, int]] = {}
+_output_paths_lock = threading.Lock()
+
+
+def record_output_path(stage: str, path: str):
+    """Compter le chemin de sortie emprunté par une étape (compteurs du process)"""
+    with _output_paths_lock:
+        counts = _output_paths.setdefault(stage, dict.fromkeys(OUTPUT_PATHS, 0))
+        counts[path] += 1
+
+
+def output_path_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    {étape: {chemin: n, repair_rate, llm_repair_rate}}: part des réponses hors tool use,
+    et part qui a nécessité un appel LLM de réparation (ou échoué)
+    """
+    with _output_paths_lock:
+        stats = {stage: dict(counts) for stage, counts in _output_paths.items()}
+    for counts in stats.values():
+        total = sum(counts.values())
+        counts['repair_rate'] = round((total - counts['tool_use']) / total, 3) if total else 0.0
+        counts['llm_repair_rate'] = round((counts['llm_repair'] + counts['failed']) / total, 3) if total else 0.0
+    return stats
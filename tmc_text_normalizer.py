@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+TMC Text Normalizer
+Normalisation déterministe du texte extrait avant le prompt: moins de tokens, même contenu
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
+
+# Séparateur de pages posé par l'extraction PDF, pages texte et OCR d'un PDF mixte comprises
+# (seul l'OCR complet marque ses pages par "--- Page N ---")
+PAGE_BREAK = "\f"
+
+PAGE_BANNER_RE = re.compile(r'^\s*-{2,}\s*Page\s+\d+\s*-{2,}\s*$', re.IGNORECASE)
+# Numéros de page seuls: "3", "- 3 -", "Page 3", "3/5", "Page 3 of 5", "Page 3 sur 5"
+PAGE_NUMBER_RE = re.compile(r'^\s*[-–—]?\s*(?:page\s*)?\d{1,3}\s*(?:(?:/|of|sur|de)\s*\d{1,3})?\s*[-–—]?\s*$', re.IGNORECASE)
+# Césure en fin de ligne entre deux minuscules: "développe-\nment" → "développement"
+HYPHEN_BREAK_RE = re.compile(r'([a-zà-öø-ÿ])[-‐]\n[ \t]*([a-zà-öø-ÿ])')
+# Césure conditionnelle, caractères invisibles, zone d'usage privé (icônes des polices de CV), caractère de remplacement
+INVISIBLE_RE = re.compile('[\u00ad\u200b-\u200f\u2060\ufeff\ue000-\uf8ff\ufffd]')
+CONTROL_RE = re.compile(r'[\x00-\x08\x0b\x0e-\x1f\x7f]')
+# Suites de points de conduite, tirets ou soulignés ("Python ........ 5 ans")
+LEADER_RE = re.compile(r'([.·_=~*•-])\1{3,}')
+SPACES_RE = re.compile(r'[ \t]+')
+# Puce en début de ligne (liste de compétences, responsabilités): la ligne est du contenu, jamais du bruit
+BULLET_RE = re.compile(r'^\s*[•·▪►○◦●■□➢✓✔*–—-]\s*\S')
+# Symboles des noms techniques (C++, C#, .NET, CI/CD) comptés comme du texte pour le ratio de bruit
+TECH_SYMBOLS = frozenset('+#/.')
+
+# Zone d'en-tête / pied de page: lignes non vides en haut et en bas de chaque page
+EDGE_LINES = 3
+
+# Mots outils pour la détection de langue (sans les mots communs aux deux langues: "a", "on"...)
+FRENCH_STOPWORDS = frozenset(
+    "le la les un une des du de et en au aux pour par sur dans avec sans sous chez est sont été être "
+    "ont avoir qui que dont où ce cette ces son sa ses leur leurs nous vous il elle ils elles je mon ma mes "
+    "plus ainsi également depuis entre lors afin notamment".split()
+)
+ENGLISH_STOPWORDS = frozenset(
+    "the an and of to in for with by from at as is are was were be been has have had which that "
+    "this these those his her their our we you he she they it my into over under while also including "
+    "since during within".split()
+)
+WORD_RE = re.compile(r"[a-zà-öø-ÿ]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation du nombre de tokens (≈ 4 caractères par token); les tokens exacts viennent de l'API"""
+    return (len(text) + 3) // 4
+
+
+def detect_language(text: str, min_hits: int = 8) -> Optional[str]:
+    """
+    Langue dominante d'un texte par comptage des mots outils: 'fr', 'en',
+    ou None si le texte est trop court ou sans langue nettement majoritaire (CV bilingue).
+    """
+    french = english = 0
+    for word in WORD_RE.findall(text.lower()):
+        if word in FRENCH_STOPWORDS:
+            french += 1
+        elif word in ENGLISH_STOPWORDS:
+            english += 1
+    if french + english < min_hits:
+        return None
+    if french >= 2 * english:
+        return 'fr'
+    if english >= 2 * french:
+        return 'en'
+    return None
+
+
+def _split_pages(text: str) -> List[List[str]]:
+    """Pages (listes de lignes), découpées sur les sauts de page et les bannières OCR"""
+    pages: List[List[str]] = [[]]
+    for line in text.split("\n"):
+        parts = line.split(PAGE_BREAK)
+        for i, part in enumerate(parts):
+            if i > 0 and pages[-1]:
+                pages.append([])
+            if PAGE_BANNER_RE.match(part):
+                if pages[-1]:
+                    pages.append([])
+                continue
+            pages[-1].append(part)
+    return [page for page in pages if any(line.strip() for line in page)]
+
+
+def _line_key(line: str) -> str:
+    """Clé de comparaison des en-têtes / pieds: chiffres neutralisés ("Page 2 of 5" = "Page 3 of 5")"""
+    return re.sub(r'\d+', '#', ' '.join(line.lower().split()))
+
+
+def _edge_indexes(page: List[str]) -> List[int]:
+    non_empty = [i for i, line in enumerate(page) if line.strip()]
+    return sorted(set(non_empty[:EDGE_LINES] + non_empty[-EDGE_LINES:]))
+
+
+def _drop_repeated_edges(pages: List[List[str]], stats: Dict[str, int]) -> List[List[str]]:
+    """
+    En-têtes et pieds de page répétés: une ligne de bord présente sur au moins 60% des pages
+    (toutes les pages s'il n'y en a que deux) n'est gardée qu'à sa première occurrence.
+    Les numéros de page seuls sont supprimés en bord de page.
+    """
+    if len(pages) < 2:
+        return pages
+
+    counts = Counter()
+    for page in pages:
+        counts.update({_line_key(page[i]) for i in _edge_indexes(page)})
+    min_pages = len(pages) if len(pages) == 2 else max(2, int(len(pages) * 0.6 + 0.999))
+    repeated = {key for key, count in counts.items() if count >= min_pages and key}
+
+    seen = set()
+    cleaned = []
+    for page in pages:
+        edges = set(_edge_indexes(page))
+        kept = []
+        for i, line in enumerate(page):
+            if i in edges:
+                if PAGE_NUMBER_RE.match(line):
+                    stats['page_numbers'] += 1
+                    continue
+                key = _line_key(line)
+                if key in repeated:
+                    if key in seen:
+                        stats['repeated_lines'] += 1
+                        continue
+                    seen.add(key)
+            kept.append(line)
+        cleaned.append(kept)
+    return cleaned
+
+
+def _is_noise_line(line: str) -> bool:
+    """
+    Ligne sans texte: aucun caractère alphanumérique, ou moins de 30% de texte sur 4 caractères et plus (bruit OCR).
+    Les lignes à puce et les symboles techniques (+ # / .) ne comptent jamais comme du bruit ("• C++", "- C++ / C#").
+    """
+    visible = line.replace(' ', '')
+    if not visible:
+        return False
+    alnum = sum(1 for c in visible if c.isalnum())
+    if alnum == 0:
+        return True
+    if BULLET_RE.match(line):
+        return False
+    text = alnum + sum(1 for c in visible if c in TECH_SYMBOLS)
+    return len(visible) >= 4 and text / len(visible) < 0.3
+
+
+def normalize_text(text: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Normaliser le texte extrait d'un CV ou d'une JD.
+
+    Étapes (ordre fixe, sans appel externe):
+    1. Unicode NFKC (ligatures, espaces spéciales), suppression des invisibles et icônes (zone privée)
+    2. Bannières "--- Page N ---", numéros de page, en-têtes / pieds répétés sur les pages
+    3. Césures de fin de ligne recollées
+    4. Lignes de bruit (glyphes sans texte), points de conduite, lignes dupliquées
+       (les cellules fusionnées sont traitées à l'extraction DOCX, d'après w:tcPr: "Python | 5 | 5" reste intact)
+    5. Espaces multiples et lignes vides multiples
+
+    Returns:
+        tuple: (texte normalisé, statistiques avant/après et compteurs par étape)
+    """
+    stats: Dict[str, Any] = {
+        'chars_before': len(text),
+        'tokens_before': estimate_tokens(text),
+        'page_banners': 0,
+        'page_numbers': 0,
+        'repeated_lines': 0,
+        'dehyphenated': 0,
+        'noise_lines': 0,
+        'duplicate_lines': 0
+    }
+
+    text = unicodedata.normalize('NFKC', text.replace('\r\n', '\n').replace('\r', '\n'))
+    text = INVISIBLE_RE.sub('', text)
+    text = CONTROL_RE.sub(' ', text)
+
+    stats['page_banners'] = sum(1 for line in text.split('\n') if PAGE_BANNER_RE.match(line))
+    pages = _drop_repeated_edges(_split_pages(text), stats)
+    text = '\n\n'.join('\n'.join(page) for page in pages)
+
+    text, stats['dehyphenated'] = HYPHEN_BREAK_RE.subn(r'\1\2', text)
+
+    lines = []
+    for line in text.split('\n'):
+        line = LEADER_RE.sub(' ', line)
+        line = SPACES_RE.sub(' ', line).strip()
+        if _is_noise_line(line):
+            stats['noise_lines'] += 1
+            continue
+        if line and lines and line == lines[-1]:
+            stats['duplicate_lines'] += 1
+            continue
+        if not line and (not lines or not lines[-1]):
+            continue
+        lines.append(line)
+
+    normalized = '\n'.join(lines).strip()
+    stats['chars_after'] = len(normalized)
+    stats['tokens_after'] = estimate_tokens(normalized)
+    stats['token_reduction_pct'] = (
+        round(100 * (1 - stats['tokens_after'] / stats['tokens_before']), 1) if stats['tokens_before'] else 0.0
+    )
+    return normalized, stats
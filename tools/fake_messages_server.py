@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Faux serveur de l'API Anthropic Messages (POST /v1/messages), bibliothèque standard uniquement
+
+Répond des JSON plausibles par étape (parsing CV, matching, parse_and_score, enrichissement, réparation JSON)
+reconnue d'après l'outil forcé (bloc tool_use) ou le prompt (system compris), avec une latence configurable et un prompt caching simulé
+(usage cache_read / cache_creation), en JSON ou en streaming SSE ("stream": true, sortie découpée sur la latence):
+permet de tester les clients sync / async, le streaming et la concurrence sans clé API ni coût.
+Pannes injectables (--fault-rate): 429 avec retry-after, 529 overloaded, ou requête sans réponse (timeout client).
+
+Usage:
+    python tools/fake_messages_server.py [--port 8765] [--latency 1.0] [--malformed-rate 0.0]
+                                         [--fault-rate 0.0] [--faults 429,529,timeout]
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=test python tmc_async_enricher.py jd.txt cv1.txt cv2.txt
+
+En Python:
+    with FakeMessagesServer(latency=0.2) as server:
+        enricher = TMCUniversalEnricher(api_key='test', base_url=server.url)
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PARSED_CV = {
+    "nom_complet": "Candidat Exemple",
+    "titre_professionnel": "Cloud Architect",
+    "profil_resume": "Architecte cloud, 10 ans d'expérience en migration et automatisation.",
+    "lieu_residence": "Montréal, Canada",
+    "langues": ["Français", "Anglais"],
+    "competences": ["Azure", "Kubernetes", "Terraform", "Python"],
+    "experiences": [
+        {
+            "periode": "2019-2024",
+            "entreprise": "Exemple Inc.",
+            "poste": "Cloud Architect",
+            "responsabilites": ["Migration de 40 applications vers Azure", "Mise en place de pipelines CI/CD"]
+        }
+    ],
+    "formation": [{"diplome": "B.Ing. Génie logiciel", "institution": "ETS", "annee": "2012", "pays": "Canada"}],
+    "certifications": [{"nom": "AZ-305", "organisme": "Microsoft", "annee": "2022"}],
+    "projets": []
+}
+
+DOMAINS = [
+    {"domaine": "Cloud Azure", "poids": 40, "score": 32, "score_max": 40, "match": "bon",
+     "commentaire": "Five years of Azure migrations with AZ-305 certification."},
+    {"domaine": "Kubernetes", "poids": 35, "score": 21, "score_max": 35, "match": "partiel",
+     "commentaire": "Kubernetes listed in skills, limited production evidence."},
+    {"domaine": "Python", "poids": 25, "score": 15, "score_max": 25, "match": "partiel",
+     "commentaire": "Python used for automation scripts."},
+]
+
+MATCHING = {
+    "score_matching": sum(d["score"] for d in DOMAINS),
+    "domaines_analyses": DOMAINS,
+    "synthese_matching": "Solid cloud profile with strong Azure delivery; Kubernetes depth to confirm."
+}
+
+# Taille minimale d'un préfixe mis en cache (Claude Sonnet)
+MIN_CACHE_TOKENS = 1024
+
+# Pannes injectables: rate limit (retry-after), surcharge, requête sans réponse
+FAULTS = ('429', '529', 'timeout')
+
+# Taille des fragments de sortie en streaming (caractères)
+STREAM_CHUNK_CHARS = 40
+
+# Mode parse_and_score: parsing + matching dans une seule réponse
+PARSE_AND_SCORE = {"parsed_cv": PARSED_CV, "matching": MATCHING}
+
+ENRICHED = dict(
+    MATCHING,
+    titre_professionnel_enrichi="Architecte Cloud Azure",
+    profil_enrichi="Architecte cloud avec **10 ans** d'expérience en migration Azure.",
+    competences_enrichies={"Cloud": ["Azure", "Terraform"], "Conteneurs": ["Kubernetes"]},
+    experiences_enrichies=[{
+        "periode": "2019-2024", "entreprise": "Exemple Inc.", "poste": "Cloud Architect",
+        "responsabilites": ["Migration de **40 applications** vers Azure"], "environment": "Azure, Terraform"
+    }],
+    points_forts=["Migrations Azure", "Automatisation"],
+    mots_cles_a_mettre_en_gras=["Azure", "Kubernetes"]
+)
+
+
+# Réponse par outil forcé (tool_choice, voir tmc_structured_output.STAGE_TOOLS)
+TOOL_RESPONSES = {
+    "record_parsed_cv": PARSED_CV,
+    "record_matching_analysis": MATCHING,
+    "record_parse_and_score": PARSE_AND_SCORE,
+    "record_enriched_cv": ENRICHED,
+}
+
+
+def _text_blocks(request: dict) -> list:
+    """Blocs texte de la requête dans l'ordre du préfixe de cache (system puis messages)"""
+    def blocks(content):
+        return [{"text": content}] if isinstance(content, str) else [b for b in content if b.get("type", "text") == "text"]
+    result = blocks(request.get("system") or [])
+    for message in request.get("messages", []):
+        result.extend(blocks(message["content"]))
+    return result
+
+
+def canned_response(prompt: str) -> dict:
+    """Réponse JSON de l'étape reconnue dans le prompt"""
+    if "The following JSON is malformed" in prompt:
+        return ENRICHED if "profil_enrichi" in prompt else MATCHING if "domaines_analyses" in prompt else PARSED_CV
+    if '"parsed_cv"' in prompt:
+        return PARSE_AND_SCORE
+    if "Tu es un expert en analyse de CV" in prompt:
+        return PARSED_CV
+    if "ANALYSE DE MATCHING PONDÉRÉE" in prompt:
+        return MATCHING
+    return ENRICHED
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeMessages/1.0"
+    # Keep-alive (réutilisation des connexions du pool client): Content-Length ou chunked sur chaque réponse
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, message: dict, output: str, latency: float):
+        """Réponse en Server-Sent Events (format messages.stream): sortie découpée en fragments répartis sur la latence"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(event_type, data):
+            data = dict(data, type=event_type)
+            chunk = f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(chunk):x}\r\n".encode('ascii') + chunk + b"\r\n")
+            self.wfile.flush()
+
+        block = message['content'][0]
+        if block['type'] == 'tool_use':
+            start_block, delta_type, field = dict(block, input={}), 'input_json_delta', 'partial_json'
+        else:
+            start_block, delta_type, field = dict(block, text=''), 'text_delta', 'text'
+        chunks = [output[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(output), STREAM_CHUNK_CHARS)]
+
+        send('message_start', {'message': dict(message, content=[], stop_reason=None,
+                                               usage=dict(message['usage'], output_tokens=1))})
+        send('content_block_start', {'index': 0, 'content_block': start_block})
+        for chunk in chunks:
+            time.sleep(latency / max(1, len(chunks)))
+            send('content_block_delta', {'index': 0, 'delta': {'type': delta_type, field: chunk}})
+        send('content_block_stop', {'index': 0})
+        send('message_delta', {'delta': {'stop_reason': message['stop_reason'], 'stop_sequence': None},
+                               'usage': {'output_tokens': message['usage']['output_tokens']}})
+        send('message_stop', {})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        fake = self.server.fake
+        if self.path.rstrip('/') != '/v1/messages':
+            self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        fault = fake.pick_fault()
+        if fault == '429':
+            self._send_json(429, {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limited"}},
+                            headers={'retry-after': str(fake.retry_after)})
+            return
+        if fault == '529':
+            self._send_json(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+            return
+        if fault == 'timeout':
+            # Aucune réponse: le client attend jusqu'à son timeout (ou la fermeture après hang_seconds)
+            time.sleep(fake.hang_seconds)
+            self.close_connection = True
+            return
+        blocks = _text_blocks(request)
+        prompt = "".join(b.get("text", "") for b in blocks)
+        fake.record(request)
+        usage = fake.cache_usage(blocks)
+        stream = bool(request.get("stream"))
+        if not stream:
+            time.sleep(fake.latency)
+
+        tool = (request.get("tool_choice") or {}).get("name")
+        payload = TOOL_RESPONSES.get(tool) or canned_response(prompt)
+        text = json.dumps(payload, ensure_ascii=False)
+        if fake.rng.random() < fake.malformed_rate:
+            # Outil non appelé, JSON en texte: tronqué (réparation LLM) ou balisé avec virgule finale (réparation locale)
+            if fake.rng.random() < 0.5:
+                tool, text = None, text[:len(text) // 2]
+            else:
+                tool, text = None, "```json\n" + text[:-1] + ",}\n```"
+
+        if tool:
+            content, stop_reason = [{"type": "tool_use", "id": f"toolu_fake_{fake.requests:06d}", "name": tool,
+                                     "input": payload}], "tool_use"
+        else:
+            content, stop_reason = [{"type": "text", "text": text}], "end_turn"
+
+        message = {
+            "id": f"msg_fake_{fake.requests:06d}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "fake"),
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": dict(usage, output_tokens=max(1, len(text) // 4))
+        }
+        if stream:
+            self._send_stream(message, text, fake.latency)
+        else:
+            self._send_json(200, message)
+
+
+class FakeMessagesServer:
+    """Serveur de test dans un thread (context manager); `url` à passer en base_url"""
+
+    def __init__(self, port: int = 0, latency: float = 0.0, malformed_rate: float = 0.0, seed: int = 0,
+                 fault_rate: float = 0.0, faults=FAULTS, retry_after: float = 1.0, hang_seconds: float = 30.0):
+        self.latency = latency
+        self.malformed_rate = malformed_rate
+        # Pannes injectées: part des requêtes, types tirés parmi `faults`, compteurs par type
+        self.fault_rate = fault_rate
+        self.faults = tuple(faults)
+        self.retry_after = retry_after
+        self.hang_seconds = hang_seconds
+        self.injected_faults = dict.fromkeys(self.faults, 0)
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.max_in_flight = 0
+        # Préfixes mis en cache (prompt caching simulé, sans expiration)
+        self._cached_prefixes = set()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def record(self, request: dict):
+        """Compter les requêtes et la concurrence maximale observée (fin après la latence)"""
+        with self._lock:
+            self.requests += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        threading.Timer(self.latency, self._done).start()
+
+    def pick_fault(self):
+        """Panne à injecter pour cette requête ('429', '529', 'timeout') ou None"""
+        with self._lock:
+            if not self.faults or self.rng.random() >= self.fault_rate:
+                return None
+            fault = self.rng.choice(self.faults)
+            self.injected_faults[fault] += 1
+            return fault
+
+    def cache_usage(self, blocks: list) -> dict:
+        """
+        Usage simulé du prompt caching (~4 caractères par token): préfixe jusqu'au dernier bloc
+        cache_control relu s'il a déjà été vu, sinon écrit (si ≥ MIN_CACHE_TOKENS), reste facturé en input
+        """
+        tokens = [len(b.get("text", "")) // 4 for b in blocks]
+        breakpoints = [i for i, b in enumerate(blocks) if b.get("cache_control")]
+        usage = {"input_tokens": max(1, sum(tokens)), "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+        if not breakpoints or sum(tokens[:breakpoints[-1] + 1]) < MIN_CACHE_TOKENS:
+            return usage
+        # Plus long préfixe déjà en cache parmi les breakpoints, écriture jusqu'au dernier breakpoint
+        with self._lock:
+            keys = [json.dumps([b.get("text") for b in blocks[:i + 1]]) for i in breakpoints]
+            hit = max((i for i, key in zip(breakpoints, keys) if key in self._cached_prefixes), default=-1)
+            self._cached_prefixes.update(keys)
+        read = sum(tokens[:hit + 1])
+        written = sum(tokens[hit + 1:breakpoints[-1] + 1])
+        usage.update(input_tokens=max(1, sum(tokens) - read - written), cache_read_input_tokens=read,
+                     cache_creation_input_tokens=written)
+        return usage
+
+    def _done(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=1.0, help="Secondes avant chaque réponse")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="Part des réponses en JSON tronqué")
+    parser.add_argument('--fault-rate', type=float, default=0.0, help="Part des requêtes en panne (429 / 529 / timeout)")
+    parser.add_argument('--faults', default=','.join(FAULTS), help="Types de pannes injectées, séparés par des virgules")
+    parser.add_argument('--hang-seconds', type=float, default=30.0, help="Durée d'une panne 'timeout' avant fermeture")
+    args = parser.parse_args()
+
+    server = FakeMessagesServer(args.port, args.latency, args.malformed_rate, fault_rate=args.fault_rate,
+                                faults=args.faults.split(','), hang_seconds=args.hang_seconds)
+    print(f"🧪 Fake Messages API on {server.url} (latency {args.latency}s)", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"📊 {server.requests} requests, max {server.max_in_flight} in flight, "
+              f"faults injected: {server.injected_faults}", flush=True)
+        server._httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()